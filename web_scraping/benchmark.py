@@ -0,0 +1,442 @@
+import argparse
+import functools
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+
+from mock_portal import PAGE_SIZE, MockPortal
+
+
+DEFAULT_RESULTS_PATH = os.path.join(os.path.expanduser("~"), ".cache", "web_scraping", "benchmarks.jsonl")
+
+# name -> MockPortal options plus "endpoint" (use the HTTP incarico fetcher)
+# and "grid" (read the grid from its endpoint instead of paging the browser)
+# and "workers" (pipeline workers; 0 processes every page before leaving it)
+SCENARIOS = {
+    "small": {"rows": 120, "latency_ms": 0},
+    "paged": {"rows": 1000, "latency_ms": 20},
+    "slow-network": {"rows": 300, "latency_ms": 150},
+    "endpoint": {"rows": 1000, "latency_ms": 20, "endpoint": True},
+    "grid-api": {"rows": 1000, "latency_ms": 20, "endpoint": True, "grid": True},
+    "serial": {"rows": 1000, "latency_ms": 20, "endpoint": True, "workers": 0},
+}
+
+# Scraper methods timed as phases. Nested phases overlap: scrape covers the
+# browser session; extract is the browser stage of a page and process the
+# worker stage. incarico runs on the lookup pool next to both (inside
+# process with 0 workers); the modals run inside process with 0 workers and
+# in the retry pass otherwise. export is the rest of the run.
+PHASES = {
+    "scrape": "scrape",
+    "browser": "start_browser",
+    "login": "ensure_session",
+    "search": "open_activity_search",
+    "filters": "apply_filters",
+    "extract": "collect_page",
+    "process": "finish_page",
+    "incarico": "fetch_details",
+    "modal": "resolve_with_modals",
+    "paginate": "go_to_next_page",
+    "grid": "scrape_endpoint",
+}
+
+COMPARED_METRICS = ("rows_per_second", "commands_per_page", "page_load_ms", "renderer_rss_mb", "peak_rss_mb",
+                    "seconds")
+LEAN_MODES = {"on": (True,), "off": (False,), "both": (False, True)}
+
+# Rows of the in-memory row accumulator comparison (0 skips it)
+ACCUMULATOR_ROWS = 20000
+
+
+class CommandCounter:
+    """Counts and times every WebDriver command sent by this process while active"""
+
+    def __init__(self):
+        self.counts = Counter()
+        self.seconds = Counter()
+        self.original = None
+
+    def __enter__(self):
+        from selenium.webdriver.remote.remote_connection import RemoteConnection
+
+        self.original = original = RemoteConnection.execute
+        counts, seconds = self.counts, self.seconds
+
+        def execute(connection, command, params):
+            counts[command] += 1
+            started = time.perf_counter()
+            try:
+                return original(connection, command, params)
+            finally:
+                seconds[command] += time.perf_counter() - started
+
+        RemoteConnection.execute = execute
+        return self
+
+    def __exit__(self, *exc):
+        from selenium.webdriver.remote.remote_connection import RemoteConnection
+        RemoteConnection.execute = self.original
+
+
+class RssSampler(threading.Thread):
+    """Peak resident memory of this process and its children (Chrome, chromedriver).
+
+    renderer_peak tracks the Chrome renderer processes alone; it needs psutil.
+    """
+
+    def __init__(self, interval=0.2):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = 0
+        self.renderer_peak = 0
+        self.stopped = threading.Event()
+
+    def sample(self):
+        import psutil
+
+        process = psutil.Process()
+        total = renderers = 0
+        for proc in [process, *process.children(recursive=True)]:
+            try:
+                rss = proc.memory_info().rss
+                if "--type=renderer" in proc.cmdline():
+                    renderers += rss
+            except psutil.Error:
+                continue
+            total += rss
+        self.peak = max(self.peak, total)
+        self.renderer_peak = max(self.renderer_peak, renderers)
+
+    def run(self):
+        try:
+            import psutil  # noqa: F401
+        except ImportError:
+            return
+        while not self.stopped.wait(self.interval):
+            self.sample()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+        if not self.peak:
+            # Without psutil: peak of this process plus the largest reaped child, in KiB on Linux
+            usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            usage += resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+            self.peak = usage * 1024
+        return self.peak
+
+
+def time_phases(scraper, timings):
+    """Wrap the scraper's phase methods on the instance so every call is timed (from any thread)"""
+    lock = threading.Lock()
+    for phase, name in PHASES.items():
+        method = getattr(scraper, name)
+
+        @functools.wraps(method)
+        def timed(*args, _method=method, _phase=phase, **kwargs):
+            started = time.perf_counter()
+            try:
+                return _method(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                with lock:
+                    timings[_phase] = timings.get(_phase, 0.0) + elapsed
+
+        setattr(scraper, name, timed)
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def count_rows(path):
+    with open(path, encoding="utf-8") as f:
+        return max(0, sum(1 for _ in f) - 1)
+
+
+def run_scenario(name, options, output_dir, log=print, scraper_options=None, lean_profile=True):
+    """Scrape the mock portal end to end in headless Chrome and return the measurements"""
+    from scraper import ActivityScraper
+
+    options = dict(options)
+    use_endpoint = options.pop("endpoint", False)
+    use_grid = options.pop("grid", False)
+    workers = options.pop("workers", None)
+    timings = {}
+    pages = {"total": 0}
+    save_path = os.path.join(output_dir, f"{name}.csv")
+
+    def progress(current, total, rows, unit="page"):
+        pages["total"] = total or current
+
+    with MockPortal(**options) as portal:
+        scraper = ActivityScraper(
+            log=log, login_url=portal.login_url, persist_session=False, cache_mode="bypass",
+            incarico_endpoint=portal.incarico_endpoint if use_endpoint else "",
+            incarico_field="descrizione", progress=progress, lean_profile=lean_profile,
+            grid_endpoint=portal.grid_endpoint if use_grid else "",
+            **({"pipeline_workers": workers} if workers is not None else {}),
+            **(scraper_options or {}))
+        time_phases(scraper, timings)
+
+        sampler = RssSampler()
+        sampler.start()
+        started = time.perf_counter()
+        with CommandCounter() as commands:
+            ok = scraper.run(portal.email, portal.password, portal.target_url, save_path)
+        seconds = time.perf_counter() - started
+        peak_rss = sampler.stop()
+        timings["export"] = max(0.0, seconds - timings.get("scrape", 0.0))
+
+        rows = count_rows(save_path) if ok and os.path.exists(save_path) else 0
+        expected = len(portal.rows)
+        asset_requests = portal.asset_requests
+
+    page_count = max(pages["total"], 1)
+    total_commands = sum(commands.counts.values())
+    return {
+        "scenario": name,
+        "options": dict(options, endpoint=use_endpoint, grid=use_grid, workers=workers),
+        "lean_profile": lean_profile,
+        "ok": bool(ok) and rows == expected,
+        "error": None if ok else scraper.last_error,
+        "rows": rows,
+        "expected_rows": expected,
+        "pages": pages["total"],
+        "seconds": round(seconds, 3),
+        "rows_per_second": round(rows / seconds, 2) if seconds else 0.0,
+        "commands": total_commands,
+        "commands_per_page": round(total_commands / page_count, 1),
+        "top_commands": dict(commands.counts.most_common(8)),
+        "phases": {phase: round(value, 3) for phase, value in sorted(timings.items())},
+        # driver.get returns at the load event, or at DOMContentLoaded with the eager strategy
+        "page_load_ms": round(commands.seconds["get"] / commands.counts["get"] * 1000, 1)
+        if commands.counts["get"] else 0.0,
+        "asset_requests": asset_requests,
+        "peak_rss_mb": round(peak_rss / 2 ** 20, 1),
+        "renderer_rss_mb": round(sampler.renderer_peak / 2 ** 20, 1),
+    }
+
+
+def accumulate_frames(pages, sample):
+    """The per-table way: one DataFrame per page, joined with pd.concat at the end"""
+    import pandas as pd
+    from schema import FETCH_COLUMNS
+
+    all_dfs = []
+    for page in pages:
+        rows, extracted = json.loads(page)
+        df = pd.DataFrame(rows, columns=FETCH_COLUMNS)
+        df["incarico_extracted"] = pd.Series(extracted, index=df.index, dtype=object)
+        all_dfs.append(df)
+        sample()
+    df = pd.concat(all_dfs, ignore_index=True)
+    sample()
+    return df
+
+
+def accumulate_columnar(pages, sample):
+    from columnar import ColumnarBuffer
+
+    buffer = ColumnarBuffer()
+    for page in pages:
+        rows, extracted = json.loads(page)
+        buffer.append(rows, extracted)
+        sample()
+    df = buffer.to_frame()
+    sample()
+    return df
+
+
+ACCUMULATORS = {"frames+concat": accumulate_frames, "columnar": accumulate_columnar}
+
+
+def allocated_bytes():
+    """Python allocations traced by tracemalloc plus the pyarrow pool holding pandas strings"""
+    try:
+        import pyarrow
+        arrow = pyarrow.total_allocated_bytes()
+    except ImportError:
+        arrow = 0
+    return tracemalloc.get_traced_memory()[0] + arrow
+
+
+def compare_accumulators(rows=ACCUMULATOR_ROWS, page_size=PAGE_SIZE):
+    """Time and peak memory of collecting rows in memory, per accumulator.
+
+    Pages are decoded from JSON inside the loop as WebDriver hands them
+    over, so both accumulators start from fresh strings. The peak is
+    sampled after every page and after the final frame is built; retained
+    is what the frame still holds once the accumulator is gone (deep
+    memory_usage would count a shared string once per cell).
+    """
+    from schema import FETCH_INDEXES
+
+    grid_rows = [[row[i] for i in FETCH_INDEXES] for row in MockPortal.generate_rows(rows)]
+    pages = []
+    for start in range(0, rows, page_size):
+        page_rows = grid_rows[start:start + page_size]
+        extracted = [f"Incarico {start + i + 1}" for i in range(len(page_rows))]
+        pages.append(json.dumps([page_rows, extracted]))
+
+    results = []
+    for name, accumulate in ACCUMULATORS.items():
+        started = time.perf_counter()
+        accumulate(pages, lambda: None)
+        seconds = time.perf_counter() - started
+
+        peak = 0
+
+        def sample():
+            nonlocal peak
+            peak = max(peak, allocated_bytes() - base)
+
+        tracemalloc.start()
+        base = allocated_bytes()
+        try:
+            df = accumulate(pages, sample)
+            retained = allocated_bytes() - base
+        finally:
+            tracemalloc.stop()
+        results.append({
+            "accumulator": name,
+            "rows": len(df),
+            "seconds": round(seconds, 3),
+            "rows_per_second": round(len(df) / seconds) if seconds else 0,
+            "peak_mb": round(peak / 1e6, 1),
+            "retained_mb": round(retained / 1e6, 1),
+        })
+        del df
+    return results
+
+
+def format_accumulators(results):
+    lines = [f"{'accumulator':<14} {'rows':>6} {'rows/s':>8} {'peak MB':>8} {'kept MB':>8} {'seconds':>8}  vs first"]
+    first = results[0] if results else None
+    for result in results:
+        deltas = ""
+        if result is not first:
+            deltas = ", ".join(f"{metric} {(result[metric] - first[metric]) / first[metric] * 100:+.1f}%"
+                               for metric in ("seconds", "peak_mb", "retained_mb") if first[metric])
+        lines.append(f"{result['accumulator']:<14} {result['rows']:>6} {result['rows_per_second']:>8} "
+                     f"{result['peak_mb']:>8} {result['retained_mb']:>8} {result['seconds']:>8}  {deltas}")
+    return "\n".join(lines)
+
+
+def load_results(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def save_results(path, records):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def baseline_for(history, record, baseline=None):
+    """Most recent earlier result of the same scenario, from baseline (commit or label) if given"""
+    candidates = [old for old in history if old["scenario"] == record["scenario"] and old.get("ok")
+                  and old.get("lean_profile", True) == record["lean_profile"]]
+    if baseline:
+        candidates = [old for old in candidates if baseline in (old.get("commit"), old.get("label"))]
+    else:
+        candidates = [old for old in candidates if old.get("commit") != record.get("commit")] or candidates
+    return candidates[-1] if candidates else None
+
+
+def format_report(records, history, baseline=None):
+    lines = [f"{'scenario':<14} {'lean':>4} {'rows':>6} {'rows/s':>8} {'cmd/page':>9} {'load ms':>8} "
+             f"{'rndr MB':>8} {'rss MB':>8} {'seconds':>8}  vs baseline"]
+    for record in records:
+        previous = baseline_for(history, record, baseline)
+        deltas = ""
+        if previous:
+            parts = []
+            for metric in COMPARED_METRICS:
+                if previous.get(metric):
+                    change = (record[metric] - previous[metric]) / previous[metric] * 100
+                    parts.append(f"{metric} {change:+.1f}%")
+            deltas = f"{previous.get('label') or previous.get('commit')}: " + ", ".join(parts)
+        status = "" if record["ok"] else f"  FAILED {record.get('error') or 'row count mismatch'}"
+        lean = "on" if record["lean_profile"] else "off"
+        lines.append(f"{record['scenario']:<14} {lean:>4} {record['rows']:>6} {record['rows_per_second']:>8} "
+                     f"{record['commands_per_page']:>9} {record['page_load_ms']:>8} {record['renderer_rss_mb']:>8} "
+                     f"{record['peak_rss_mb']:>8} {record['seconds']:>8}  {deltas}{status}")
+        lines.append("    phases: " + ", ".join(f"{phase} {value:.2f}s" for phase, value in record["phases"].items()))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="End-to-end scraper benchmark against the local mock portal.")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="scenario to run (repeatable, default: all)")
+    parser.add_argument("--rows", type=int, help="override the row count of every scenario")
+    parser.add_argument("--latency-ms", type=int, help="override the injected latency of every scenario")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--label", help="name stored with the results, e.g. a branch or experiment")
+    parser.add_argument("--results", default=DEFAULT_RESULTS_PATH, help="JSON lines file results are appended to")
+    parser.add_argument("--baseline", help="commit or label to compare against (default: latest other commit)")
+    parser.add_argument("--no-save", action="store_true")
+    parser.add_argument("--lean", choices=sorted(LEAN_MODES), default="on",
+                        help="lean browser profile; 'both' runs every scenario with and without it")
+    parser.add_argument("--trace", action="store_true", help="also write a run trace per scenario")
+    parser.add_argument("--verbose", "-v", action="store_true", help="show the scraper log")
+    parser.add_argument("--accumulator-rows", type=int, default=ACCUMULATOR_ROWS,
+                        help="rows of the in-memory accumulator comparison (0: skip, default: %(default)s)")
+    parser.add_argument("--accumulators-only", action="store_true",
+                        help="only compare the in-memory row accumulators (no browser)")
+    args = parser.parse_args(argv)
+
+    accumulators = compare_accumulators(args.accumulator_rows) if args.accumulator_rows > 0 else []
+    if args.accumulators_only:
+        print(format_accumulators(accumulators))
+        return 0
+
+    log = print if args.verbose else (lambda message: None)
+    history = load_results(args.results)
+    commit = git_commit()
+    records = []
+    with tempfile.TemporaryDirectory() as output_dir:
+        for name in args.scenario or list(SCENARIOS):
+            options = dict(SCENARIOS[name])
+            if args.rows is not None:
+                options["rows"] = args.rows
+            if args.latency_ms is not None:
+                options["latency_ms"] = args.latency_ms
+            for lean_profile in LEAN_MODES[args.lean]:
+                for run in range(args.repeat):
+                    print(f"Running {name}, lean {'on' if lean_profile else 'off'} ({run + 1}/{args.repeat})...",
+                          file=sys.stderr)
+                    record = run_scenario(name, options, output_dir, log, lean_profile=lean_profile,
+                                          scraper_options={"instrument": True} if args.trace else None)
+                    record.update(timestamp=datetime.now().isoformat(timespec="seconds"), commit=commit,
+                                  label=args.label, python=sys.version.split()[0])
+                    records.append(record)
+
+    print(format_report(records, history, args.baseline))
+    if accumulators:
+        print("\n" + format_accumulators(accumulators))
+    if not args.no_save:
+        save_results(args.results, records)
+        print(f"\nResults appended to {args.results}")
+    return 0 if all(record["ok"] for record in records) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
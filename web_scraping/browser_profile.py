@@ -0,0 +1,59 @@
+from selenium.common.exceptions import WebDriverException
+
+
+# The scraper only reads DOM text (grid cells, footer, incarico modal), so
+# everything below is dead weight. Stylesheets are deliberately not blocked:
+# clickability checks depend on the real layout and visibility.
+BLOCKED_URL_PATTERNS = [
+    # images and media
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.bmp", "*.ico", "*.svg",
+    "*.mp4", "*.webm", "*.ogg", "*.mp3", "*.wav",
+    # web fonts (icon ligatures such as check_box still come through as text)
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot", "*fonts.googleapis.com*", "*fonts.gstatic.com*",
+    # analytics and tag managers
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*hotjar.com*",
+    "*clarity.ms*", "*segment.io*", "*connect.facebook.net*", "*mixpanel.com*",
+]
+
+LEAN_CHROME_ARGS = [
+    "--blink-settings=imagesEnabled=false",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--disable-notifications",
+    "--mute-audio",
+    "--no-first-run",
+    "--disable-features=Translate,MediaRouter,OptimizationHints,AutofillServerCommunication",
+]
+
+LEAN_CHROME_PREFS = {
+    "profile.managed_default_content_settings.images": 2,
+    "profile.default_content_setting_values.notifications": 2,
+    "profile.default_content_setting_values.geolocation": 2,
+    "profile.default_content_setting_values.media_stream": 2,
+    "credentials_enable_service": False,
+    "profile.password_manager_enabled": False,
+}
+
+
+def apply_lean_options(chrome_options):
+    """Disable images and unneeded Chrome features, and return as soon as the DOM is ready"""
+    for argument in LEAN_CHROME_ARGS:
+        chrome_options.add_argument(argument)
+    chrome_options.add_experimental_option("prefs", LEAN_CHROME_PREFS)
+    # Every wait in the scraper is condition based, so the load event is not needed
+    chrome_options.page_load_strategy = "eager"
+    return chrome_options
+
+
+def block_resources(driver, log=print, patterns=BLOCKED_URL_PATTERNS):
+    """Block fonts, media and analytics at the network layer through CDP; True on success"""
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(patterns)})
+        return True
+    except (WebDriverException, AttributeError) as e:
+        log(f"⚠ Could not enable network blocking: {e}")
+        return False
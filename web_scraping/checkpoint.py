@@ -0,0 +1,100 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import pandas as pd
+
+
+DEFAULT_RUNS_DIR = os.path.join(os.path.expanduser("~"), ".cache", "web_scraping", "runs")
+
+
+def run_key(email, target_url, start, end, extra=None):
+    """Stable identity of a run: same account, target, dates and options"""
+    raw = json.dumps([email.strip().lower(), target_url.strip(), start.isoformat(), end.isoformat(), extra or {}],
+                     sort_keys=True)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+class RunJournal:
+    """On-disk journal of completed pages for one run.
+
+    Every finished page is pickled to its own file (a ColumnarBuffer
+    chunk) together with the page number, so a crashed or cancelled run can
+    be resumed from the first unfinished page and the final export rebuilt
+    page by page in order.
+    """
+
+    def __init__(self, key, meta=None, runs_dir=DEFAULT_RUNS_DIR, resume=False, log=print):
+        self.key = key
+        self.directory = os.path.join(runs_dir, key)
+        self.log = log
+        self.meta_path = os.path.join(self.directory, "journal.json")
+
+        if not resume and os.path.exists(self.directory):
+            self.log("Discarding the journal of a previous unfinished run")
+            shutil.rmtree(self.directory, ignore_errors=True)
+        os.makedirs(self.directory, exist_ok=True)
+
+        self.meta = self._read_meta() if resume else None
+        if self.meta is None:
+            self.meta = {"created_at": time.time(), "total_pages": None, "completed_pages": [], **(meta or {})}
+            self._write_meta()
+
+    def _read_meta(self):
+        try:
+            with open(self.meta_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self):
+        tmp_path = self.meta_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.meta, f)
+        os.replace(tmp_path, self.meta_path)
+
+    def page_path(self, page):
+        return os.path.join(self.directory, f"page_{page:05d}.pkl")
+
+    @property
+    def completed_pages(self):
+        return sorted(self.meta["completed_pages"])
+
+    def next_page(self):
+        """First page not yet in the journal (pages are completed in order)"""
+        page = 1
+        completed = set(self.meta["completed_pages"])
+        while page in completed:
+            page += 1
+        return page
+
+    def record_page(self, page, total_pages, chunk):
+        """Persist one completed page, then mark it done in the journal"""
+        tmp_path = self.page_path(page) + ".tmp"
+        pd.to_pickle(chunk, tmp_path)
+        os.replace(tmp_path, self.page_path(page))
+
+        # None: the grid endpoint does not know the page count yet
+        if total_pages is not None:
+            if self.meta["total_pages"] not in (None, total_pages):
+                self.log(f"⚠ Page count changed from {self.meta['total_pages']} to {total_pages} "
+                         f"since the run started")
+            self.meta["total_pages"] = total_pages
+        if page not in self.meta["completed_pages"]:
+            self.meta["completed_pages"].append(page)
+        self._write_meta()
+
+    def iter_pages(self):
+        """Yield (page, DataFrame) for every journaled page in page order"""
+        for page in self.completed_pages:
+            chunk = pd.read_pickle(self.page_path(page))
+            if isinstance(chunk, list):
+                # Journaled before the column chunks: one DataFrame per table
+                yield page, pd.concat(chunk, ignore_index=True) if chunk else pd.DataFrame()
+            else:
+                yield page, chunk.to_frame()
+
+    def discard(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
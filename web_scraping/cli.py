@@ -0,0 +1,167 @@
+import argparse
+import json
+import os
+import sys
+import threading
+from datetime import datetime
+
+from date_ranges import PRESET_NAMES, SHARD_UNITS, parse_date, resolve_range
+
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_INTERRUPTED = 130
+
+# dataset.PARTITIONINGS, repeated so parsing arguments does not import pandas
+PARTITIONINGS = ("month", "utente")
+
+EMAIL_ENV = "SCRAPER_EMAIL"
+PASSWORD_ENV = "SCRAPER_PASSWORD"
+
+
+def date_argument(value):
+    try:
+        return parse_date(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Export the activity grid without the GUI.",
+        epilog=f"Credentials are read from --credentials-file (JSON with email/password) "
+               f"or the {EMAIL_ENV} / {PASSWORD_ENV} environment variables.")
+    parser.add_argument("--url", required=True, help="target URL opened after login")
+    parser.add_argument("--output", "-o", required=True,
+                        help="export path: an .xlsx or .csv file, or a .parquet dataset directory")
+    parser.add_argument("--credentials-file", help="JSON file with 'email' and 'password'")
+
+    dates = parser.add_argument_group("date range")
+    dates.add_argument("--range", choices=PRESET_NAMES, default=PRESET_NAMES[0],
+                       help="portal preset (default: %(default)s)")
+    dates.add_argument("--start", type=date_argument, help="custom range start (overrides --range)")
+    dates.add_argument("--end", type=date_argument, help="custom range end (default: --start)")
+
+    options = parser.add_argument_group("options")
+    options.add_argument("--cache-mode", choices=("use", "refresh", "bypass"), default="use")
+    options.add_argument("--incarico-endpoint", default="", help="detail URL template with {incarico}")
+    options.add_argument("--incarico-field", default="", help="dotted JSON field of the detail response")
+    options.add_argument("--incarico-concurrency", type=int, default=8)
+    options.add_argument("--grid-endpoint", default="",
+                         help="grid search URL template with {page} (and {page_size}, {start}, {end}); "
+                              "needs --incarico-endpoint")
+    options.add_argument("--grid-concurrency", type=int, default=4)
+    options.add_argument("--pipeline-workers", type=int, default=2,
+                         help="threads processing browser pages while the next one loads (0: one page at a time)")
+    options.add_argument("--partition-by", choices=PARTITIONINGS,
+                         help="partitions of a .parquet dataset output (default: month, or the dataset's)")
+    options.add_argument("--report", default="", help="with a .parquet output: also build this .xlsx/.csv "
+                                                      "report of the range from the dataset")
+    options.add_argument("--incremental", action="store_true", help="sync through the local row store")
+    options.add_argument("--resume", action="store_true", help="continue an interrupted run")
+    options.add_argument("--retry-failed", action="store_true",
+                         help="re-fetch only the units the last run of this range left failing and rebuild its export")
+    options.add_argument("--shard", choices=SHARD_UNITS, help="split the range across browsers")
+    options.add_argument("--workers", type=int, default=4, help="browsers for --shard (default: %(default)s)")
+    options.add_argument("--full-browser", action="store_true",
+                         help="load images, fonts and analytics (no lean browser profile)")
+    options.add_argument("--trace", action="store_true",
+                         help="record phase timings and WebDriver commands, write a Chrome trace file")
+    options.add_argument("--trace-dir", help="directory for --trace files")
+    options.add_argument("--quiet", "-q", action="store_true", help="only print warnings and the result")
+    return parser
+
+
+def load_credentials(path=None):
+    """(email, password) from a JSON file, falling back to the environment"""
+    email = os.environ.get(EMAIL_ENV, "")
+    password = os.environ.get(PASSWORD_ENV, "")
+    if path:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        email = data.get("email", email)
+        password = data.get("password", password)
+    return email.strip(), password.strip()
+
+
+def settings_from_args(args):
+    """Same settings dict the GUI builds in DateRangeApp.collect_settings"""
+    date_range_index, custom_range, date_range = resolve_range(args.range, args.start, args.end)
+    return {
+        "scraper_kwargs": {
+            "date_range_index": date_range_index,
+            "custom_range": custom_range,
+            "cache_mode": args.cache_mode,
+            "incarico_endpoint": args.incarico_endpoint.strip(),
+            "incarico_field": args.incarico_field.strip(),
+            "incarico_concurrency": args.incarico_concurrency,
+            "grid_endpoint": args.grid_endpoint.strip(),
+            "grid_concurrency": args.grid_concurrency,
+            "pipeline_workers": max(0, args.pipeline_workers),
+            "partition_by": args.partition_by,
+            "report_path": args.report.strip(),
+            "incremental": args.incremental,
+            "resume": args.resume,
+            "retry_failed": args.retry_failed,
+            "instrument": args.trace,
+            "lean_profile": not args.full_browser,
+            **({"trace_dir": args.trace_dir} if args.trace_dir else {}),
+        },
+        "date_range": date_range,
+        "sharded": bool(args.shard),
+        "shard_unit": args.shard or SHARD_UNITS[0],
+        "shard_workers": args.workers,
+    }
+
+
+def make_logger(quiet):
+    def log(message):
+        if quiet and not str(message).lstrip().startswith("⚠"):
+            return
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        print(f"[{timestamp}] {message}", file=sys.stderr, flush=True)
+    return log
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    log = make_logger(args.quiet)
+    try:
+        settings = settings_from_args(args)
+    except ValueError as e:
+        parser.error(str(e))
+    if (args.report or args.partition_by) and not args.output.lower().endswith(".parquet"):
+        parser.error("--report and --partition-by need a .parquet output")
+
+    try:
+        email, password = load_credentials(args.credentials_file)
+    except (OSError, ValueError) as e:
+        print(f"Cannot read credentials: {e}", file=sys.stderr)
+        return EXIT_USAGE
+    if not email or not password:
+        print(f"Missing credentials: set {EMAIL_ENV}/{PASSWORD_ENV} or pass --credentials-file",
+              file=sys.stderr)
+        return EXIT_USAGE
+
+    # Imported only now: argument errors above stay instant
+    from engine import run_job
+
+    cancel_event = threading.Event()
+    try:
+        ok, error = run_job(email, password, args.url, args.output, settings, log=log,
+                            cancel_event=cancel_event)
+    except KeyboardInterrupt:
+        cancel_event.set()
+        print("Interrupted", file=sys.stderr)
+        return EXIT_INTERRUPTED
+    if not ok:
+        print(f"Export failed: {error}", file=sys.stderr)
+        return EXIT_FAILED
+    print(args.output)
+    return EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
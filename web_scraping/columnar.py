@@ -0,0 +1,94 @@
+import sys
+from array import array
+
+import numpy as np
+import pandas as pd
+
+from extraction import is_pagination_row
+from schema import COLUMN_DTYPES, EXPORT_COLUMNS, FETCH_COLUMNS, IDENTITY_COLUMNS
+
+
+# Fetched columns the export keeps, plus incarico (retry patches are matched
+# on it) and the rest of the row identity (shards are merged on it)
+BUFFER_COLUMNS = [name for name in FETCH_COLUMNS
+                  if name in EXPORT_COLUMNS or name == "incarico" or name in IDENTITY_COLUMNS]
+
+# Few distinct values over many rows: kept as int32 codes into one list of the values
+DICTIONARY_COLUMNS = [name for name in BUFFER_COLUMNS if COLUMN_DTYPES[name] in ("category", "bool")] + [
+    "durata", "tempo fatturabile", "contatto", "commessa", "referente", "etichetta"]
+
+
+def intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+class ColumnarBuffer:
+    """Rows of a run kept column by column until one DataFrame is built.
+
+    Replaces a list of per-table DataFrames joined with pd.concat at the end:
+    each table is appended straight into one buffer per kept column
+    (BUFFER_COLUMNS, footer rows dropped). A page's rows travel as a buffer
+    of their own, a chunk: it is what the run journal pickles, and extend()
+    merges it into the run's buffer. DICTIONARY_COLUMNS are stored as
+    array('i') codes with each distinct value held once; the other strings
+    are interned, so repeated cells share one object.
+
+    to_frame builds the DataFrame once, without a per-table frame or a
+    concat in between. Category columns of the schema come out as
+    Categoricals of the stored codes; the rest as object columns pointing at
+    the stored strings.
+    """
+
+    def __init__(self, columns=BUFFER_COLUMNS):
+        self.columns = list(columns)
+        self.positions = [FETCH_COLUMNS.index(name) for name in self.columns]
+        self.codes = {name: array("i") for name in self.columns if name in DICTIONARY_COLUMNS}
+        self.dictionaries = {name: {} for name in self.codes}
+        self.values = {name: [] for name in self.columns if name not in self.codes}
+        self.extracted = []
+        self.rows = 0
+
+    def __len__(self):
+        return self.rows
+
+    def append(self, rows, extracted):
+        """Add one table: rows in FETCH_COLUMNS order and their incarico_extracted values"""
+        kept = [(row, value) for row, value in zip(rows, extracted) if not is_pagination_row(row)]
+        for name, position in zip(self.columns, self.positions):
+            cells = (row[position] for row, _ in kept)
+            if name in self.codes:
+                dictionary = self.dictionaries[name]
+                self.codes[name].extend(-1 if cell is None else dictionary.setdefault(cell, len(dictionary))
+                                        for cell in cells)
+            else:
+                self.values[name].extend(map(intern, cells))
+        self.extracted.extend(intern(value) for _, value in kept)
+        self.rows += len(kept)
+
+    def extend(self, other):
+        """Add every row of another buffer with the same columns (e.g. one page's chunk)"""
+        for name, codes in self.codes.items():
+            dictionary = self.dictionaries[name]
+            remap = [dictionary.setdefault(value, len(dictionary)) for value in other.dictionaries[name]]
+            codes.extend(-1 if code < 0 else remap[code] for code in other.codes[name])
+        for name, values in self.values.items():
+            values.extend(other.values[name])
+        self.extracted.extend(other.extracted)
+        self.rows += other.rows
+
+    def column(self, name):
+        if name not in self.codes:
+            return pd.Series(np.array(self.values[name], dtype=object), dtype=object, copy=False)
+        codes = np.frombuffer(self.codes[name], dtype=np.intc)
+        values = list(self.dictionaries[name])
+        if COLUMN_DTYPES[name] == "category":
+            return pd.Series(pd.Categorical.from_codes(codes, categories=pd.Index(values, dtype=object)),
+                             copy=False)
+        # Code -1 (a missing cell) picks the trailing None
+        return pd.Series(np.array(values + [None], dtype=object)[codes], dtype=object, copy=False)
+
+    def to_frame(self):
+        """One DataFrame of every appended row: BUFFER_COLUMNS plus incarico_extracted"""
+        data = {name: self.column(name) for name in self.columns}
+        data["incarico_extracted"] = pd.Series(np.array(self.extracted, dtype=object), dtype=object, copy=False)
+        return pd.DataFrame(data, copy=False)
@@ -0,0 +1,233 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from urllib.parse import quote, unquote
+
+import pandas as pd
+
+from schema import COLUMN_DTYPES, EXPORT_COLUMNS
+
+
+PARTITIONINGS = ("month", "utente")
+# Directory key per partitioning; "user" rather than "utente" so hive-aware
+# readers do not see the partition field clash with the utente column
+PARTITION_KEYS = {"month": "month", "utente": "user"}
+UNKNOWN_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+DATA_FILE = "part-0.parquet"
+META_FILE = "_dataset.json"
+DEFAULT_COMPRESSION = "zstd"
+
+
+def arrow_schema(columns):
+    """pyarrow schema of the typed export columns (see schema.COLUMN_SCHEMA)"""
+    import pyarrow as pa
+
+    types = {
+        "datetime": pa.timestamp("us"),
+        "timedelta": pa.duration("us"),
+        "decimal": pa.float64(),
+        "category": pa.dictionary(pa.int32(), pa.string()),
+        "bool": pa.bool_(),
+        "string": pa.string(),
+    }
+    return pa.schema([(name, types[COLUMN_DTYPES.get(name, "string")]) for name in columns])
+
+
+class ParquetDataset:
+    """Typed export rows kept as a partitioned Parquet dataset.
+
+    Hive-style layout, one file per partition: root/month=2024-03/part-0.parquet
+    (or root/user=Rossi%20M./... partitioned by utente), compressed and with
+    the typed export schema, so pandas, pyarrow or duckdb can read the whole
+    dataset or a single month without touching the rest.
+
+    Rows are buffered with add(); commit() rewrites only the partitions the
+    new rows fall in, plus, with replace_range, those holding stored rows of
+    that range. Stored rows inside replace_range are replaced by the new
+    ones (so activities deleted on the portal disappear), all others kept.
+    partition_by defaults to the dataset's stored partitioning (month for a
+    new one). Needs pyarrow.
+    """
+
+    def __init__(self, root, partition_by=None, compression=DEFAULT_COMPRESSION, log=print):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise RuntimeError("Parquet output needs pyarrow (pip install pyarrow)")
+        self.root = root
+        self.log = log
+        self.compression = compression
+        self.meta_path = os.path.join(root, META_FILE)
+        self.meta = self._read_meta()
+        stored = (self.meta or {}).get("partition_by")
+        partition_by = partition_by or stored or PARTITIONINGS[0]
+        if partition_by not in PARTITIONINGS:
+            raise ValueError(f"partition_by must be one of {', '.join(PARTITIONINGS)}")
+        if stored and stored != partition_by:
+            raise ValueError(f"{root} is partitioned by {stored}, not {partition_by}")
+        self.partition_by = partition_by
+        self.key = PARTITION_KEYS[partition_by]
+        self.pending = []
+
+    def _read_meta(self):
+        try:
+            with open(self.meta_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, columns):
+        self.meta = {"partition_by": self.partition_by, "compression": self.compression,
+                     "columns": list(columns), "updated_at": time.time()}
+        tmp_path = self.meta_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.meta, f)
+        os.replace(tmp_path, self.meta_path)
+
+    def partition_values(self, df):
+        """Partition value of every row of a typed frame"""
+        if self.partition_by == "month":
+            values = df["inizio"].dt.strftime("%Y-%m")
+        else:
+            values = df["utente"].astype("string").str.strip().replace("", pd.NA)
+        return values.fillna(UNKNOWN_PARTITION).astype(str)
+
+    def partition_path(self, value):
+        return os.path.join(self.root, f"{self.key}={quote(value, safe='')}", DATA_FILE)
+
+    def partitions(self):
+        """Stored partition values, sorted"""
+        prefix = f"{self.key}="
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(unquote(name[len(prefix):]) for name in os.listdir(self.root)
+                      if name.startswith(prefix) and os.path.exists(os.path.join(self.root, name, DATA_FILE)))
+
+    def read_partition(self, value, columns=None):
+        path = self.partition_path(value)
+        if not os.path.exists(path):
+            return None
+        return pd.read_parquet(path, columns=columns)
+
+    def write_partition(self, value, df):
+        path = self.partition_path(value)
+        if df.empty:
+            shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+            return
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        table = pa.Table.from_pandas(df, schema=arrow_schema(df.columns), preserve_index=False)
+        # Dot-prefixed so dataset readers skip a half-written file
+        tmp_path = os.path.join(os.path.dirname(path), "." + DATA_FILE + ".tmp")
+        pq.write_table(table, tmp_path, compression=self.compression)
+        os.replace(tmp_path, path)
+
+    def add(self, df):
+        """Buffer one typed frame (as produced by schema.apply_schema)"""
+        if not df.empty:
+            self.pending.append(df)
+
+    def months_in(self, start, end):
+        return set(pd.period_range(start, end, freq="M").strftime("%Y-%m"))
+
+    def in_range(self, df, start, end):
+        day = df["inizio"].dt.normalize()
+        return day.ge(pd.Timestamp(start)) & day.le(pd.Timestamp(end))
+
+    def commit(self, replace_range=None):
+        """Merge the buffered rows into the dataset; returns the number of rows added"""
+        new = pd.concat(self.pending, ignore_index=True) if self.pending else pd.DataFrame(columns=EXPORT_COLUMNS)
+        self.pending = []
+        groups = {value: frame for value, frame in new.groupby(self.partition_values(new), sort=True)} \
+            if not new.empty else {}
+
+        affected = set(groups)
+        if replace_range:
+            stored = set(self.partitions())
+            if self.partition_by == "month":
+                affected |= stored & self.months_in(*replace_range)
+            else:
+                for value in stored - affected:
+                    dates = self.read_partition(value, columns=["inizio"])
+                    if self.in_range(dates, *replace_range).any():
+                        affected.add(value)
+
+        columns = list(new.columns) if not new.empty else (self.meta or {}).get("columns", EXPORT_COLUMNS)
+        for value in sorted(affected):
+            frame = groups.get(value, pd.DataFrame(columns=columns))
+            stored = self.read_partition(value)
+            if stored is not None and not stored.empty:
+                if replace_range:
+                    stored = stored.loc[~self.in_range(stored, *replace_range)]
+                    merged = pd.concat([stored, frame], ignore_index=True)
+                else:
+                    merged = pd.concat([stored, frame], ignore_index=True).drop_duplicates()
+                if value == UNKNOWN_PARTITION:
+                    # Rows without a start date cannot be matched to a range
+                    merged = merged.drop_duplicates()
+            else:
+                merged = frame
+            merged = merged.reindex(columns=columns).sort_values("inizio", kind="stable").reset_index(drop=True)
+            for name in merged.columns:
+                if COLUMN_DTYPES.get(name) == "category":
+                    merged[name] = merged[name].astype("category")
+            self.write_partition(value, merged)
+
+        os.makedirs(self.root, exist_ok=True)
+        self._write_meta(columns)
+        self.log(f"✓ Parquet dataset {self.root}: {len(new)} row(s) written, "
+                 f"{len(affected)} of {len(self.partitions())} {self.partition_by} partition(s) rewritten")
+        return len(new)
+
+    def iter_frames(self, start=None, end=None, columns=None):
+        """Yield the stored rows partition by partition, limited to [start, end] when given"""
+        wanted = self.months_in(start, end) if start and end and self.partition_by == "month" else None
+        for value in self.partitions():
+            if wanted is not None and value not in wanted and value != UNKNOWN_PARTITION:
+                continue
+            df = self.read_partition(value, columns=None if columns is None else
+                                     list(dict.fromkeys(["inizio", *columns])))
+            if start and end:
+                df = df.loc[self.in_range(df, start, end)]
+            if columns is not None:
+                df = df[list(columns)]
+            if not df.empty:
+                yield df.reset_index(drop=True)
+
+    def read(self, start=None, end=None, columns=None):
+        """All stored rows (of [start, end] when given) as one DataFrame"""
+        frames = list(self.iter_frames(start, end, columns))
+        if not frames:
+            return pd.DataFrame(columns=columns or (self.meta or {}).get("columns", EXPORT_COLUMNS))
+        return pd.concat(frames, ignore_index=True)
+
+
+def main(argv=None):
+    from date_ranges import parse_date
+    from export import export_dataset
+
+    parser = argparse.ArgumentParser(description="Build an Excel or CSV report from a Parquet export dataset.")
+    parser.add_argument("dataset", help="dataset directory (the .parquet export path)")
+    parser.add_argument("--output", "-o", required=True, help="report path (.xlsx or .csv)")
+    parser.add_argument("--start", type=parse_date, help="first day (dd/mm/yyyy or yyyy-mm-dd)")
+    parser.add_argument("--end", type=parse_date, help="last day (default: --start)")
+    args = parser.parse_args(argv)
+
+    date_range = (args.start, args.end or args.start) if args.start else None
+    try:
+        dataset = ParquetDataset(args.dataset)
+        rows = export_dataset(dataset, args.output, date_range)
+    except (RuntimeError, ValueError, OSError) as e:
+        print(f"Report failed: {e}", file=sys.stderr)
+        return 1
+    print(f"{rows} rows written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
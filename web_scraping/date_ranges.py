@@ -0,0 +1,78 @@
+import calendar
+from datetime import date, datetime, timedelta
+
+# CLI names of the portal presets, in option order (index + 1)
+PRESET_NAMES = ("today", "yesterday", "current-week", "previous-week", "current-month", "previous-month",
+                "current-year", "previous-year")
+
+
+def preset_range(date_range_index, today=None):
+    """Translate a preset index (1-8, same order as the portal) into (start, end) dates"""
+    today = today or date.today()
+    week_start = today - timedelta(days=today.weekday())
+    month_start = today.replace(day=1)
+    previous_month_end = month_start - timedelta(days=1)
+
+    ranges = {
+        1: (today, today),
+        2: (today - timedelta(days=1), today - timedelta(days=1)),
+        3: (week_start, week_start + timedelta(days=6)),
+        4: (week_start - timedelta(days=7), week_start - timedelta(days=1)),
+        5: (month_start, today.replace(day=calendar.monthrange(today.year, today.month)[1])),
+        6: (previous_month_end.replace(day=1), previous_month_end),
+        7: (date(today.year, 1, 1), date(today.year, 12, 31)),
+        8: (date(today.year - 1, 1, 1), date(today.year - 1, 12, 31)),
+    }
+    if date_range_index not in ranges:
+        raise ValueError(f"Unknown date range option #{date_range_index}")
+    return ranges[date_range_index]
+
+
+DATE_FORMATS = ("%d/%m/%Y", "%Y-%m-%d")
+
+
+def parse_date(value):
+    """Parse dd/mm/yyyy or yyyy-mm-dd into a date"""
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"invalid date {value!r}, expected dd/mm/yyyy or yyyy-mm-dd")
+
+
+def resolve_range(preset=None, start=None, end=None):
+    """Turn a preset name or a start/end pair into (date_range_index, custom_range, (start, end))"""
+    if start:
+        end = end or start
+        if end < start:
+            raise ValueError("end date is before start date")
+        return len(PRESET_NAMES) + 1, (start, end), (start, end)
+    preset = preset or PRESET_NAMES[0]
+    if preset not in PRESET_NAMES:
+        raise ValueError(f"unknown date range {preset!r}, expected one of {', '.join(PRESET_NAMES)}")
+    date_range_index = PRESET_NAMES.index(preset) + 1
+    return date_range_index, None, preset_range(date_range_index)
+
+
+SHARD_UNITS = ("month", "week")
+
+
+def split_range(start, end, unit="month"):
+    """Split [start, end] into consecutive calendar months or Monday-based weeks"""
+    if unit not in SHARD_UNITS:
+        raise ValueError(f"Unknown shard unit {unit!r}, expected one of {SHARD_UNITS}")
+    if end < start:
+        raise ValueError("End date is before start date")
+
+    shards = []
+    current = start
+    while current <= end:
+        if unit == "month":
+            period_end = current.replace(day=calendar.monthrange(current.year, current.month)[1])
+        else:
+            period_end = current + timedelta(days=6 - current.weekday())
+        shard_end = min(period_end, end)
+        shards.append((current, shard_end))
+        current = shard_end + timedelta(days=1)
+    return shards
@@ -0,0 +1,54 @@
+# Front-end independent entry into the scraper, shared by the Tk app and the
+# CLI. Selenium, pandas and the process pool machinery are imported only when
+# a run needs them, so importing this module is cheap.
+
+
+def create_scraper(**kwargs):
+    """Build an ActivityScraper; the selenium/pandas import happens here"""
+    from scraper import ActivityScraper
+    return ActivityScraper(**kwargs)
+
+
+def scraper_defaults(names):
+    """ActivityScraper constructor defaults of the given options"""
+    import inspect
+    from scraper import ActivityScraper
+    parameters = inspect.signature(ActivityScraper).parameters
+    return {name: parameters[name].default for name in names}
+
+
+def run_job(email, password, target_url, save_path, settings, log=print, progress=None,
+            cancel_event=None, scraper=None):
+    """Run one export described by settings; returns (ok, error).
+
+    settings holds "scraper_kwargs" (ActivityScraper options), "date_range"
+    (start, end), "sharded", "shard_unit" and "shard_workers". Single-browser
+    runs use scraper when given (e.g. a warm keep_alive scraper owned by the
+    caller) and a throwaway one otherwise.
+    """
+    scraper_kwargs = dict(settings["scraper_kwargs"])
+    if settings.get("sharded"):
+        from sharding import run_sharded
+
+        start, end = settings["date_range"]
+        scraper_kwargs.pop("custom_range", None)
+        scraper_kwargs.pop("resume", None)
+        if scraper_kwargs.pop("retry_failed", False):
+            log("⚠ Retrying failed units is not supported for sharded runs - doing a full scrape")
+        if scraper_kwargs.pop("incremental", False):
+            log("⚠ Incremental sync is not used for sharded runs - doing a full scrape")
+        ok = run_sharded(email, password, target_url, save_path, start, end,
+                         unit=settings.get("shard_unit", "month"), workers=settings.get("shard_workers", 4),
+                         scraper_kwargs=scraper_kwargs, log=log, progress=progress, cancel_event=cancel_event)
+        return ok, None if ok else "Some shards failed"
+
+    owned = scraper is None
+    if owned:
+        scraper = create_scraper(log=log, progress=progress, cancel_event=cancel_event)
+    try:
+        scraper.configure(**scraper_kwargs)
+        ok = scraper.run(email, password, target_url, save_path)
+        return ok, None if ok else (scraper.last_error or "Automation failed")
+    finally:
+        if owned:
+            scraper.cleanup()
@@ -0,0 +1,144 @@
+import os
+
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, Side
+
+from dataset import ParquetDataset
+from schema import apply_schema
+
+
+# parquet: the save path is the root directory of a partitioned dataset
+EXPORT_FORMATS = ("xlsx", "csv", "parquet")
+
+
+def export_format(save_path):
+    ext = os.path.splitext(save_path)[1].lower().lstrip(".")
+    return ext if ext in EXPORT_FORMATS else "xlsx"
+
+
+class StreamingExporter:
+    """Append pages to the output file as they arrive.
+
+    xlsx is written with openpyxl's write-only workbook, csv is appended and
+    flushed page by page, so memory stays flat however many pages there are.
+    The grid's pagination footer rows are filtered out by apply_schema.
+
+    A .parquet save path is a ParquetDataset: the typed pages are merged
+    into it on close(), rewriting only the partitions they touch (stored
+    rows of replace_range, the scraped (start, end), are replaced). With
+    report_path an Excel/CSV report of that range is then built from the
+    dataset. Memory is not flat for this format: a partition is only
+    rewritten once all its rows are known, so the typed pages are held
+    until close().
+    """
+
+    def __init__(self, save_path, log=print, replace_range=None, partition_by=None, report_path=""):
+        self.save_path = save_path
+        self.log = log
+        self.format = export_format(save_path)
+        self.replace_range = replace_range
+        self.report_path = report_path
+        self.rows_written = 0
+        self.columns = None
+        self.closed = False
+        self.workbook = None
+        self.sheet = None
+        self.csv_file = None
+        self.dataset = None
+
+        if self.format == "xlsx":
+            self.workbook = Workbook(write_only=True)
+            self.sheet = self.workbook.create_sheet("Sheet1")
+        elif self.format == "parquet":
+            self.dataset = ParquetDataset(save_path, partition_by=partition_by, log=log)
+        else:
+            self.csv_file = open(save_path, "w", encoding="utf-8", newline="")
+
+    def _write_header(self, columns):
+        self.columns = list(columns)
+        if self.sheet is not None:
+            # Same look as the header pandas.to_excel writes
+            font = Font(bold=True)
+            border = Border(*(Side(style="thin"),) * 4)
+            alignment = Alignment(horizontal="center", vertical="top")
+            header = []
+            for name in self.columns:
+                cell = WriteOnlyCell(self.sheet, value=name)
+                cell.font, cell.border, cell.alignment = font, border, alignment
+                header.append(cell)
+            self.sheet.append(header)
+        elif self.csv_file is not None:
+            pd.DataFrame(columns=self.columns).to_csv(self.csv_file, index=False)
+
+    def _write_rows(self, df):
+        if df.empty:
+            return
+        if self.dataset is not None:
+            self.dataset.add(df)
+        elif self.sheet is not None:
+            for row in df.itertuples(index=False, name=None):
+                self.sheet.append([None if pd.isna(value) else value for value in row])
+        else:
+            df.to_csv(self.csv_file, header=False, index=False)
+            self.csv_file.flush()
+        self.rows_written += len(df)
+
+    def write(self, df, prepared=False):
+        """Prepare (unless already done) and append one page's DataFrame"""
+        if self.closed:
+            raise ValueError("Exporter is already closed")
+        if not prepared:
+            df = apply_schema(df)
+        if self.columns is None:
+            self._write_header(df.columns)
+        self._write_rows(df[self.columns])
+
+    def write_pages(self, page_dfs):
+        for df in page_dfs:
+            self.write(df)
+
+    def close(self):
+        """Finish the file; returns the number of data rows written"""
+        if self.closed:
+            return self.rows_written
+        self.closed = True
+        if self.dataset is not None:
+            self.dataset.commit(self.replace_range)
+            if self.report_path:
+                rows = export_dataset(self.dataset, self.report_path, self.replace_range, self.log)
+                self.log(f"✓ Report with {rows} rows built from the dataset: {self.report_path}")
+        elif self.workbook is not None:
+            if self.columns is None:
+                self.sheet.append([])
+            self.workbook.save(self.save_path)
+        else:
+            self.csv_file.close()
+        return self.rows_written
+
+
+def export_dataset(dataset, save_path, date_range=None, log=print):
+    """Stream a ParquetDataset (limited to date_range) to an xlsx/csv report; returns the row count"""
+    if export_format(save_path) == "parquet":
+        raise ValueError("The report path must be .xlsx or .csv")
+    exporter = StreamingExporter(save_path, log=log)
+    for df in dataset.iter_frames(*(date_range or (None, None))):
+        exporter.write(df, prepared=True)
+    return exporter.close()
+
+
+def export_frames(all_dfs, save_path, log=print, **options):
+    """Export already collected DataFrames through the streaming writer (options as StreamingExporter)"""
+    if not all_dfs:
+        log("⚠ No data to export.")
+        return False
+    try:
+        exporter = StreamingExporter(save_path, log=log, **options)
+        exporter.write_pages(all_dfs)
+        exporter.close()
+        log(f"\n All pages exported to {exporter.format.upper()}: {save_path}")
+        return True
+    except Exception as ex_save:
+        log(f" Failed to save export file: {ex_save}")
+        return False
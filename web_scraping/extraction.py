@@ -0,0 +1,76 @@
+import re
+from collections import namedtuple
+
+
+# Serializes every <table> on the page in a single round trip. Mirrors the
+# Selenium walk it replaces: "tbody tr" first, all <tr> as a fallback, and
+# only direct <th>/<td> children of each row. arguments[0] lists the cell
+# indexes to read (null for all), so unused columns never cross the wire.
+TABLE_EXTRACT_JS = '''
+    const columns = arguments[0];
+    const tables = Array.from(document.querySelectorAll("table"));
+    return tables.map(function (table) {
+        let rows = table.querySelectorAll("tbody tr");
+        const hasTbody = rows.length > 0;
+        if (!hasTbody) {
+            rows = table.querySelectorAll("tr");
+        }
+        let cellCount = 0;
+        const data = Array.from(rows).map(function (row) {
+            const cells = Array.from(row.children).filter(function (cell) {
+                return cell.tagName === "TH" || cell.tagName === "TD";
+            });
+            cellCount += cells.length;
+            // The footer row is a single cell spanning the grid and is kept as is
+            if (!columns || cells.length <= 1) {
+                return cells.map(function (cell) { return (cell.innerText || "").trim(); });
+            }
+            return columns.map(function (i) { return i < cells.length ? (cells[i].innerText || "").trim() : ""; });
+        });
+        return {hasTbody: hasTbody, rows: data, cellCount: cellCount};
+    });
+'''
+
+PAGINATION_RE = re.compile(r"\bPagina\s+\d+\s+di\s+\d+", re.IGNORECASE)
+
+ExtractedTable = namedtuple("ExtractedTable", ["index", "has_tbody", "raw_row_count", "rows"])
+
+
+def normalize_row(row, width):
+    """Pad or truncate a row so it matches the header width"""
+    diff = width - len(row)
+    if diff > 0:
+        return row + [""] * diff
+    return row[:width]
+
+
+def is_pagination_row(row):
+    """True for the grid footer row holding 'Pagina X di Y' and the page arrows"""
+    values = [value for value in row if value]
+    return len(values) <= 2 and bool(PAGINATION_RE.search(" ".join(values)))
+
+
+def extract_page_tables(driver, header, columns=None):
+    """Extract all tables on the current page with one execute_script call.
+
+    columns are the grid cell indexes to read (all cells when None); header
+    names the resulting columns. Returns (tables, round_trips_saved). Empty
+    rows are dropped and the remaining rows are normalized to len(header).
+    """
+    payload = driver.execute_script(TABLE_EXTRACT_JS, list(columns) if columns is not None else None) or []
+    width = len(header)
+
+    tables = []
+    # find_elements("table") + per table find rows (+ fallback) + per row find cells + per cell .text
+    legacy_round_trips = 1
+    for idx, table in enumerate(payload, start=1):
+        raw_rows = table.get("rows") or []
+        has_tbody = bool(table.get("hasTbody"))
+        legacy_round_trips += 1 if has_tbody else 2
+        legacy_round_trips += len(raw_rows) + int(table.get("cellCount") or 0)
+
+        rows = [normalize_row([str(value).strip() for value in row], width)
+                for row in raw_rows if any(row)]
+        tables.append(ExtractedTable(idx, has_tbody, len(raw_rows), rows))
+
+    return tables, legacy_round_trips - 1
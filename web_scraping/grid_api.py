@@ -0,0 +1,212 @@
+import re
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import quote
+
+from incarico_api import session_from_driver
+from schema import CHECKBOX_CHECKED, CHECKBOX_UNCHECKED, GRID_HEADER
+
+
+# Rows per page of the browser grid (the next arrow sits in row 51). Endpoint
+# responses are re-cut to this size so page numbers mean the same thing in
+# both modes: the run journal, resume and progress do not care which one
+# produced a page.
+PORTAL_PAGE_ROWS = 50
+
+# Rows asked for per request when the template has {page_size}; the backend
+# may cap it, the size of the first response is what counts.
+GRID_PAGE_SIZE = 500
+
+ROWS_FIELDS = ("rows", "data", "items", "records", "results")
+TOTAL_ROWS_FIELDS = ("total", "total_rows", "totalRows", "total_count", "totalCount", "count")
+TOTAL_PAGES_FIELDS = ("total_pages", "totalPages", "pages", "page_count", "pageCount")
+ENDPOINT_DATE_FORMAT = "%d/%m/%Y"
+
+
+class GridShapeError(ValueError):
+    """The grid endpoint answered with a payload this client does not understand"""
+
+
+def normalize_key(name):
+    return re.sub(r"[^0-9a-z]", "", str(name).lower())
+
+
+def first_int(payload, fields):
+    for field in fields:
+        value = payload.get(field)
+        if isinstance(value, (int, str)) and not isinstance(value, bool) and str(value).isdigit():
+            return int(value)
+    return None
+
+
+def cell_text(value):
+    """Render a JSON value the way the grid cell shows it"""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return CHECKBOX_CHECKED if value else CHECKBOX_UNCHECKED
+    return str(value).strip()
+
+
+def done_future(result):
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+class GridApiClient:
+    """Replay the activity grid's search request over HTTP.
+
+    url_template must contain '{page}' and may use '{page_size}', '{start}',
+    '{end}' (dd/mm/yyyy) and '{date_range_index}'; the type filters the
+    browser selects go in its query string as fixed parameters. Responses
+    must be JSON: a list of rows, or an object holding one under
+    rows/data/items/records/results next to a total row or page count. Rows
+    are either lists in grid column order or objects keyed by column name.
+
+    Endpoint pages are fetched concurrently (up to concurrency in flight) and
+    yielded in order as portal-sized pages. Any GridShapeError means the
+    endpoint changed and the caller should fall back to the browser.
+    """
+
+    def __init__(self, driver, url_template, date_range, columns, date_range_index=1, page_size=GRID_PAGE_SIZE,
+                 concurrency=4, timeout=30, log=print, throttle=None):
+        if "{page}" not in url_template:
+            raise ValueError("Grid endpoint must contain '{page}'")
+        self.url_template = url_template
+        self.date_range = date_range
+        self.date_range_index = date_range_index
+        self.columns = list(columns)
+        self.indexes = [GRID_HEADER.index(column) for column in self.columns]
+        self.page_size = max(PORTAL_PAGE_ROWS, int(page_size))
+        self.concurrency = max(1, int(concurrency))
+        self.timeout = timeout
+        self.log = log
+        self.throttle = throttle
+        self.field_keys = None
+        self.requests = 0
+        self.session = session_from_driver(driver, pool_size=self.concurrency)
+
+    def page_url(self, page):
+        start, end = self.date_range
+        return self.url_template.format(
+            page=page, page_size=self.page_size, date_range_index=self.date_range_index,
+            start=quote(start.strftime(ENDPOINT_DATE_FORMAT), safe=""),
+            end=quote(end.strftime(ENDPOINT_DATE_FORMAT), safe=""))
+
+    def match_fields(self, sample):
+        """Payload key of every column, matched on the name without case, spaces or punctuation"""
+        keys = {normalize_key(key): key for key in sample}
+        field_keys = [keys.get(normalize_key(column)) for column in self.columns]
+        missing = [column for column, key in zip(self.columns, field_keys) if key is None]
+        if "incarico" in missing or len(missing) > len(self.columns) // 2:
+            raise GridShapeError(f"grid rows lack the expected columns ({', '.join(missing[:5])}...)")
+        if missing:
+            self.log(f"⚠ Grid endpoint rows have no {', '.join(missing)} field(s); left empty")
+        return field_keys
+
+    def map_rows(self, raw_rows):
+        """Endpoint rows as lists of cell texts in column order"""
+        rows = []
+        for raw in raw_rows:
+            if isinstance(raw, dict):
+                if self.field_keys is None:
+                    self.field_keys = self.match_fields(raw)
+                values = [raw.get(key) if key else None for key in self.field_keys]
+            elif isinstance(raw, list):
+                if len(raw) >= len(GRID_HEADER):
+                    values = [raw[i] for i in self.indexes]
+                elif len(raw) == len(self.columns):
+                    values = raw
+                else:
+                    raise GridShapeError(f"grid rows have {len(raw)} cells, expected {len(GRID_HEADER)}")
+            else:
+                raise GridShapeError(f"unexpected grid row type {type(raw).__name__}")
+            rows.append([cell_text(value) for value in values])
+        return rows
+
+    def fetch_page(self, page):
+        """(rows, total rows or None, total pages or None) of one endpoint page"""
+        if self.throttle:
+            self.throttle()
+        response = self.session.get(self.page_url(page), timeout=self.timeout)
+        self.requests += 1
+        response.raise_for_status()
+        try:
+            payload = response.json()
+        except ValueError:
+            raise GridShapeError("grid endpoint did not return JSON")
+
+        if isinstance(payload, list):
+            raw_rows, payload = payload, {}
+        elif isinstance(payload, dict):
+            raw_rows = next((payload[field] for field in ROWS_FIELDS if isinstance(payload.get(field), list)), None)
+            if raw_rows is None:
+                raise GridShapeError(f"no row list in the grid response (keys: {', '.join(list(payload)[:8])})")
+        else:
+            raise GridShapeError(f"unexpected grid response type {type(payload).__name__}")
+        return self.map_rows(raw_rows), first_int(payload, TOTAL_ROWS_FIELDS), first_int(payload, TOTAL_PAGES_FIELDS)
+
+    def iter_pages(self, start_page=1):
+        """Yield (page, total_pages, rows) in order from start_page, as PORTAL_PAGE_ROWS-row pages.
+
+        total_pages is None until it is known for sure: from the first
+        response's total row count, or else once the last endpoint page has
+        been read, so it never changes during a run. Until then one page is
+        held back, so the last page always carries the final count.
+        """
+        first = self.fetch_page(1)
+        first_rows, total_rows, total_pages = first
+        batch = len(first_rows)
+        if not batch:
+            return
+        if total_rows is not None:
+            endpoint_pages = -(-total_rows // batch)
+        else:
+            # A page count only bounds the rows: the last page is usually shorter
+            endpoint_pages = total_pages
+        # Without any total the pages are read one at a time until a short one
+        window = self.concurrency if endpoint_pages else 1
+
+        first_row = (start_page - 1) * PORTAL_PAGE_ROWS
+        next_request = first_row // batch + 1
+        skip = first_row % batch
+        portal_page = start_page
+        buffer = []
+        previous = None
+        pending = deque()
+        pool = ThreadPoolExecutor(max_workers=self.concurrency)
+        try:
+            while True:
+                while len(pending) < window and (endpoint_pages is None or next_request <= endpoint_pages):
+                    pending.append((next_request, done_future(first) if next_request == 1
+                                    else pool.submit(self.fetch_page, next_request)))
+                    next_request += 1
+                if not pending:
+                    break
+                request_page, future = pending.popleft()
+                rows = future.result()[0]
+                if endpoint_pages is None and rows == previous:
+                    rows = []  # past the end, the backend repeats its last page
+                previous = rows
+                last = len(rows) < batch or request_page == endpoint_pages
+                buffer.extend(rows[skip:])
+                skip = 0
+
+                if last and total_rows is None:
+                    total_rows = (request_page - 1) * batch + len(rows)
+                total = -(-total_rows // PORTAL_PAGE_ROWS) if total_rows is not None else None
+                hold = PORTAL_PAGE_ROWS if total is None else 0
+                while len(buffer) >= PORTAL_PAGE_ROWS + hold or (last and buffer):
+                    chunk, buffer = buffer[:PORTAL_PAGE_ROWS], buffer[PORTAL_PAGE_ROWS:]
+                    yield portal_page, total, chunk
+                    portal_page += 1
+                if last:
+                    break
+        finally:
+            for _, future in pending:
+                future.cancel()
+            pool.shutdown(wait=True)
+
+    def close(self):
+        self.session.close()
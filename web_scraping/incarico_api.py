@@ -0,0 +1,109 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import quote
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+def session_from_driver(driver, pool_size=8):
+    """Build a pooled requests.Session that reuses the driver's authenticated cookies"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    for cookie in driver.get_cookies():
+        session.cookies.set(
+            cookie["name"], cookie["value"],
+            domain=cookie.get("domain"), path=cookie.get("path", "/")
+        )
+
+    session.headers.update({
+        "User-Agent": driver.execute_script("return navigator.userAgent;"),
+        "Referer": driver.current_url,
+        "Accept": "application/json, text/plain, */*",
+        "X-Requested-With": "XMLHttpRequest",
+    })
+    return session
+
+
+def pick_field(payload, field_path):
+    """Follow a dotted path (e.g. 'data.descrizione') into a decoded JSON payload"""
+    value = payload
+    for key in field_path.split("."):
+        if isinstance(value, list):
+            value = value[int(key)] if key.isdigit() and int(key) < len(value) else None
+        elif isinstance(value, dict):
+            value = value.get(key)
+        else:
+            return None
+        if value is None:
+            return None
+    return value
+
+
+class IncaricoDetailFetcher:
+    """Fetch incarico details straight from the portal's detail endpoint.
+
+    url_template must contain '{incarico}', e.g.
+    'https://portal.example/api/incarichi/{incarico}'. When value_field is
+    set the response is decoded as JSON and that dotted path is returned,
+    otherwise the response body text is used as-is. throttle, when given,
+    is called before every request (e.g. a per-host rate limiter).
+    """
+
+    def __init__(self, driver, url_template, value_field="", concurrency=8, timeout=10, log=print,
+                 throttle=None):
+        if "{incarico}" not in url_template:
+            raise ValueError("Incarico endpoint must contain '{incarico}'")
+        self.url_template = url_template
+        self.value_field = value_field
+        self.concurrency = max(1, int(concurrency))
+        self.timeout = timeout
+        self.log = log
+        self.throttle = throttle
+        self.session = session_from_driver(driver, pool_size=self.concurrency)
+        # Last error per value whose fetch failed, for the retry queue
+        self.errors = {}
+
+    def fetch_one(self, incarico_value):
+        url = self.url_template.format(incarico=quote(incarico_value, safe=""))
+        if self.throttle:
+            self.throttle()
+        response = self.session.get(url, timeout=self.timeout)
+        response.raise_for_status()
+
+        if self.value_field:
+            value = pick_field(response.json(), self.value_field)
+        else:
+            value = response.text
+        if value is None or not str(value).strip():
+            raise ValueError(f"empty detail for incarico {incarico_value!r}")
+        return str(value).strip()
+
+    def fetch_many(self, incarico_values):
+        """Fetch several incarico values concurrently.
+
+        Returns a dict of value -> extracted text for the calls that
+        succeeded; failed values are simply missing so the caller can fall
+        back to the modal.
+        """
+        results = {}
+        values = list(dict.fromkeys(incarico_values))
+        if not values:
+            return results
+
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(values))) as pool:
+            futures = {pool.submit(self.fetch_one, value): value for value in values}
+            for future in as_completed(futures):
+                value = futures[future]
+                try:
+                    results[value] = future.result()
+                    self.errors.pop(value, None)
+                except Exception as e:
+                    self.errors[value] = str(e)
+                    self.log(f"⚠ Incarico endpoint failed for {value[:10]}: {e}")
+        return results
+
+    def close(self):
+        self.session.close()
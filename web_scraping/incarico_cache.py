@@ -0,0 +1,129 @@
+import os
+import sqlite3
+import threading
+import time
+
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "web_scraping")
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 100000
+
+# "use": read and write, "refresh": ignore cached values but store fresh ones,
+# "bypass": do not touch the cache at all
+CACHE_MODES = ("use", "refresh", "bypass")
+
+
+class IncaricoCache:
+    """On-disk incarico -> incarico_extracted cache with TTL and LRU eviction (thread-safe)"""
+
+    def __init__(self, path=None, ttl_seconds=DEFAULT_TTL_SECONDS, max_entries=DEFAULT_MAX_ENTRIES,
+                 mode="use", log=print):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode {mode!r}, expected one of {CACHE_MODES}")
+        self.path = path or os.path.join(DEFAULT_CACHE_DIR, "incarico.sqlite")
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.mode = mode
+        self.log = log
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # Shard workers in other processes may share the file; wait for their locks
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS incarico_cache (
+                incarico TEXT PRIMARY KEY,
+                extracted TEXT NOT NULL,
+                stored_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_incarico_last_access ON incarico_cache(last_access)")
+        self.conn.commit()
+        if mode != "bypass":
+            self.expire()
+
+    def expire(self):
+        """Drop entries older than the TTL"""
+        if not self.ttl_seconds:
+            return 0
+        with self.lock:
+            cur = self.conn.execute("DELETE FROM incarico_cache WHERE stored_at < ?",
+                                    (time.time() - self.ttl_seconds,))
+            self.conn.commit()
+            self.evictions += cur.rowcount
+        return cur.rowcount
+
+    def get_many(self, values):
+        """Return a dict of value -> cached extracted text for the values that are cached"""
+        values = list(dict.fromkeys(values))
+        if self.mode != "use":
+            self.misses += len(values)
+            return {}
+
+        found = {}
+        now = time.time()
+        oldest = now - self.ttl_seconds if self.ttl_seconds else 0
+        with self.lock:
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(values), 500):
+                chunk = values[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self.conn.execute(
+                    f"SELECT incarico, extracted FROM incarico_cache "
+                    f"WHERE incarico IN ({placeholders}) AND stored_at >= ?",
+                    (*chunk, oldest)
+                ).fetchall()
+                found.update(rows)
+
+            if found:
+                self.conn.executemany("UPDATE incarico_cache SET last_access = ? WHERE incarico = ?",
+                                      [(now, value) for value in found])
+                self.conn.commit()
+            self.hits += len(found)
+            self.misses += len(values) - len(found)
+        return found
+
+    def put_many(self, items):
+        """Store value -> extracted pairs and evict least recently used entries over the limit"""
+        if self.mode == "bypass":
+            return
+        now = time.time()
+        rows = [(value, str(extracted), now, now) for value, extracted in items.items()
+                if value and extracted is not None]
+        if not rows:
+            return
+        with self.lock:
+            self.conn.executemany("INSERT OR REPLACE INTO incarico_cache VALUES (?, ?, ?, ?)", rows)
+            self.conn.commit()
+            self.evict()
+
+    def put(self, value, extracted):
+        self.put_many({value: extracted})
+
+    def evict(self):
+        """Keep only the max_entries most recently used entries"""
+        if not self.max_entries:
+            return 0
+        with self.lock:
+            cur = self.conn.execute("""
+                DELETE FROM incarico_cache WHERE incarico IN (
+                    SELECT incarico FROM incarico_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,))
+            self.conn.commit()
+            self.evictions += cur.rowcount
+        return cur.rowcount
+
+    def stats_message(self):
+        total = self.hits + self.misses
+        rate = (self.hits / total * 100) if total else 0.0
+        return (f"Incarico cache ({self.mode}): {self.hits} hit(s), {self.misses} miss(es) "
+                f"({rate:.0f}% hit rate), {self.evictions} eviction(s)")
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
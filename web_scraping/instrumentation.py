@@ -0,0 +1,171 @@
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+
+DEFAULT_TRACE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "web_scraping", "traces")
+
+# Categories whose spans are summed into the summary's "waiting" line
+WAIT_CATEGORIES = ("wait",)
+
+# selenium Command names of execute_script / execute_async_script
+SCRIPT_COMMANDS = ("w3cExecuteScript", "w3cExecuteScriptAsync", "executeAsyncScript")
+
+
+class NullTrace:
+    """Instrumentation turned off: every hook is a no-op"""
+
+    enabled = False
+
+    def phase(self, name, cat="phase", **args):
+        return nullcontext()
+
+    def count(self, name, value=1):
+        pass
+
+    def instrument_driver(self, driver):
+        executor = getattr(driver, "command_executor", None)
+        if executor is not None and hasattr(executor, "_run_trace"):
+            executor._run_trace = None
+
+
+NULL_TRACE = NullTrace()
+
+
+class RunTrace:
+    """Records timed spans, counters and every WebDriver command of one run.
+
+    Spans are kept as Chrome trace events ("X" phases, microseconds), so
+    write() produces a file that chrome://tracing and Perfetto can open; the
+    same file carries the aggregated summary under "otherData".
+    """
+
+    enabled = True
+
+    def __init__(self, name="run"):
+        self.name = name
+        self.started_at = datetime.now()
+        self.origin = time.perf_counter()
+        self.events = []
+        self.counters = defaultdict(int)
+        self.lock = threading.Lock()
+        self.pid = os.getpid()
+
+    def _record(self, name, cat, start, end, args):
+        event = {"name": name, "cat": cat, "ph": "X", "pid": self.pid, "tid": threading.get_ident(),
+                 "ts": round((start - self.origin) * 1e6, 1), "dur": round((end - start) * 1e6, 1)}
+        if args:
+            event["args"] = args
+        with self.lock:
+            self.events.append(event)
+
+    @contextmanager
+    def phase(self, name, cat="phase", **args):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(name, cat, start, time.perf_counter(), args)
+
+    def count(self, name, value=1):
+        with self.lock:
+            self.counters[name] += value
+
+    def instrument_driver(self, driver):
+        """Route the driver's commands through this trace.
+
+        The executor is wrapped once; a warm browser reused across runs just
+        points the wrapper at the current run's trace.
+        """
+        executor = driver.command_executor
+        if not hasattr(executor, "_run_trace"):
+            original = executor.execute
+
+            def execute(command, params):
+                trace = executor._run_trace
+                if trace is None:
+                    return original(command, params)
+                start = time.perf_counter()
+                try:
+                    return original(command, params)
+                finally:
+                    trace.on_command(command, start, time.perf_counter())
+
+            executor.execute = execute
+        executor._run_trace = self
+
+    def on_command(self, command, start, end):
+        self._record(command, "webdriver", start, end, None)
+        with self.lock:
+            self.counters["webdriver_commands"] += 1
+            if command in SCRIPT_COMMANDS:
+                self.counters["execute_script_calls"] += 1
+
+    def summary(self):
+        """Aggregate the spans into per-phase totals, per-page stats and wait/work split"""
+        with self.lock:
+            events = list(self.events)
+            counters = dict(self.counters)
+        wall = time.perf_counter() - self.origin
+
+        phases = defaultdict(lambda: {"count": 0, "seconds": 0.0})
+        for event in events:
+            if event["cat"] in ("phase", "wait"):
+                entry = phases[f"{event['cat']}:{event['name']}" if event["cat"] == "wait" else event["name"]]
+                entry["count"] += 1
+                entry["seconds"] += event["dur"] / 1e6
+
+        pages = [event["dur"] / 1e6 for event in events if event["cat"] == "page"]
+        waiting = sum(event["dur"] for event in events if event["cat"] in WAIT_CATEGORIES) / 1e6
+        driver = sum(event["dur"] for event in events if event["cat"] == "webdriver") / 1e6
+        return {
+            "name": self.name,
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "wall_seconds": round(wall, 3),
+            "waiting_seconds": round(waiting, 3),
+            "working_seconds": round(max(0.0, wall - waiting), 3),
+            "webdriver_seconds": round(driver, 3),
+            "pages": len(pages),
+            "page_seconds_mean": round(sum(pages) / len(pages), 3) if pages else 0.0,
+            "page_seconds_max": round(max(pages), 3) if pages else 0.0,
+            "counters": counters,
+            "phases": {name: {"count": entry["count"], "seconds": round(entry["seconds"], 3)}
+                       for name, entry in sorted(phases.items(), key=lambda item: -item[1]["seconds"])},
+        }
+
+    def summary_lines(self):
+        summary = self.summary()
+        wall = summary["wall_seconds"] or 1e-9
+        counters = summary["counters"]
+        lines = [f"⏱ Run trace: {summary['wall_seconds']:.2f}s wall, "
+                 f"{summary['waiting_seconds']:.2f}s waiting / {summary['working_seconds']:.2f}s working",
+                 f"   {'phase':<28} {'calls':>6} {'seconds':>9} {'share':>6}"]
+        for name, entry in summary["phases"].items():
+            lines.append(f"   {name:<28} {entry['count']:>6} {entry['seconds']:>9.2f} "
+                         f"{entry['seconds'] / wall * 100:>5.1f}%")
+        lines.append(f"   pages: {summary['pages']} (mean {summary['page_seconds_mean']:.2f}s, "
+                     f"max {summary['page_seconds_max']:.2f}s)")
+        lines.append(f"   WebDriver: {counters.get('webdriver_commands', 0)} commands "
+                     f"({counters.get('execute_script_calls', 0)} execute_script), "
+                     f"{summary['webdriver_seconds']:.2f}s")
+        return lines
+
+    def write(self, path=None, directory=DEFAULT_TRACE_DIR):
+        """Write the Chrome trace (with the summary) and return its path"""
+        if path is None:
+            path = os.path.join(directory, f"{self.name}-{self.started_at:%Y%m%d-%H%M%S}-{self.pid}.json")
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self.lock:
+            events = list(self.events)
+        threads = {event["tid"] for event in events}
+        metadata = [{"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid,
+                     "args": {"name": "main" if tid == threading.main_thread().ident else f"thread {tid}"}}
+                    for tid in threads]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": metadata + events, "displayTimeUnit": "ms",
+                       "otherData": self.summary()}, f)
+        return path
@@ -0,0 +1,167 @@
+import json
+import os
+from collections import namedtuple
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
+
+from instrumentation import NULL_TRACE
+
+
+DEFAULT_LOCATOR_CACHE = os.path.join(os.path.expanduser("~"), ".cache", "web_scraping", "locators.json")
+
+# Checks every candidate locator of a step in one call. arguments[0] holds
+# the [by, value] pairs in priority order, arguments[1] maps page (host and
+# path) -> index of the candidate that matched there last time, tried first;
+# with arguments[2] only a visible, enabled element counts. Returns
+# [index, element, page] for the first match, or null.
+RESOLVE_JS = '''
+    const candidates = arguments[0], preferred = arguments[1], clickable = arguments[2];
+    const page = window.location.host + window.location.pathname;
+
+    function lookup(by, value) {
+        switch (by) {
+            case "xpath":
+                return document.evaluate(value, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+            case "css selector":
+                return document.querySelector(value);
+            case "id":
+                return document.getElementById(value);
+            case "class name":
+                return document.getElementsByClassName(value)[0] || null;
+            case "name":
+                return document.getElementsByName(value)[0] || null;
+            case "tag name":
+                return document.getElementsByTagName(value)[0] || null;
+        }
+        return null;
+    }
+
+    function usable(element) {
+        if (!element) {
+            return false;
+        }
+        if (!clickable) {
+            return true;
+        }
+        const style = window.getComputedStyle(element);
+        return element.getClientRects().length > 0 && style.visibility !== "hidden" && !element.disabled;
+    }
+
+    const order = candidates.map(function (_, i) { return i; });
+    const first = preferred[page];
+    if (first !== undefined && first > 0 && first < candidates.length) {
+        order.splice(first, 1);
+        order.unshift(first);
+    }
+    for (const i of order) {
+        let element = null;
+        try {
+            element = lookup(candidates[i][0], candidates[i][1]);
+        } catch (e) {
+            element = null;  // an invalid selector is just a miss
+        }
+        if (usable(element)) {
+            return [i, element, page];
+        }
+    }
+    return null;
+'''
+
+Match = namedtuple("Match", ["element", "locator", "index"])
+
+
+def locator_key(locator):
+    by, value = locator
+    return f"{by}={value}"
+
+
+class LocatorEngine:
+    """Resolve a step's fallback locators with one script call per poll.
+
+    Every step (e.g. "activity menu") has a list of candidate (By, value)
+    locators, most specific first. A lookup checks all of them in the page
+    in a single execute_script call, so a page that only matches the last
+    candidate costs one poll instead of a timeout per candidate. The
+    candidate that matched is remembered per page and step in a JSON file
+    and tried first on later runs.
+
+    The driver must not have an implicit wait: it would stretch every
+    failed probe inside these explicit waits.
+    """
+
+    def __init__(self, driver, path=DEFAULT_LOCATOR_CACHE, poll_frequency=0.1, log=print, trace=NULL_TRACE):
+        self.driver = driver
+        self.path = path
+        self.poll_frequency = poll_frequency
+        self.log = log
+        self.trace = trace
+        self.cache = self._read()
+
+    def _read(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.cache, f, indent=1)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            self.log(f"⚠ Could not save the locator cache: {e}")
+
+    def preferences(self, step, locators):
+        """page -> index of the candidate that matched there last time"""
+        keys = [locator_key(locator) for locator in locators]
+        return {page: keys.index(key) for page, key in self.cache.get(step, {}).items() if key in keys}
+
+    def remember(self, step, page, match):
+        key = locator_key(match.locator)
+        if self.cache.get(step, {}).get(page) == key:
+            return
+        if match.index:
+            self.log(f"✓ Locator for {step}: fallback #{match.index + 1} matched, tried first from now on")
+        self.cache.setdefault(step, {})[page] = key
+        self._write()
+
+    def probe(self, step, locators, clickable=False, remember=True):
+        """One check of every candidate; returns a Match or None"""
+        result = self.driver.execute_script(RESOLVE_JS, [list(locator) for locator in locators],
+                                            self.preferences(step, locators) if remember else {}, clickable)
+        if not result:
+            return None
+        index, element, page = result
+        match = Match(element, locators[index], index)
+        if remember:
+            self.remember(step, page, match)
+        return match
+
+    def find(self, step, locators, timeout=5, clickable=False, remember=True):
+        """Wait for the first matching candidate; raises TimeoutException when none shows up"""
+        found = []
+
+        def matched(driver):
+            match = self.probe(step, locators, clickable, remember)
+            if match:
+                found.append(match)
+            return bool(match)
+
+        with self.trace.phase("locate", cat="wait", label=step):
+            try:
+                if not matched(self.driver):
+                    WebDriverWait(self.driver, timeout, poll_frequency=self.poll_frequency).until(matched)
+            except TimeoutException:
+                raise TimeoutException(f"No locator matched for {step} after {timeout}s "
+                                       f"({len(locators)} candidate(s))")
+        return found[-1]
+
+    def click(self, step, locators, timeout=5):
+        """Wait for the first clickable candidate and click it"""
+        match = self.find(step, locators, timeout=timeout, clickable=True)
+        match.element.click()
+        return match
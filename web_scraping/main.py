@@ -1,21 +1,19 @@
 
-import requests
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-from tkcalendar import Calendar
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, WebDriverException
-from datetime import datetime, timedelta
+from datetime import datetime
 import time
-import pandas as pd
-import re
-from selenium.common.exceptions import NoSuchElementException
+import queue
+import threading
 
-import os
+from date_ranges import preset_range, SHARD_UNITS
+from engine import create_scraper, run_job
+
+CUSTOM_RANGE_INDEX = 9
+MAX_CONSOLE_LINES = 2000   # older lines are trimmed from the console
+EVENT_POLL_MS = 100        # how often the Tk loop drains the worker queue
+MAX_EVENTS_PER_POLL = 500
+CLOSE_TIMEOUT_S = 30       # how long closing the window waits for a running worker to stop
 
 class DateRangeApp:
     def __init__(self, root):
@@ -44,8 +42,20 @@ class DateRangeApp:
         self.scrollable_frame.bind("<Enter>", lambda e: self._bind_mousewheel(canvas))
         self.scrollable_frame.bind("<Leave>", lambda e: self._unbind_mousewheel(canvas))
 
+        # Worker thread -> Tk events: ("log", text), ("progress", ...), ("error", text), ("done", ok)
+        self.events = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.worker = None
+        self.run_started = None
+        self.closing = False
+
         self.build_interface(self.scrollable_frame)
 
+        # The browser stays logged in between runs; close it with the window
+        self.scraper = None
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.root.after(EVENT_POLL_MS, self.poll_events)
+
     def _bind_mousewheel(self, canvas):
         canvas.bind_all("<MouseWheel>", lambda event: canvas.yview_scroll(int(-1*(event.delta/120)), "units"))
 
@@ -90,7 +100,8 @@ class DateRangeApp:
             "Current Month",   # 5
             "Previous Month",  # 6
             "Current Year",    # 7
-            "Previous Year"    # 8
+            "Previous Year",   # 8
+            "Custom Range"     # 9 - uses the calendars below
         ]
 
         self.date_range_var = tk.StringVar()
@@ -100,31 +111,117 @@ class DateRangeApp:
                                                 values=date_range_options, state="readonly")
         self.date_range_dropdown.grid(row=5, column=0, columnspan=2, padx=3, pady=3, sticky="ew")
 
+        # Incarico cache: use cached values, refresh them, or bypass the cache entirely
+        self.cache_mode_var = tk.StringVar(value="use")
+        ttk.Combobox(main_frame, textvariable=self.cache_mode_var, values=["use", "refresh", "bypass"],
+                     state="readonly", width=10).grid(row=5, column=2, padx=5, pady=3, sticky="w")
+
         self.date_range_index = 1  # Default index
 
         self.date_range_dropdown.bind("<<ComboboxSelected>>", lambda e: setattr(
             self, "date_range_index", date_range_options.index(self.date_range_var.get()) + 1))
 
+        # Optional incarico detail endpoint ('{incarico}' is replaced by the row value)
+        ttk.Label(main_frame, text="Incarico Detail Endpoint:").grid(row=6, column=0, sticky="w", pady=5)
+        self.incarico_endpoint_var = tk.StringVar()
+        ttk.Entry(main_frame, textvariable=self.incarico_endpoint_var, width=50).grid(
+            row=6, column=1, padx=3, pady=3, sticky="ew")
+
+        ttk.Label(main_frame, text="Detail JSON Field / Concurrency:").grid(row=7, column=0, sticky="w", pady=5)
+        self.incarico_field_var = tk.StringVar()
+        ttk.Entry(main_frame, textvariable=self.incarico_field_var, width=30).grid(
+            row=7, column=1, padx=3, pady=3, sticky="ew")
+        self.incarico_concurrency_var = tk.IntVar(value=8)
+        ttk.Spinbox(main_frame, from_=1, to=32, textvariable=self.incarico_concurrency_var, width=5).grid(
+            row=7, column=2, padx=5, pady=3, sticky="w")
+
+        # Optional grid search endpoint: reads the grid over HTTP instead of paging in the browser
+        ttk.Label(main_frame, text="Grid Endpoint / Concurrency:").grid(row=8, column=0, sticky="w", pady=5)
+        self.grid_endpoint_var = tk.StringVar()
+        ttk.Entry(main_frame, textvariable=self.grid_endpoint_var, width=50).grid(
+            row=8, column=1, padx=3, pady=3, sticky="ew")
+        self.grid_concurrency_var = tk.IntVar(value=4)
+        ttk.Spinbox(main_frame, from_=1, to=16, textvariable=self.grid_concurrency_var, width=5).grid(
+            row=8, column=2, padx=5, pady=3, sticky="w")
+
+        # Custom range calendars and sharded execution
+        from tkcalendar import Calendar
+
+        range_frame = ttk.Frame(main_frame)
+        range_frame.grid(row=9, column=0, columnspan=3, sticky="ew", pady=5)
+
+        ttk.Label(range_frame, text="Custom Start:").grid(row=0, column=0, sticky="w")
+        self.start_calendar = Calendar(range_frame, selectmode="day", date_pattern="dd/mm/yyyy")
+        self.start_calendar.grid(row=1, column=0, padx=5)
+
+        ttk.Label(range_frame, text="Custom End:").grid(row=0, column=1, sticky="w")
+        self.end_calendar = Calendar(range_frame, selectmode="day", date_pattern="dd/mm/yyyy")
+        self.end_calendar.grid(row=1, column=1, padx=5)
+
+        shard_frame = ttk.LabelFrame(range_frame, text="Sharded Run")
+        shard_frame.grid(row=1, column=2, padx=10, sticky="n")
+        self.sharded_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(shard_frame, text="Split range across browsers", variable=self.sharded_var).grid(
+            row=0, column=0, columnspan=2, sticky="w", pady=2)
+        ttk.Label(shard_frame, text="Shard by:").grid(row=1, column=0, sticky="w")
+        self.shard_unit_var = tk.StringVar(value=SHARD_UNITS[0])
+        ttk.Combobox(shard_frame, textvariable=self.shard_unit_var, values=list(SHARD_UNITS),
+                     state="readonly", width=8).grid(row=1, column=1, sticky="w", pady=2)
+        ttk.Label(shard_frame, text="Workers:").grid(row=2, column=0, sticky="w")
+        self.shard_workers_var = tk.IntVar(value=4)
+        ttk.Spinbox(shard_frame, from_=1, to=16, textvariable=self.shard_workers_var, width=5).grid(
+            row=2, column=1, sticky="w", pady=2)
+
+        sync_frame = ttk.LabelFrame(range_frame, text="Sync")
+        sync_frame.grid(row=1, column=3, padx=10, sticky="n")
+        self.incremental_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(sync_frame, text="Incremental (local row store)", variable=self.incremental_var).grid(
+            row=0, column=0, sticky="w", pady=2)
+        self.resume_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(sync_frame, text="Resume interrupted run", variable=self.resume_var).grid(
+            row=1, column=0, sticky="w", pady=2)
+        self.retry_failed_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(sync_frame, text="Retry failed rows only", variable=self.retry_failed_var).grid(
+            row=2, column=0, sticky="w", pady=2)
+        self.instrument_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(sync_frame, text="Write run trace", variable=self.instrument_var).grid(
+            row=3, column=0, sticky="w", pady=2)
+        self.lean_profile_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(sync_frame, text="Lean browser (no images/fonts)", variable=self.lean_profile_var).grid(
+            row=4, column=0, sticky="w", pady=2)
 
         # Save Path
-        ttk.Label(main_frame, text="Save Excel File As:").grid(row=8, column=0, sticky="w", pady=5)
+        ttk.Label(main_frame, text="Save Export As (.xlsx/.csv):").grid(row=10, column=0, sticky="w", pady=5)
         self.save_path_var = tk.StringVar()
         self.save_path_entry = ttk.Entry(main_frame, textvariable=self.save_path_var, width=50)
-        self.save_path_entry.grid(row=8, column=1, padx=3, pady=3, sticky="ew")
+        self.save_path_entry.grid(row=10, column=1, padx=3, pady=3, sticky="ew")
         browse_btn = ttk.Button(main_frame, text="Browse...", command=self.browse_save_path)
-        browse_btn.grid(row=8, column=2, padx=5, pady=5)
-
-        ttk.Button(main_frame, text="Start Automation", command=self.process_dates).grid(
-            row=9, column=0, columnspan=3, pady=10, sticky="ew")
-
-        ttk.Label(main_frame, text="Console Output:").grid(row=10, column=0, sticky="w", pady=5)
+        browse_btn.grid(row=10, column=2, padx=5, pady=5)
+
+        button_frame = ttk.Frame(main_frame)
+        button_frame.grid(row=11, column=0, columnspan=3, pady=10, sticky="ew")
+        button_frame.grid_columnconfigure(0, weight=1)
+        self.start_button = ttk.Button(button_frame, text="Start Automation", command=self.process_dates)
+        self.start_button.grid(row=0, column=0, sticky="ew")
+        self.cancel_button = ttk.Button(button_frame, text="Cancel", command=self.cancel_run, state="disabled")
+        self.cancel_button.grid(row=0, column=1, padx=5)
+        self.close_browser_button = ttk.Button(button_frame, text="Close Browser", command=self.close_browser)
+        self.close_browser_button.grid(row=0, column=2, padx=5)
+
+        # Progress: page X of Y, rows per second, ETA
+        self.progress_bar = ttk.Progressbar(main_frame, mode="determinate")
+        self.progress_bar.grid(row=12, column=0, columnspan=2, sticky="ew", padx=3)
+        self.progress_var = tk.StringVar(value="Idle")
+        ttk.Label(main_frame, textvariable=self.progress_var).grid(row=12, column=2, sticky="w")
+
+        ttk.Label(main_frame, text="Console Output:").grid(row=13, column=0, sticky="w", pady=5)
         self.console = tk.Text(main_frame, height=12, state='disabled', wrap=tk.WORD)
-        self.console.grid(row=11, column=0, columnspan=3, sticky="nsew")
-        main_frame.grid_rowconfigure(11, weight=1)
+        self.console.grid(row=14, column=0, columnspan=3, sticky="nsew")
+        main_frame.grid_rowconfigure(14, weight=1)
         main_frame.grid_columnconfigure(1, weight=1)
 
         scrollbar = ttk.Scrollbar(main_frame, orient="vertical", command=self.console.yview)
-        scrollbar.grid(row=11, column=3, sticky="ns")
+        scrollbar.grid(row=14, column=3, sticky="ns")
         self.console.config(yscrollcommand=scrollbar.set)
 
         self.email_entry.focus()
@@ -133,19 +230,62 @@ class DateRangeApp:
         filename = filedialog.asksaveasfilename(
             title="Select Excel File to Save",
             defaultextension=".xlsx",
-            filetypes=[("Excel files", "*.xlsx"), ("All files", "*.*")],
+            filetypes=[("Excel files", "*.xlsx"), ("CSV files", "*.csv"),
+                       ("Parquet dataset (folder)", "*.parquet"), ("All files", "*.*")],
             initialfile="extracted_tables.xlsx"
         )
         if filename:
             self.save_path_var.set(filename)
     
     def log_message(self, message):
+        """Thread-safe: queue a console line, written by poll_events on the Tk thread"""
         timestamp = datetime.now().strftime("%H:%M:%S")
-        self.console.config(state='normal')
-        self.console.insert(tk.END, f"[{timestamp}] {message}\n")
-        self.console.see(tk.END)
-        self.console.config(state='disabled')
-        self.root.update()
+        self.events.put(("log", f"[{timestamp}] {message}\n"))
+
+    def report_progress(self, current, total, rows, unit="page"):
+        """Thread-safe progress callback for the scraper"""
+        self.events.put(("progress", (current, total, rows, unit)))
+
+    def poll_events(self):
+        """Drain queued worker events in one batch and redraw the console once"""
+        lines = []
+        try:
+            for _ in range(MAX_EVENTS_PER_POLL):
+                kind, payload = self.events.get_nowait()
+                if kind == "log":
+                    lines.append(payload)
+                elif kind == "progress":
+                    self.show_progress(*payload)
+                elif kind == "error":
+                    messagebox.showerror("Error", payload)
+                elif kind == "done":
+                    self.finish_run(payload)
+        except queue.Empty:
+            pass
+
+        if lines:
+            self.console.config(state='normal')
+            self.console.insert(tk.END, "".join(lines))
+            excess = int(self.console.index("end-1c").split(".")[0]) - MAX_CONSOLE_LINES
+            if excess > 0:
+                self.console.delete("1.0", f"{excess + 1}.0")
+            self.console.see(tk.END)
+            self.console.config(state='disabled')
+        self.root.after(EVENT_POLL_MS, self.poll_events)
+
+    def show_progress(self, current, total, rows, unit):
+        elapsed = max(time.monotonic() - self.run_started, 1e-6)
+        rate = rows / elapsed
+        if total is None:
+            # Page count not known yet (grid endpoint without a total)
+            self.progress_bar.config(maximum=current + 1, value=current)
+            self.progress_var.set(f"{unit.capitalize()} {current} · {rate:.1f} rows/s")
+            return
+        eta = elapsed / current * (total - current) if current else 0
+        self.progress_bar.config(maximum=max(total, 1), value=current)
+        self.progress_var.set(f"{unit.capitalize()} {current}/{total} · {rate:.1f} rows/s · "
+                              f"ETA {int(eta // 60):02d}:{int(eta % 60):02d}")
+
     def process_dates(self):
         # Get credentials
         email = self.email_entry.get().strip()
@@ -163,395 +303,142 @@ class DateRangeApp:
             messagebox.showerror("Error", "Please select the Excel file save path before starting.")
             return
         
+        if self.worker and self.worker.is_alive():
+            return
+
+        # Tk variables are read here, on the Tk thread, before the worker starts
+        try:
+            settings = self.collect_settings()
+        except ValueError as e:
+            self.log_message(f"Error: {e}")
+            messagebox.showerror("Error", str(e))
+            return
+
         # Get selected date range option
         date_range_option = self.date_range_var.get()
         self.log_message(f"Starting automation for date range: {date_range_option}")
-        
-        # Run the automation
-        self.run_automation(email, password, target_url, save_path)
-    
-    def navigate_to_target(self, driver, target_url):
-        """Robust navigation method with multiple fallbacks"""
-        current_url = driver.current_url
-        attempts = [
-            lambda: driver.get(target_url),
-            lambda: driver.execute_script(f"window.location.href = '{target_url}';"),
-            lambda: driver.find_element(By.TAG_NAME, 'body').send_keys(Keys.CONTROL + 'l' + target_url + Keys.RETURN)
-        ]
-        
-        for attempt in attempts:
-            try:
-                attempt()
-                WebDriverWait(driver, 10).until(
-                    lambda d: d.current_url != current_url
-                )
-                return True
-            except (TimeoutException, WebDriverException):
-                continue
-        
-        return False
+
+        # Run the automation in the background so the UI stays responsive
+        self.cancel_event.clear()
+        self.run_started = time.monotonic()
+        self.progress_bar.config(value=0)
+        self.progress_var.set("Starting...")
+        self.start_button.config(state="disabled")
+        self.close_browser_button.config(state="disabled")
+        self.cancel_button.config(state="normal")
+        self.worker = threading.Thread(target=self.run_automation,
+                                       args=(email, password, target_url, save_path, settings), daemon=True)
+        self.worker.start()
+
+    def cancel_run(self):
+        self.cancel_event.set()
+        self.cancel_button.config(state="disabled")
+        self.log_message("Cancel requested - stopping at the next page boundary...")
+
+    def finish_run(self, ok):
+        self.start_button.config(state="normal")
+        self.close_browser_button.config(state="normal")
+        self.cancel_button.config(state="disabled")
+        if self.cancel_event.is_set():
+            self.progress_var.set("Cancelled")
+        else:
+            self.progress_var.set("Done" if ok else "Failed")
     
-    def verify_login_success(self, driver):
-        """Check multiple indicators of successful login"""
-        indicators = [
-            (By.XPATH, "//*[contains(text(), 'Welcome') or contains(text(), 'Dashboard')]"),
-            (By.CSS_SELECTOR, "[href*='logout'], [onclick*='logout']"),
-            (By.CLASS_NAME, "user-avatar"),
-            (By.ID, "user-menu")
-        ]
-        
-        for locator in indicators:
-            try:
-                WebDriverWait(driver, 5).until(
-                    EC.presence_of_element_located(locator)
-                )
-                return True
-            except TimeoutException:
-                continue
-        return False
-
-    def run_automation(self, email, password, target_url, save_path):
-        date_range_index = self.date_range_index
-        self.log_message(f"Using date range option #{date_range_index}")
-
-        chrome_options = webdriver.ChromeOptions()
-        chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        chrome_options.add_experimental_option('useAutomationExtension', False)
-        chrome_options.add_argument("--start-maximized")
-        chrome_options.add_argument("--headless")  #  Enable headless mode
-        chrome_options.add_argument("--disable-gpu")  # Optional, good for compatibility
-        chrome_options.add_argument("--window-size=1920,1080")  # Optional, for full rendering
-
-        manual_header = [
-                    "inizio", "fine", "utente", "tipo attivita", "durata", "tempo fatturabile", "importo attivita",
-                    "importo aggiuntivo", "importo di viaggio", "importo altri elementi", "importo articoli", "importo totale",
-                    "stato fatturazione", "contatto", "commessa", "referente", "indirizzo", "etichetta", "completata",
-                    "approvata", "note in report","Note interne", "incarico", "rapportino", "importo spese", "Email contatto",
-                    "telefono contatto", "FAX contatto", "Email referente", "telefono referente", "cellulare referente",
-                    "fax referente", "rapportino inviato il"
-                ]
+    def selected_range(self):
+        """Return the (start, end) dates of the selected preset or custom range"""
+        if self.date_range_index == CUSTOM_RANGE_INDEX:
+            start = self.start_calendar.selection_get()
+            end = self.end_calendar.selection_get()
+            if end < start:
+                raise ValueError("Custom end date is before the start date")
+            return start, end
+        return preset_range(self.date_range_index)
+
+    def collect_settings(self):
+        """Snapshot the GUI options for one run"""
+        date_range = self.selected_range()
+        return {
+            "scraper_kwargs": {
+                "date_range_index": self.date_range_index,
+                "custom_range": date_range if self.date_range_index == CUSTOM_RANGE_INDEX else None,
+                "cache_mode": self.cache_mode_var.get(),
+                "incarico_endpoint": self.incarico_endpoint_var.get().strip(),
+                "incarico_field": self.incarico_field_var.get().strip(),
+                "incarico_concurrency": self.incarico_concurrency_var.get(),
+                "grid_endpoint": self.grid_endpoint_var.get().strip(),
+                "grid_concurrency": self.grid_concurrency_var.get(),
+                "incremental": self.incremental_var.get(),
+                "resume": self.resume_var.get(),
+                "retry_failed": self.retry_failed_var.get(),
+                "instrument": self.instrument_var.get(),
+                "lean_profile": self.lean_profile_var.get(),
+            },
+            "date_range": date_range,
+            "sharded": self.sharded_var.get(),
+            "shard_unit": self.shard_unit_var.get(),
+            "shard_workers": self.shard_workers_var.get(),
+        }
+
+    def run_automation(self, email, password, target_url, save_path, settings):
+        """Worker thread body; talks to the Tk side only through self.events"""
+        ok = False
         try:
-            self.driver = webdriver.Chrome(options=chrome_options)
-            self.driver.implicitly_wait(5)
+            if self.scraper is None and not settings["sharded"]:
+                self.scraper = create_scraper(log=self.log_message, keep_alive=True,
+                                              progress=self.report_progress, cancel_event=self.cancel_event)
+            ok, error = run_job(email, password, target_url, save_path, settings, log=self.log_message,
+                                progress=self.report_progress, cancel_event=self.cancel_event,
+                                scraper=self.scraper)
+            if not ok and not settings["sharded"]:
+                self.events.put(("error", error))
+            return ok
         except Exception as e:
-            self.log_message(f"Failed to start Chrome: {str(e)}")
-            messagebox.showerror("Error", f"Failed to start Chrome: {str(e)}")
+            self.log_message(f" Critical error in automation: {str(e)}")
+            self.events.put(("error", f"Automation failed: {str(e)}"))
             return False
+        finally:
+            # The window is closing: the browser is only safe to quit once the run is done with it
+            if self.closing:
+                self.close_browser()
+            self.events.put(("done", ok))
 
-        all_dfs = []
+    def close_browser(self):
+        if self.scraper:
+            self.scraper.cleanup()
 
-        try:
-            self.log_message("Navigating to login page...")
-            login_url = ""
-            self.driver.get(login_url)
-
-            try:
-                torna_button = WebDriverWait(self.driver, 5).until(
-                    EC.element_to_be_clickable((By.XPATH, "//a[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'torna a login')]"))
-                )
-                torna_button.click()
-                self.log_message("✓ Clicked 'Torna a login' button")
-            except TimeoutException:
-                self.log_message("No 'Torna a login' button found - proceeding directly")
-
-            email_field = WebDriverWait(self.driver, 10).until(EC.presence_of_element_located((By.ID, "email")))
-            email_field.clear()
-            email_field.send_keys(email)
-
-            password_field = self.driver.find_element(By.ID, "password")
-            password_field.clear()
-            password_field.send_keys(password)
-
-            login_button = WebDriverWait(self.driver, 5).until(
-                EC.element_to_be_clickable((By.XPATH, "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'accedi') or contains(@id, 'btn-login')]"))
-            )
-            login_button.click()
-            self.log_message("✓ Clicked login button ('Accedi')")
-
-            WebDriverWait(self.driver, 10).until(
-                lambda d: "dashboard" in d.current_url.lower() or self.verify_login_success(d)
-            )
-            self.log_message("✓ Login successful")
-
-            if target_url:
-                self.log_message(f"Navigating to target URL: {target_url}")
-                self.driver.get(target_url)
-                WebDriverWait(self.driver, 10).until(
-                    lambda d: target_url.split("/")[-1].lower() in d.current_url.lower()
-                )
-            try:
-                time.sleep(2)
-                Activity_button = WebDriverWait(self.driver, 5).until(
-                    EC.element_to_be_clickable((By.XPATH, "/html/body/div[10]/div[2]/div[3]/div[1]/ul/li[8]/div/a/div/span"))
-                )
-                Activity_button.click()
-                time.sleep(2)
-                Activity_search_button = WebDriverWait(self.driver, 5).until(
-                    EC.element_to_be_clickable((By.XPATH, "/html/body/div[10]/div[2]/div[3]/div[1]/ul/li[8]/ul/li[1]/div/a/div/span"))
-                )
-                Activity_search_button.click()
-                self.log_message("Opened Activity search correctly")
-                time.sleep(1)
-            except TimeoutException:
-                self.log_message("No Activity button found - proceeding directly")
-            try:
-                time.sleep(1)
-                # Click type button
-                type_button = WebDriverWait(self.driver, 5).until(
-                    EC.element_to_be_clickable((By.XPATH, "/html/body/div[10]/div[4]/section/div[1]/div/div[3]/div[1]/div/div[2]/div/div[2]/div[1]/span"))
-                )
-                type_button.click()
-                time.sleep(1)
-
-                # Click deselct option using JS
-                self.driver.execute_script("""
-                    const el = document.querySelector("#app > div:nth-child(3) > div.by-scroll-container > div > div:nth-child(2) > div > div:nth-child(2) > div.dr-dropdown-panel > div:nth-child(2) > div:nth-child(2)");
-                    el?.click();
-                """)
-
-                # Select type settings
-                for i, xpath in enumerate([
-                    "/html/body/div[10]/div[4]/section/div[1]/div/div[3]/div[1]/div/div[2]/div/div[2]/div[2]/div[3]/div[1]/div/span[1]",
-                    "/html/body/div[10]/div[4]/section/div[1]/div/div[3]/div[1]/div/div[2]/div/div[2]/div[2]/div[3]/div[2]/div/span[2]",
-                    "/html/body/div[10]/div[4]/section/div[1]/div/div[3]/div[1]/div/div[2]/div/div[2]/div[2]/div[3]/div[3]/div/span[1]",
-                    "/html/body/div[10]/div[4]/section/div[1]/div/div[3]/div[1]/div/div[2]/div/div[2]/div[2]/div[3]/div[4]/div/span[1]",
-                    "/html/body/div[10]/div[4]/section/div[1]/div/div[3]/div[1]/div/div[2]/div/div[2]/div[2]/div[3]/div[5]/div/span[1]"
-                ], start=1):
-                    setting = WebDriverWait(self.driver, 5).until(EC.element_to_be_clickable((By.XPATH, xpath)))
-                    setting.click()
-                try:
-                    
-                    # Open date picker
-                    try:
-                        date_field_button = WebDriverWait(self.driver, 10).until(
-                            EC.element_to_be_clickable((By.XPATH, 
-                                "/html/body/div[10]/div[4]/section/div[1]/div/div[3]/div[1]/div/div[4]/div/div/div/div[2]/span"))
-                        )
-                        date_field_button.click()
-                        time.sleep(1)  # Small delay for calendar to open
-                        select_date_option = WebDriverWait(self.driver, 10).until(
-                            EC.element_to_be_clickable((By.XPATH, 
-                                f"/html/body/div[10]/div[4]/section/div[1]/div/div[3]/div[1]/div/div[4]/div/div/div/div[3]/div[1]/span[{date_range_index}]"))
-                        )
-                        select_date_option.click()
-                        time.sleep(1)  # Small delay for calendar to open
-                        act_button = WebDriverWait(self.driver, 5).until(
-                            EC.element_to_be_clickable((By.XPATH, "/html/body/div[10]/div[4]/section/div[1]/div/div[3]/div[1]/div/div[3]/div/div[2]/div[1]/span"))
-                        )
-                        act_button.click()
-                        time.sleep(1)
-
-                        # Click deselct option using JS
-                        self.driver.execute_script("""
-                            const el = document.querySelector("#app > div:nth-child(3) > div.by-scroll-container > div > div:nth-child(3) > div > div:nth-child(2) > div.dr-dropdown-panel > div:nth-child(2) > div:nth-child(2)");
-                            el?.click();
-                        """)
-                    except Exception as e:
-                        print(f"Failed to open date picker: {str(e)}")
-                        raise
-                    
-                    time.sleep(2)  # Wait for selection to complete
-
-                except Exception as e:
-                    print(f"Date selection failed: {str(e)}")
-                    raise
-                time.sleep(10)
-            except TimeoutException:
-                self.log_message(" Timeout: could not reset the settings - proceeding directly")
-            all_dfs = []
-
-            try:
-                while True:
-                    # Get pagination info
-                    page_info = self.driver.find_element(By.XPATH, "//div[contains(text(), 'Pagina')]").text
-                    parts = page_info.split()
-                    current_page = int(parts[1])
-                    total_pages = int(parts[3])
-                    print(f"📄 Current page: {current_page} of {total_pages}")
-
-                    try:
-                        if not manual_header or not isinstance(manual_header, list):
-                            self.log_message(" 'manual_header' is not defined or is invalid. Skipping table extraction.")
-                            return False
-
-                        tables = self.driver.find_elements(By.TAG_NAME, "table")
-                        self.log_message(f" Found {len(tables)} table(s) on the page.")
-
-                        for idx, table in enumerate(tables, start=1):
-                            try:
-                                tbody_rows = table.find_elements(By.CSS_SELECTOR, "tbody tr")
-                                if not tbody_rows:
-                                    tbody_rows = table.find_elements(By.TAG_NAME, "tr")
-                                    self.log_message(f"⚠ Table #{idx} has no <tbody>; falling back to all <tr>.")
-
-                                if not tbody_rows:
-                                    self.log_message(f"⚠ Table #{idx} has no rows. Skipping.")
-                                    continue
-
-                                table_data = []
-                                for row in tbody_rows:
-                                    try:
-                                        cells = row.find_elements(By.XPATH, "./th|./td")
-                                        row_data = [cell.text.strip() for cell in cells]
-                                        if any(row_data):
-                                            table_data.append(row_data)
-                                    except Exception as row_err:
-                                        self.log_message(f"⚠ Error parsing row in Table #{idx}: {row_err}")
-
-                                if not table_data:
-                                    self.log_message(f"⚠ Table #{idx} contains only empty rows. Skipping.")
-                                    continue
-
-                                # Normalize rows to header
-                                for r in range(len(table_data)):
-                                    diff = len(manual_header) - len(table_data[r])
-                                    if diff > 0:
-                                        table_data[r].extend([""] * diff)
-                                    elif diff < 0:
-                                        table_data[r] = table_data[r][:len(manual_header)]
-
-                                # Create DataFrame
-                                df = pd.DataFrame(table_data, columns=manual_header)
-                                df["incarico_extracted"] = None
-
-                                if "incarico" in df.columns:
-                                    for local_index_on_page, row_values in enumerate(table_data):
-
-                                        incarico_value = str(row_values[manual_header.index("incarico")]).strip()
-                                        if incarico_value:
-                                            try:
-                                                self.log_message(f"→ Row {local_index_on_page+1}: Clicking incarico span for value: {incarico_value[:10]}")
-
-                                                js_click = f'''
-                                                    const span = document.querySelector(
-                                                        "#app > div.search-grid-wrapper > div:nth-child(2) > div > div > div > table > tbody > tr:nth-child({local_index_on_page+1}) > td:nth-child(23) > div > div > span"
-                                                    );
-                                                    if (span) {{
-                                                        span.scrollIntoView({{behavior: 'smooth', block: 'center'}});
-                                                        span.click();
-                                                    }} else {{
-                                                        console.warn("⚠ Span not found at row {local_index_on_page+1}");
-                                                    }}
-                                                '''
-                                                self.driver.execute_script(js_click)
-                                                time.sleep(1)  # Wait for modal to fully appear
-
-                                                js_extract = '''
-                                                    function getTextByXPath(xpath) {
-                                                        const result = document.evaluate(xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null);
-                                                        return result.singleNodeValue ? result.singleNodeValue.textContent.trim() : null;
-                                                    }
-                                                    return getTextByXPath("/html/body/div[6]/div/div/div/div/div/div/div/div[4]/div[3]/div[2]/div[2]");
-                                                '''
-                                                extracted_value = self.driver.execute_script(js_extract)
-                                                df.at[local_index_on_page, "incarico_extracted"] = extracted_value
-                                                time.sleep(1)
-                                                self.log_message(f"✓ Extracted incarico: {extracted_value}")
-                                                js_close = '''
-                                                    const buttonSpan = document.querySelector(
-                                                        "#vj-modal-manager > div > div > div > div > div > div > div > div:nth-child(6) > button.button-input-white > span:nth-child(1)"
-                                                    );
-                                                    if (buttonSpan) {
-                                                        buttonSpan.scrollIntoView({behavior: 'smooth', block: 'center'});
-                                                        buttonSpan.click();
-                                                    } else {
-                                                        console.warn("⚠ Close button not found in modal");
-                                                    }
-                                                '''
-                                                self.driver.execute_script(js_close)
-                                                time.sleep(2)
-
-                                            except Exception as incarico_err:
-                                                self.log_message(f"⚠ Error extracting incarico on row {local_index_on_page+1}: {incarico_err}")
-                                else:
-                                    self.log_message("⚠ 'incarico' column not found in DataFrame")
-                                all_dfs.append(df)
-                                self.log_message(f"Table #{idx} extracted with {len(df)} rows")
-
-                            except Exception as ex_table:
-                                self.log_message(f" Error extracting Table #{idx}: {ex_table}")
-
-                    except Exception as e:
-                        self.log_message(f" Critical error during table extraction: {e}")
-
-                    if current_page >= total_pages:
-                        break
-
-                    # Click next page arrow
-                    try:
-                        js_click_arrow = '''
-                            const arrowIcon = document.querySelector(
-                                "#app > div.search-grid-wrapper > div:nth-child(2) > div > div > div > table > tbody > tr:nth-child(51) > td:nth-child(1) > div > div:nth-child(2) > span:nth-child(3)"
-                            );
-                            if (arrowIcon) {
-                                arrowIcon.scrollIntoView({behavior: 'smooth', block: 'center'});
-                                arrowIcon.click();
-                            } else {
-                                console.warn("⚠ Arrow icon not found at row 51");
-                            }
-                        '''
-                        self.driver.execute_script(js_click_arrow)
-                        time.sleep(2)
-                    except Exception as e:
-                        self.log_message(f" Failed to click next arrow: {e}")
-                        break
-
-            except Exception as e:
-                self.log_message(f" Error in pagination logic: {e}")
-
-            # After loop, save all to Excel
-            if all_dfs:
-                try:
-                    full_df = pd.concat(all_dfs, ignore_index=True)
-                    manipulated_full_df = full_df.drop(["importo attivita","importo aggiuntivo","importo di viaggio","importo altri elementi","importo articoli","importo totale","indirizzo","incarico","rapportino","importo spese","telefono contatto","FAX contatto","Email referente","telefono referente","cellulare referente","fax referente","rapportino inviato il"], axis = 1)
-                    if 'completata' in manipulated_full_df.columns:
-                        manipulated_full_df['completata'] = manipulated_full_df['completata'].apply(
-                            lambda x: True if x == 'check_box' else False
-                        )
-                    if 'approvata' in manipulated_full_df.columns:
-                        manipulated_full_df['approvata'] = manipulated_full_df['approvata'].apply(
-                            lambda x: True if x == 'check_box' else False
-                        )
-                    manipulated_full_df = manipulated_full_df.drop(manipulated_full_df.tail(1).index)
-                    manipulated_full_df.to_excel(save_path, index=False)
-                    self.log_message(f"\n All pages exported to Excel: {save_path}")
-                except Exception as ex_save:
-                    self.log_message(f" Failed to save Excel file: {ex_save}")
-            else:
-                self.log_message("⚠ No data to export.")
+    def on_close(self):
+        if self.closing:
+            return
+        self.cancel_event.set()
+        if self.worker and self.worker.is_alive():
+            # The worker may still be driving the browser or writing the export; it stops at the
+            # next page boundary and closes the browser itself
+            self.closing = True
+            self.progress_var.set("Closing - waiting for the run to stop...")
+            self.wait_for_worker(time.monotonic() + CLOSE_TIMEOUT_S)
+            return
+        self.close_browser()
+        self.root.destroy()
 
-        except Exception as e:
-            self.log_message(f" Critical error in automation: {str(e)}")
-            messagebox.showerror("Error", f"Automation failed: {str(e)}")
-            return False
-        finally:
-            self.cleanup()
-            
-    def cleanup(self):
-        try:
-            if hasattr(self, "driver") and self.driver:
-                self.driver.quit()
-                self.log_message("Browser closed successfully.")
-        except Exception as e:
-            self.log_message(f"Error closing browser: {str(e)}")
+    def wait_for_worker(self, deadline):
+        """Destroy the window once the worker has exited (or CLOSE_TIMEOUT_S passed), polling from Tk"""
+        if self.worker.is_alive():
+            if time.monotonic() < deadline:
+                self.root.after(EVENT_POLL_MS, self.wait_for_worker, deadline)
+                return
+        else:
+            # Also covers a worker that finished before it saw closing
+            self.close_browser()
+        self.root.destroy()
 
 
 if __name__ == "__main__":
-    root = tk.Tk()
-    
-    # Install tkcalendar if not available
     try:
-        from tkcalendar import Calendar
+        import tkcalendar  # noqa: F401
     except ImportError:
-        import subprocess
-        import sys
-        try:
-            subprocess.check_call([sys.executable, "-m", "pip", "install", "tkcalendar"])
-            from tkcalendar import Calendar
-        except:
-            print("Failed to install tkcalendar. Please install it manually.")
-            sys.exit(1)
-    
+        raise SystemExit("The GUI needs tkcalendar (pip install tkcalendar); "
+                         "use cli.py for headless runs.")
+
+    root = tk.Tk()
     app = DateRangeApp(root)
     root.mainloop()
@@ -0,0 +1,394 @@
+import argparse
+import json
+import random
+import secrets
+import threading
+import time
+from datetime import datetime, timedelta
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from schema import GRID_HEADER
+
+
+# The scraper clicks the next arrow in row 51, so the grid always shows 50 rows
+PAGE_SIZE = 50
+# Largest page_size the grid endpoint honours, like a backend capping requests
+MAX_PAGE_SIZE = 200
+SESSION_COOKIE = "mock_session"
+TARGET_PATH = "/app/attivita"
+
+USERS = ["Rossi M.", "Bianchi L.", "Verdi G.", "Russo A.", "Ferrari S.", "Esposito C."]
+ACTIVITY_TYPES = ["Intervento", "Manutenzione", "Installazione", "Sopralluogo"]
+BILLING_STATES = ["Da fatturare", "Fatturato", "Non fatturabile"]
+
+# Heavy page furniture the lean browser profile is meant to skip. The tag
+# manager path mimics the third-party URL so the same block patterns match.
+ASSET_IMAGES = 12
+ASSET_HTML = ('<style>@font-face {font-family: "Icons"; src: url("/static/fonts/icons.woff2");}'
+              ' .grid-toolbar {font-family: "Icons";}</style>'
+              + "".join(f'<img src="/static/img/avatar-{i}.png" width="32" height="32"/>' for i in range(ASSET_IMAGES))
+              + '<script async="async" src="/static/www.googletagmanager.com/gtag.js"></script>')
+ASSET_TYPES = {".png": "image/png", ".woff2": "font/woff2", ".js": "application/javascript"}
+ASSET_SIZE = 64 * 1024
+
+
+def wrap(inner, depth, tag="div"):
+    """inner nested in depth plain <div>s"""
+    return f"<{tag}>" * depth + inner + f"</{tag}>" * depth
+
+
+def divs(*children):
+    return "".join(f"<div>{child}</div>" for child in children)
+
+
+def filler(count, label="filler"):
+    return "".join(f'<div class="{label}"></div>' for _ in range(count))
+
+
+def span(text, cls=""):
+    return f'<span class="{cls}">{text}</span>' if cls else f"<span>{text}</span>"
+
+
+# Static skeleton of body/div[10] (#app): the absolute XPaths in scraper.py
+# walk the side menu (div[2]) and the filter bar (div[4]); the grid is added
+# as a fifth child with the .search-grid-wrapper class.
+def app_skeleton():
+    menu_items = "".join(f"<li>{span(f'Voce {i}')}</li>" for i in range(1, 8))
+    menu_items += ("<li><div><a><div>" + span("Attività", "menu-activity") + "</div></a></div>"
+                   "<ul><li><div><a><div>" + span("Ricerca attività", "menu-search") + "</div></a></div></li></ul></li>")
+    side_menu = filler(2) + "<div><div><ul>" + menu_items + "</ul></div></div>"
+
+    type_options = divs(
+        wrap(span("Tutti", "type-option"), 1),
+        "<div>" + span("Interni", "type-option") + span("Esterni", "type-option") + "</div>",
+        wrap(span("Aperte", "type-option"), 1),
+        wrap(span("Chiuse", "type-option"), 1),
+        wrap(span("Sospese", "type-option"), 1),
+    )
+    type_filter = "<div>" + filler(1) + "<div>" + divs(
+        span("Tipo", "type-button"), filler(2) + "<div>" + type_options + "</div>") + "</div></div>"
+    activity_filter = "<div>" + filler(1) + "<div>" + divs(span("Attività", "act-button")) + "</div></div>"
+    presets = "".join(span(label, "date-option") for label in (
+        "Oggi", "Ieri", "Settimana corrente", "Settimana precedente", "Mese corrente", "Mese precedente",
+        "Anno corrente", "Anno precedente", "Personalizzato"))
+    date_panel = divs(presets) + '<input class="date-from"/><input class="date-to"/>'
+    date_filter = wrap(filler(1) + divs(span("Date", "date-button")) + "<div>" + date_panel + "</div>", 3)
+    filter_bar = ("<section><div><div>" + filler(2) + "<div><div><div>" + filler(1)
+                  + "<div>" + type_filter + "</div><div>" + activity_filter + "</div><div>" + date_filter + "</div>"
+                  + "</div></div></div></div></div></section>")
+
+    return ('<div id="app">' + filler(1) + "<div>" + side_menu + "</div>" + filler(1)
+            + "<div>" + filter_bar + "</div>"
+            + '<div class="search-grid-wrapper"><div class="grid-toolbar"></div>'
+            + wrap("<table><thead><tr>" + "".join(f"<th>{name}</th>" for name in GRID_HEADER)
+                   + "</tr></thead><tbody></tbody></table>", 4) + "</div></div>")
+
+
+APP_SCRIPT = '''
+const modalManager = document.getElementById("vj-modal-manager");
+const tbody = document.querySelector(".search-grid-wrapper table > tbody");
+let currentPage = 1;
+
+function cell(text) {
+    const td = document.createElement("td");
+    td.textContent = text;
+    return td;
+}
+
+function render(data) {
+    currentPage = data.page;
+    const fragment = document.createDocumentFragment();
+    data.rows.forEach(function (values) {
+        const tr = document.createElement("tr");
+        values.forEach(function (value, i) {
+            if (i === INCARICO_INDEX) {
+                const td = document.createElement("td");
+                td.innerHTML = '<div><div><span class="incarico-link"></span></div></div>';
+                td.querySelector("span").textContent = value;
+                tr.appendChild(td);
+            } else {
+                tr.appendChild(cell(value));
+            }
+        });
+        fragment.appendChild(tr);
+    });
+    const footer = document.createElement("tr");
+    footer.innerHTML = '<td colspan="' + COLUMN_COUNT + '"><div><div>Pagina ' + data.page + ' di ' + data.total_pages +
+        '</div><div><span class="grid-first">«</span><span class="grid-prev">‹</span>' +
+        '<span class="grid-next">›</span></div></div></td>';
+    fragment.appendChild(footer);
+    tbody.replaceChildren(fragment);
+}
+
+function loadPage(page) {
+    return fetch("/api/grid?page=" + page).then(function (r) { return r.json(); }).then(render);
+}
+
+function openModal(incarico) {
+    fetch("/api/incarico/" + encodeURIComponent(incarico)).then(function (r) { return r.json(); }).then(function (data) {
+        const body = document.createElement("div");
+        body.innerHTML = '<div></div><div></div><div></div>' +
+            '<div><div></div><div></div><div><div></div><div><div></div><div class="incarico-value"></div></div></div></div>' +
+            '<div></div><div><button class="button-input-white modal-close"><span>Chiudi</span></button></div>';
+        body.querySelector(".incarico-value").textContent = data.descrizione;
+        let shell = body;
+        for (let i = 0; i < 6; i++) {
+            const outer = document.createElement("div");
+            outer.appendChild(shell);
+            shell = outer;
+        }
+        modalManager.replaceChildren(shell);
+    });
+}
+
+document.addEventListener("click", function (event) {
+    const target = event.target;
+    if (target.closest(".grid-next") && currentPage < TOTAL_PAGES) {
+        loadPage(currentPage + 1);
+    } else if (target.closest(".grid-prev") && currentPage > 1) {
+        loadPage(currentPage - 1);
+    } else if (target.closest(".incarico-link")) {
+        openModal(target.closest(".incarico-link").textContent);
+    } else if (target.closest(".modal-close")) {
+        modalManager.replaceChildren();
+    }
+});
+
+loadPage(1);
+'''
+
+
+class MockPortal:
+    """Local stand-in for the activity portal, served from a background thread.
+
+    Reproduces the DOM the scraper drives: the login form, the activity
+    menu, the type/activity/date filter bar, a 50-row grid with the
+    'Pagina X di Y' footer and next arrow in row 51, and the incarico modal.
+    Grid pages and incarico details are loaded over fetch() after
+    latency_ms, so the condition waits see real XHR traffic. The incarico
+    details are also served as JSON for the HTTP detail fetcher, and the grid
+    accepts a page_size (capped at MAX_PAGE_SIZE) for the grid endpoint
+    mode. Every page also pulls images, a web font and a tag manager script,
+    each delayed by asset_latency_ms.
+    """
+
+    def __init__(self, rows=500, latency_ms=0, incarico_latency_ms=None, asset_latency_ms=100,
+                 email="bench@example.com", password="bench", host="127.0.0.1", port=0, seed=1):
+        self.rows = self.generate_rows(rows, seed)
+        self.total_pages = max(1, -(-len(self.rows) // PAGE_SIZE))
+        self.latency = latency_ms / 1000
+        self.incarico_latency = (latency_ms if incarico_latency_ms is None else incarico_latency_ms) / 1000
+        self.asset_latency = asset_latency_ms / 1000
+        self.asset_requests = 0
+        self.email = email
+        self.password = password
+        self.sessions = set()
+        self.requests = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self.make_handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @staticmethod
+    def generate_rows(count, seed=1):
+        rng = random.Random(seed)
+        start = datetime(2024, 1, 1, 8, 0)
+        rows = []
+        for i in range(count):
+            begin = start + timedelta(hours=i * 3 % 9000)
+            hours = rng.randint(1, 4)
+            values = {
+                "inizio": f"{begin:%d/%m/%Y %H:%M}",
+                "fine": f"{begin + timedelta(hours=hours):%d/%m/%Y %H:%M}",
+                "utente": rng.choice(USERS),
+                "tipo attivita": rng.choice(ACTIVITY_TYPES),
+                "durata": f"{hours}:00",
+                "tempo fatturabile": f"{hours}:{rng.choice(('00', '30'))}",
+                "stato fatturazione": rng.choice(BILLING_STATES),
+                "contatto": f"Cliente {rng.randint(1, 200)}",
+                "commessa": f"C-{rng.randint(1000, 9999)}",
+                "referente": rng.choice(USERS),
+                "indirizzo": f"Via Roma {rng.randint(1, 300)}, Milano",
+                "etichetta": rng.choice(("", "urgente", "garanzia")),
+                "completata": rng.choice(("check_box", "check_box_outline_blank")),
+                "approvata": rng.choice(("check_box", "check_box_outline_blank")),
+                "note in report": rng.choice(("", "Nessuna anomalia", "Da ricontrollare")),
+                "Note interne": "",
+                "incarico": f"INC-{i + 1:06d}",
+                "rapportino": f"R-{i + 1:06d}",
+                "Email contatto": f"cliente{rng.randint(1, 200)}@example.com",
+                "rapportino inviato il": f"{begin + timedelta(days=1):%d/%m/%Y}",
+            }
+            for name in GRID_HEADER:
+                if name not in values:
+                    values[name] = f"{rng.randint(0, 99999) / 100:.2f}".replace(".", ",") + " €" \
+                        if name.startswith("importo") else ""
+            rows.append([values[name] for name in GRID_HEADER])
+        return rows
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def login_url(self):
+        return self.base_url + "/login"
+
+    @property
+    def target_url(self):
+        return self.base_url + TARGET_PATH
+
+    @property
+    def incarico_endpoint(self):
+        return self.base_url + "/api/incarico/{incarico}"
+
+    @property
+    def grid_endpoint(self):
+        return self.base_url + "/api/grid?page={page}&page_size={page_size}&from={start}&to={end}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def grid_page(self, page, page_size=PAGE_SIZE):
+        page_size = min(max(1, page_size), MAX_PAGE_SIZE)
+        total_pages = max(1, -(-len(self.rows) // page_size))
+        page = min(max(1, page), total_pages)
+        rows = self.rows[(page - 1) * page_size:page * page_size]
+        return {"page": page, "total_pages": total_pages, "total": len(self.rows), "rows": rows}
+
+    def app_page(self):
+        script = (APP_SCRIPT.replace("INCARICO_INDEX", str(GRID_HEADER.index("incarico")))
+                  .replace("COLUMN_COUNT", str(len(GRID_HEADER)))
+                  .replace("TOTAL_PAGES", str(self.total_pages)))
+        return page_html("Attività", f'<div class="filler">{ASSET_HTML}</div>' + filler(4)
+                         + '<div id="vj-modal-manager"></div>' + filler(3)
+                         + app_skeleton(), script)
+
+    def make_handler(self):
+        portal = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def session(self):
+                cookie = SimpleCookie(self.headers.get("Cookie", ""))
+                token = cookie[SESSION_COOKIE].value if SESSION_COOKIE in cookie else None
+                return token if token in portal.sessions else None
+
+            def send(self, status, body, content_type="text/html; charset=utf-8", headers=()):
+                data = body if isinstance(body, bytes) else body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def redirect(self, location, headers=()):
+                self.send(303, "", headers=[("Location", location), *headers])
+
+            def do_GET(self):
+                with portal.lock:
+                    portal.requests += 1
+                url = urlparse(self.path)
+                if url.path.startswith("/static/"):
+                    with portal.lock:
+                        portal.asset_requests += 1
+                    time.sleep(portal.asset_latency)
+                    content_type = ASSET_TYPES.get("." + url.path.rsplit(".", 1)[-1], "application/octet-stream")
+                    body = b"window.dataLayer = [];" if content_type.endswith("javascript") else bytes(ASSET_SIZE)
+                    return self.send(200, body, content_type, [("Cache-Control", "no-store")])
+                if url.path in ("/", "/login"):
+                    return self.send(200, LOGIN_PAGE)
+                if not self.session():
+                    if url.path.startswith("/api/"):
+                        return self.send(401, json.dumps({"error": "unauthorized"}), "application/json")
+                    return self.redirect("/login")
+                if url.path == "/dashboard":
+                    return self.send(200, DASHBOARD_PAGE)
+                if url.path == TARGET_PATH:
+                    return self.send(200, portal.app_page())
+                if url.path == "/api/grid":
+                    time.sleep(portal.latency)
+                    query = parse_qs(url.query)
+                    page = int(query.get("page", ["1"])[0])
+                    page_size = int(query.get("page_size", [str(PAGE_SIZE)])[0])
+                    return self.send(200, json.dumps(portal.grid_page(page, page_size)), "application/json")
+                if url.path.startswith("/api/incarico/"):
+                    time.sleep(portal.incarico_latency)
+                    incarico = url.path.rsplit("/", 1)[-1]
+                    return self.send(200, json.dumps({"incarico": incarico, "descrizione": f"Incarico {incarico}"}),
+                                     "application/json")
+                if url.path == "/logout":
+                    return self.redirect("/login", [("Set-Cookie", f"{SESSION_COOKIE}=; Path=/; Max-Age=0")])
+                self.send(404, "Not found", "text/plain")
+
+            def do_POST(self):
+                if urlparse(self.path).path != "/login":
+                    return self.send(404, "Not found", "text/plain")
+                length = int(self.headers.get("Content-Length") or 0)
+                form = parse_qs(self.rfile.read(length).decode("utf-8"))
+                if (form.get("email", [""])[0] != portal.email
+                        or form.get("password", [""])[0] != portal.password):
+                    return self.send(200, LOGIN_PAGE.replace("<!--error-->", "<p>Credenziali non valide</p>"))
+                token = secrets.token_hex(16)
+                portal.sessions.add(token)
+                self.redirect("/dashboard", [("Set-Cookie", f"{SESSION_COOKIE}={token}; Path=/")])
+
+        return Handler
+
+
+def page_html(title, body, script=""):
+    script = f"<script>{script}</script>" if script else ""
+    return f"<!DOCTYPE html><html><head><meta charset=\"utf-8\"/><title>{title}</title></head><body>{body}{script}</body></html>"
+
+
+LOGIN_PAGE = page_html("Login", ASSET_HTML + '''
+<a href="/login">Torna a login</a>
+<!--error-->
+<form method="post" action="/login">
+    <input id="email" name="email" type="text"/>
+    <input id="password" name="password" type="password"/>
+    <button id="btn-login" type="submit">Accedi</button>
+</form>
+''')
+
+DASHBOARD_PAGE = page_html("Dashboard", ASSET_HTML + '''
+<h1>Dashboard</h1>
+<a href="/logout">Esci</a>
+''')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the mock activity portal.")
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--latency-ms", type=int, default=0)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args(argv)
+
+    portal = MockPortal(rows=args.rows, latency_ms=args.latency_ms, port=args.port)
+    print(f"Mock portal on {portal.base_url} ({len(portal.rows)} rows, {portal.total_pages} pages)")
+    print(f"  login:  {portal.login_url}  ({portal.email} / {portal.password})")
+    print(f"  target: {portal.target_url}")
+    portal.server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
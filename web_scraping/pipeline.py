@@ -0,0 +1,70 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+_DONE = object()
+
+
+class PagePipeline:
+    """Ordered producer/consumer pipeline between the browser and the Python side of a scrape.
+
+    The browser thread put()s each page's raw payload and moves on to the
+    next page. A pool of workers runs process(page, payload) concurrently and
+    a single writer thread hands the results to write(page, result) strictly
+    in the order the pages were put. At most depth pages wait between the
+    browser and the writer: put() blocks while the writer is behind, which
+    keeps memory bounded however fast the browser pages.
+
+    With workers=0 both stages run inline in put(), one page at a time.
+    An exception in a stage stops the pipeline and is raised from the next
+    put() or from close().
+    """
+
+    def __init__(self, process, write, workers=2, depth=4, name="pages"):
+        self.process = process
+        self.write = write
+        self.workers = max(0, int(workers))
+        self.depth = max(1, int(depth))
+        self.error = None
+        self.closed = False
+        self.pool = None
+        self.writer = None
+        if self.workers:
+            self.pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=f"{name}-worker")
+            self.ordered = queue.Queue(maxsize=self.depth)
+            self.writer = threading.Thread(target=self._write_loop, name=f"{name}-writer", daemon=True)
+            self.writer.start()
+
+    def _write_loop(self):
+        while True:
+            item = self.ordered.get()
+            if item is _DONE:
+                return
+            if self.error is not None:
+                continue  # keep draining so put() never blocks on a dead pipeline
+            page, future = item
+            try:
+                self.write(page, future.result())
+            except Exception as e:
+                self.error = e
+
+    def put(self, page, payload):
+        """Queue one page; blocks while depth pages are waiting for the writer"""
+        if self.error is not None:
+            raise self.error
+        if not self.workers:
+            self.write(page, self.process(page, payload))
+            return
+        self.ordered.put((page, self.pool.submit(self.process, page, payload)))
+
+    def close(self):
+        """Wait until every queued page is written; raises the first stage error"""
+        if not self.closed:
+            self.closed = True
+            if self.workers:
+                self.ordered.put(_DONE)
+                self.writer.join()
+                self.pool.shutdown()
+        if self.error is not None:
+            raise self.error
@@ -0,0 +1,164 @@
+import json
+import os
+import threading
+import time
+from collections import Counter
+
+
+DEFAULT_RETRY_DIR = os.path.join(os.path.expanduser("~"), ".cache", "web_scraping", "retries")
+
+# End-of-run retry passes and the delay before the first one (doubled each pass)
+RETRY_ATTEMPTS = 3
+RETRY_BACKOFF_SECONDS = 2.0
+
+# incarico: one incarico value that could not be extracted; table: one grid
+# table that failed as a whole; page: a page that was never collected
+UNIT_KINDS = ("incarico", "table", "page")
+
+
+def incarico_count(df):
+    """Rows of a frame that hold an incarico_extracted value"""
+    if df.empty or "incarico_extracted" not in df.columns:
+        return 0
+    values = df["incarico_extracted"]
+    return int((values.notna() & values.astype(str).str.strip().ne("")).sum())
+
+
+class RetryQueue:
+    """Failed units of one run, kept until a later retry resolves them.
+
+    Every unit records its page, table and row index, the incarico value,
+    the row's cells, the last error and how often it failed. With a key the
+    queue is saved to retry_dir/<key>.json (and removed once empty) so a
+    follow-up run can re-fetch just those units; without one it only lives
+    for the run.
+
+    Incarico values recovered by a retry are kept as patches and filled
+    into the stored pages when the export is rebuilt (see patch_frame).
+    """
+
+    def __init__(self, key=None, meta=None, retry_dir=DEFAULT_RETRY_DIR, reset=False, log=print):
+        self.key = key
+        self.path = os.path.join(retry_dir, f"{key}.json") if key else None
+        self.log = log
+        self.lock = threading.Lock()
+        data = None if reset or not self.path else self._read()
+        data = data or {}
+        self.meta = {**data.get("meta", {}), **(meta or {})}
+        self.units = {self.unit_key(unit): unit for unit in data.get("units", [])}
+        self.patches = dict(data.get("patches", {}))
+
+    def _read(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def unit_key(unit):
+        return unit["kind"], unit["page"], unit.get("table"), unit.get("row")
+
+    def __len__(self):
+        return len(self.units)
+
+    def add(self, kind, page, error, table=None, row=None, incarico=None, cells=None):
+        """Record (or count another failure of) one unit"""
+        unit = {"kind": kind, "page": page, "table": table, "row": row, "incarico": incarico,
+                "cells": list(cells) if cells is not None else None, "error": str(error), "attempts": 1,
+                "failed_at": time.time()}
+        with self.lock:
+            previous = self.units.get(self.unit_key(unit))
+            if previous:
+                unit["attempts"] = previous["attempts"] + 1
+            self.units[self.unit_key(unit)] = unit
+
+    def add_pages(self, pages, error):
+        for page in pages:
+            self.add("page", page, error)
+
+    def incarico_units(self):
+        with self.lock:
+            return [unit for unit in self.units.values() if unit["kind"] == "incarico" and unit["incarico"]]
+
+    def pages(self):
+        """Pages holding at least one unit, in order"""
+        with self.lock:
+            return sorted({unit["page"] for unit in self.units.values()})
+
+    def clear_page(self, page):
+        """Drop every unit of a page that is about to be collected again"""
+        with self.lock:
+            self.units = {key: unit for key, unit in self.units.items() if unit["page"] != page}
+
+    def resolve_incarico(self, values):
+        """Remove the incarico units whose value was recovered; returns (unit, extracted) pairs"""
+        resolved = []
+        with self.lock:
+            for key, unit in list(self.units.items()):
+                if unit["kind"] == "incarico" and values.get(unit["incarico"]):
+                    extracted = values[unit["incarico"]]
+                    self.patches[unit["incarico"]] = extracted
+                    resolved.append((unit, extracted))
+                    del self.units[key]
+        return resolved
+
+    def patch_frame(self, df):
+        """Fill incarico_extracted from the patches where it is still empty"""
+        if not self.patches or df.empty or "incarico" not in df.columns:
+            return df
+        missing = df["incarico_extracted"].isna() & df["incarico"].astype(str).str.strip().isin(self.patches)
+        if missing.any():
+            df = df.copy()
+            df.loc[missing, "incarico_extracted"] = df.loc[missing, "incarico"].astype(str).str.strip().map(
+                self.patches)
+        return df
+
+    def counts(self):
+        with self.lock:
+            return Counter(unit["kind"] for unit in self.units.values())
+
+    def completeness(self, total_pages, rows, rows_with_incarico):
+        """How much of the range the export holds.
+
+        rows is the exported row count and rows_with_incarico how many of
+        them hold an incarico value (see incarico_count); rows the portal
+        lists without an incarico do not count as covered.
+        """
+        counts = self.counts()
+        with self.lock:
+            failed_pages = len({unit["page"] for unit in self.units.values() if unit["kind"] != "incarico"})
+        total_pages = total_pages or 0
+        pages_complete = max(0, total_pages - failed_pages)
+        return {
+            "pages": total_pages,
+            "pages_complete": pages_complete,
+            "pages_percent": round(100.0 * pages_complete / total_pages, 1) if total_pages else 100.0,
+            "rows": rows,
+            "rows_with_incarico": rows_with_incarico,
+            "incarico_percent": round(100.0 * rows_with_incarico / rows, 1) if rows else 100.0,
+            "unresolved": {kind: counts[kind] for kind in UNIT_KINDS if counts[kind]},
+        }
+
+    def save(self):
+        """Write the queue, or remove its file when nothing is left to retry or patch"""
+        if not self.path:
+            return
+        if not self.units and not self.patches:
+            self.discard()
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self.lock:
+            data = {"meta": self.meta, "saved_at": time.time(), "patches": self.patches,
+                    "units": sorted(self.units.values(), key=lambda unit: (unit["page"], unit["table"] or 0,
+                                                                          unit["row"] or 0, unit["kind"]))}
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, default=str)
+        os.replace(tmp_path, self.path)
+        if self.units:
+            self.log(f"⚠ {len(self.units)} failed unit(s) saved for a retry run: {self.path}")
+
+    def discard(self):
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
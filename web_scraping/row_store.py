@@ -0,0 +1,186 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from extraction import is_pagination_row
+from schema import DATETIME_FORMATS, IDENTITY_COLUMNS
+
+
+DEFAULT_STORE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "web_scraping", "rows.sqlite")
+
+
+def parse_inizio(value):
+    """Parse the grid's 'inizio' text into an ISO timestamp, or None"""
+    value = (value or "").strip()
+    for fmt in DATETIME_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).isoformat(sep=" ")
+        except ValueError:
+            continue
+    return None
+
+
+def scope_for(email, target_url, header=()):
+    """Rows are stored per account, target page and stored column layout"""
+    raw = f"{email.strip().lower()}|{target_url.strip()}"
+    if header:
+        raw += "|" + "|".join(header)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+class RowStore:
+    """Local SQLite store of extracted grid rows for incremental syncs.
+
+    Rows are identified by (inizio, fine, utente, commessa, rapportino) and
+    carry a hash of all fetched grid values, so a re-scraped row is classified as
+    new, changed or unchanged. The stored incarico_extracted is reused for
+    unchanged rows. Safe to share between the threads of a pipelined run.
+
+    Rows are exported and pruned by their inizio; rows whose inizio does not
+    parse are filed under fallback_start (the start of the synced range) so
+    they stay in the range the portal listed them in.
+    """
+
+    def __init__(self, header, scope, path=DEFAULT_STORE_PATH, log=print, fallback_start=None):
+        self.header = list(header)
+        self.scope = scope
+        self.fallback_ts = datetime.combine(fallback_start, datetime.min.time()).isoformat(sep=" ") \
+            if fallback_start else None
+        self.path = path
+        self.log = log
+        self.identity_idx = [self.header.index(name) for name in IDENTITY_COLUMNS]
+        self.counts = {"new": 0, "changed": 0, "unchanged": 0}
+        self.seen_keys = set()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS activity_rows (
+                scope TEXT NOT NULL,
+                row_key TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                inizio_ts TEXT,
+                data TEXT NOT NULL,
+                incarico_extracted TEXT,
+                first_seen REAL NOT NULL,
+                last_seen REAL NOT NULL,
+                PRIMARY KEY (scope, row_key)
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_rows_scope_inizio ON activity_rows(scope, inizio_ts)")
+        self.conn.commit()
+
+    def row_key(self, row):
+        return json.dumps([row[i] for i in self.identity_idx], ensure_ascii=False)
+
+    @staticmethod
+    def content_hash(row):
+        return hashlib.sha1(json.dumps(row, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+    def classify(self, rows):
+        """Return one (status, stored_incarico) per row.
+
+        status is 'new', 'changed', 'unchanged' or 'footer' for the grid's
+        pagination row, which is never stored.
+        """
+        keys = [None if is_pagination_row(row) else self.row_key(row) for row in rows]
+        wanted = [key for key in keys if key is not None]
+        stored = {}
+        with self.lock:
+            for start in range(0, len(wanted), 500):
+                chunk = wanted[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                for row_key, content_hash, incarico in self.conn.execute(
+                        f"SELECT row_key, content_hash, incarico_extracted FROM activity_rows "
+                        f"WHERE scope = ? AND row_key IN ({placeholders})", (self.scope, *chunk)):
+                    stored[row_key] = (content_hash, incarico)
+
+            result = []
+            for row, key in zip(rows, keys):
+                if key is None:
+                    result.append(("footer", None))
+                    continue
+                self.seen_keys.add(key)
+                if key not in stored:
+                    status, incarico = "new", None
+                elif stored[key][0] != self.content_hash(row):
+                    status, incarico = "changed", None
+                else:
+                    status, incarico = "unchanged", stored[key][1]
+                self.counts[status] += 1
+                result.append((status, incarico))
+        return result
+
+    def upsert(self, rows, incarico_values):
+        """Insert or update rows together with their incarico_extracted values"""
+        now = time.time()
+        records = []
+        unparsed = 0
+        for row, incarico in zip(rows, incarico_values):
+            if is_pagination_row(row):
+                continue
+            incarico = None if incarico is None or pd.isna(incarico) else str(incarico)
+            inizio_ts = parse_inizio(row[0])
+            if inizio_ts is None:
+                unparsed += 1
+                inizio_ts = self.fallback_ts
+            records.append((self.scope, self.row_key(row), self.content_hash(row), inizio_ts,
+                            json.dumps(row, ensure_ascii=False), incarico, now, now))
+        if unparsed:
+            where = f"filed under {self.fallback_ts[:10]}" if self.fallback_ts else "left out of range exports"
+            self.log(f"⚠ {unparsed} row(s) with an unreadable inizio {where}")
+        with self.lock:
+            self.conn.executemany("""
+                INSERT INTO activity_rows VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(scope, row_key) DO UPDATE SET
+                    content_hash = excluded.content_hash,
+                    inizio_ts = excluded.inizio_ts,
+                    data = excluded.data,
+                    incarico_extracted = excluded.incarico_extracted,
+                    last_seen = excluded.last_seen
+            """, records)
+            self.conn.commit()
+
+    @staticmethod
+    def _bounds(start, end):
+        return start.isoformat(), (end + timedelta(days=1)).isoformat()
+
+    def prune_range(self, start, end):
+        """Delete rows in [start, end] that were not seen during this sync (removed on the portal)"""
+        low, high = self._bounds(start, end)
+        with self.lock:
+            stale = [key for (key,) in self.conn.execute(
+                "SELECT row_key FROM activity_rows WHERE scope = ? AND inizio_ts >= ? AND inizio_ts < ?",
+                (self.scope, low, high)) if key not in self.seen_keys]
+            self.conn.executemany("DELETE FROM activity_rows WHERE scope = ? AND row_key = ?",
+                                  [(self.scope, key) for key in stale])
+            self.conn.commit()
+        return len(stale)
+
+    def load_range(self, start, end):
+        """Stored rows whose inizio falls in [start, end], newest first like the portal grid"""
+        low, high = self._bounds(start, end)
+        with self.lock:
+            records = self.conn.execute(
+                "SELECT data, incarico_extracted FROM activity_rows "
+                "WHERE scope = ? AND inizio_ts >= ? AND inizio_ts < ? "
+                "ORDER BY inizio_ts DESC, first_seen, row_key",
+                (self.scope, low, high)).fetchall()
+        df = pd.DataFrame([json.loads(data) for data, _ in records], columns=self.header)
+        df["incarico_extracted"] = [incarico for _, incarico in records]
+        return df
+
+    def stats_message(self):
+        return (f"Row store: {self.counts['new']} new, {self.counts['changed']} changed, "
+                f"{self.counts['unchanged']} unchanged row(s)")
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
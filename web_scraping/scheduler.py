@@ -0,0 +1,323 @@
+import argparse
+import json
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from datetime import datetime
+from urllib.parse import urlparse
+
+from date_ranges import parse_date, resolve_range
+
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_CONFIG = 2
+EXIT_INTERRUPTED = 130
+
+# Scraper settings a job (or the config's "defaults") may set
+JOB_OPTIONS = ("cache_mode", "incarico_endpoint", "incarico_field", "incarico_concurrency", "grid_endpoint",
+               "grid_concurrency", "partition_by", "report_path", "pipeline_workers", "pipeline_depth",
+               "incremental", "resume", "retry_failed", "instrument", "lean_profile")
+
+Job = namedtuple("Job", ["name", "account", "target_url", "output", "date_range", "settings"])
+
+
+class HostRateLimiter:
+    """Spaces requests to each host evenly, shared by every worker.
+
+    rates maps host -> requests per minute; "default" applies to hosts
+    without an entry. A rate of 0 (or no entry and no default) means
+    unlimited.
+    """
+
+    def __init__(self, rates=None):
+        self.rates = dict(rates or {})
+        self.next_slot = {}
+        self.lock = threading.Lock()
+
+    def interval(self, host):
+        rate = self.rates.get(host, self.rates.get("default", 0))
+        return 60.0 / rate if rate else 0.0
+
+    def acquire(self, url):
+        """Block until the next request slot for url's host"""
+        host = urlparse(url).netloc
+        interval = self.interval(host)
+        if not interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot.get(host, now))
+            self.next_slot[host] = slot + interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def account_credentials(account, base_dir="."):
+    """(email, password) of one account entry: inline, from env vars or from a JSON file"""
+    email, password = account.get("email", ""), account.get("password", "")
+    if account.get("credentials_file"):
+        with open(os.path.join(base_dir, account["credentials_file"]), encoding="utf-8") as f:
+            data = json.load(f)
+        email, password = data.get("email", email), data.get("password", password)
+    if account.get("email_env"):
+        email = os.environ.get(account["email_env"], email)
+    if account.get("password_env"):
+        password = os.environ.get(account["password_env"], password)
+    if not email or not password:
+        raise ValueError("missing email or password")
+    return email.strip(), password.strip()
+
+
+def load_config(path):
+    """Parse a jobs file into (jobs, credentials by account, scheduler options)"""
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+    base_dir = os.path.dirname(os.path.abspath(path))
+
+    credentials = {}
+    for name, account in (config.get("accounts") or {}).items():
+        try:
+            credentials[name] = account_credentials(account, base_dir)
+        except (OSError, ValueError) as e:
+            raise ValueError(f"account {name!r}: {e}")
+
+    defaults = config.get("defaults") or {}
+    jobs = []
+    for index, entry in enumerate(config.get("jobs") or [], start=1):
+        entry = {**defaults, **entry}
+        name = entry.get("name") or f"job-{index}"
+        if entry.get("account") not in credentials:
+            raise ValueError(f"job {name!r}: unknown account {entry.get('account')!r}")
+        if not entry.get("target_url") or not entry.get("output"):
+            raise ValueError(f"job {name!r}: target_url and output are required")
+        options = entry.get("options") or {}
+        unknown = set(options) - set(JOB_OPTIONS)
+        if unknown:
+            raise ValueError(f"job {name!r}: unknown option(s) {', '.join(sorted(unknown))}")
+        try:
+            date_range_index, custom_range, date_range = resolve_range(
+                entry.get("range"),
+                parse_date(entry["start"]) if entry.get("start") else None,
+                parse_date(entry["end"]) if entry.get("end") else None)
+        except ValueError as e:
+            raise ValueError(f"job {name!r}: {e}")
+
+        settings = {"date_range_index": date_range_index, "custom_range": custom_range,
+                    **{key: value for key, value in defaults.get("options", {}).items() if key in JOB_OPTIONS},
+                    **options}
+        # Paths are relative to the config file, like output and summary
+        if settings.get("report_path"):
+            settings["report_path"] = os.path.join(base_dir, settings["report_path"])
+        jobs.append(Job(name, entry["account"], entry["target_url"], os.path.join(base_dir, entry["output"]),
+                        date_range, settings))
+    if not jobs:
+        raise ValueError("no jobs in the config")
+
+    options = {
+        "workers": int(config.get("workers", 2)),
+        "retries": int(config.get("retries", 2)),
+        "backoff_seconds": float(config.get("backoff_seconds", 30)),
+        "rate_limits": config.get("rate_limits") or {},
+        "summary": os.path.join(base_dir, config["summary"]) if config.get("summary") else None,
+    }
+    return jobs, credentials, options
+
+
+class JobScheduler:
+    """Run export jobs on a bounded pool of browser workers.
+
+    Jobs are grouped by account and every group is handled by one worker
+    with a single keep_alive scraper, so an account logs in once and its
+    jobs run back to back in the warm browser; up to workers accounts run
+    in parallel. Options a job does not set are reset to the scraper
+    defaults, never carried over from the account's previous job. Every
+    portal request goes through a shared per-host rate limiter. A failed
+    job is retried with exponential backoff, resuming from its run journal.
+    """
+
+    def __init__(self, jobs, credentials, workers=2, retries=2, backoff_seconds=30, rate_limits=None,
+                 log=print, cancel_event=None):
+        self.jobs = list(jobs)
+        self.credentials = credentials
+        self.workers = max(1, int(workers))
+        self.retries = max(0, int(retries))
+        self.backoff_seconds = backoff_seconds
+        self.limiter = HostRateLimiter(rate_limits)
+        self.log = log
+        self.cancel_event = cancel_event or threading.Event()
+        self.results = {}
+        self.interrupted = False
+        self.lock = threading.Lock()
+
+    def run(self):
+        """Run every job; returns one result dict per job, in config order"""
+        groups = OrderedDict()
+        for job in self.jobs:
+            groups.setdefault(job.account, []).append(job)
+        work = queue.Queue()
+        for group in groups.values():
+            work.put(group)
+
+        workers = min(self.workers, len(groups))
+        self.log(f"Running {len(self.jobs)} job(s) for {len(groups)} account(s) on {workers} worker(s)")
+        threads = [threading.Thread(target=self.worker, args=(work,), name=f"worker-{i + 1}", daemon=True)
+                   for i in range(workers)]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(0.5)
+        except KeyboardInterrupt:
+            self.interrupted = True
+            self.log("⚠ Interrupted - stopping every running job after its current page")
+            self.cancel_event.set()
+            for thread in threads:
+                thread.join()
+        return [self.results[job.name] for job in self.jobs if job.name in self.results]
+
+    def worker(self, work):
+        while True:
+            try:
+                jobs = work.get_nowait()
+            except queue.Empty:
+                return
+            scraper = None
+            try:
+                for job in jobs:
+                    scraper = self.run_job(job, scraper)
+            finally:
+                if scraper:
+                    scraper.cleanup()
+
+    def record(self, job, status, started, attempts, rows=0, error=None, completeness=None):
+        result = {
+            "name": job.name,
+            "account": job.account,
+            "target_url": job.target_url,
+            "output": job.output,
+            "date_range": [job.date_range[0].isoformat(), job.date_range[1].isoformat()],
+            "status": status,
+            "attempts": attempts,
+            "seconds": round(time.monotonic() - started, 1),
+            "rows": rows,
+            "completeness": completeness,
+            "error": error,
+        }
+        with self.lock:
+            self.results[job.name] = result
+        return result
+
+    def run_job(self, job, scraper):
+        """Run one job with retries on the account's scraper; returns the scraper to reuse"""
+        from engine import create_scraper, scraper_defaults
+
+        def log(message):
+            self.log(f"[{job.name}] {message}")
+
+        started = time.monotonic()
+        if self.cancel_event.is_set():
+            self.record(job, "cancelled", started, 0)
+            return scraper
+
+        email, password = self.credentials[job.account]
+        # The account's scraper keeps the previous job's settings: reset every job option first
+        defaults = scraper_defaults(JOB_OPTIONS)
+        error = None
+        for attempt in range(1, self.retries + 2):
+            if scraper is None:
+                scraper = create_scraper(log=log, keep_alive=True, cancel_event=self.cancel_event)
+            scraper.log = log
+            settings = {**defaults, **job.settings}
+            # Retries continue from the pages journaled by the failed attempt
+            settings["resume"] = settings.get("resume", False) or attempt > 1
+            scraper.configure(throttle=lambda: self.limiter.acquire(job.target_url), **settings)
+            try:
+                ok = scraper.run(email, password, job.target_url, job.output)
+                error = None if ok else (scraper.last_error or "Automation failed")
+            except Exception as e:
+                ok, error = False, f"Automation failed: {e}"
+
+            if ok:
+                status = "cancelled" if scraper.cancelled else "ok"
+                result = self.record(job, status, started, attempt, scraper.rows_exported,
+                                     completeness=scraper.completeness)
+                self.log(f"✓ [{job.name}] {status} - {result['rows']} rows in {result['seconds']:.0f}s")
+                return scraper
+            if attempt > self.retries or self.cancel_event.is_set():
+                break
+            delay = self.backoff_seconds * 2 ** (attempt - 1) * random.uniform(0.8, 1.2)
+            log(f"⚠ Attempt {attempt} failed ({error}); retrying in {delay:.0f}s")
+            if self.cancel_event.wait(delay):
+                break
+
+        result = self.record(job, "cancelled" if self.cancel_event.is_set() else "failed", started, attempt,
+                             error=error)
+        self.log(f"⚠ [{job.name}] {result['status']} after {attempt} attempt(s): {error}")
+        return scraper
+
+
+def format_summary(results):
+    lines = [f"{'job':<24} {'status':<10} {'tries':>5} {'rows':>7} {'seconds':>8}  output"]
+    for result in results:
+        lines.append(f"{result['name'][:24]:<24} {result['status']:<10} {result['attempts']:>5} "
+                     f"{result['rows']:>7} {result['seconds']:>8.0f}  {result['output']}")
+    return "\n".join(lines)
+
+
+def write_summary(path, results):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"finished_at": datetime.now().isoformat(timespec="seconds"), "jobs": results}, f, indent=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the export jobs listed in a JSON config file.")
+    parser.add_argument("config", help="jobs file (accounts, jobs, workers, rate_limits, retries)")
+    parser.add_argument("--workers", type=int, help="override the number of browser workers")
+    parser.add_argument("--summary", help="where to write the JSON job summary")
+    parser.add_argument("--dry-run", action="store_true", help="validate the config and list the jobs")
+    args = parser.parse_args(argv)
+
+    try:
+        jobs, credentials, options = load_config(args.config)
+    except (OSError, ValueError) as e:
+        print(f"Invalid jobs config: {e}", file=sys.stderr)
+        return EXIT_CONFIG
+    if args.workers:
+        options["workers"] = args.workers
+
+    if args.dry_run:
+        for job in jobs:
+            print(f"{job.name}: {job.account} {job.target_url} "
+                  f"{job.date_range[0]:%d/%m/%Y}-{job.date_range[1]:%d/%m/%Y} -> {job.output}")
+        return EXIT_OK
+
+    print_lock = threading.Lock()
+
+    def log(message):
+        with print_lock:
+            print(f"[{datetime.now():%H:%M:%S}] {message}", file=sys.stderr, flush=True)
+
+    scheduler = JobScheduler(jobs, credentials, workers=options["workers"], retries=options["retries"],
+                             backoff_seconds=options["backoff_seconds"], rate_limits=options["rate_limits"],
+                             log=log)
+    results = scheduler.run()
+
+    print(format_summary(results))
+    summary_path = args.summary or options["summary"]
+    if summary_path:
+        write_summary(summary_path, results)
+        print(f"Summary written to {summary_path}")
+    if scheduler.interrupted:
+        return EXIT_INTERRUPTED
+    return EXIT_OK if results and all(result["status"] == "ok" for result in results) else EXIT_FAILED
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+from collections import namedtuple
+
+import pandas as pd
+
+from extraction import PAGINATION_RE
+
+
+# One entry per column of the portal's activity grid, in grid order.
+# fetch: read from the page at all; keep: written to the export. Columns
+# that are fetched but not kept are only needed while scraping (incarico
+# drives the incarico lookup, rapportino is part of the row identity used
+# by the incremental row store).
+ColumnSpec = namedtuple("ColumnSpec", ["name", "dtype", "fetch", "keep"])
+
+COLUMN_SCHEMA = [
+    ColumnSpec("inizio", "datetime", True, True),
+    ColumnSpec("fine", "datetime", True, True),
+    ColumnSpec("utente", "category", True, True),
+    ColumnSpec("tipo attivita", "category", True, True),
+    ColumnSpec("durata", "timedelta", True, True),
+    ColumnSpec("tempo fatturabile", "timedelta", True, True),
+    ColumnSpec("importo attivita", "decimal", False, False),
+    ColumnSpec("importo aggiuntivo", "decimal", False, False),
+    ColumnSpec("importo di viaggio", "decimal", False, False),
+    ColumnSpec("importo altri elementi", "decimal", False, False),
+    ColumnSpec("importo articoli", "decimal", False, False),
+    ColumnSpec("importo totale", "decimal", False, False),
+    ColumnSpec("stato fatturazione", "category", True, True),
+    ColumnSpec("contatto", "string", True, True),
+    ColumnSpec("commessa", "string", True, True),
+    ColumnSpec("referente", "string", True, True),
+    ColumnSpec("indirizzo", "string", False, False),
+    ColumnSpec("etichetta", "string", True, True),
+    ColumnSpec("completata", "bool", True, True),
+    ColumnSpec("approvata", "bool", True, True),
+    ColumnSpec("note in report", "string", True, True),
+    ColumnSpec("Note interne", "string", True, True),
+    ColumnSpec("incarico", "string", True, False),
+    ColumnSpec("rapportino", "string", True, False),
+    ColumnSpec("importo spese", "decimal", False, False),
+    ColumnSpec("Email contatto", "string", True, True),
+    ColumnSpec("telefono contatto", "string", False, False),
+    ColumnSpec("FAX contatto", "string", False, False),
+    ColumnSpec("Email referente", "string", False, False),
+    ColumnSpec("telefono referente", "string", False, False),
+    ColumnSpec("cellulare referente", "string", False, False),
+    ColumnSpec("fax referente", "string", False, False),
+    ColumnSpec("rapportino inviato il", "datetime", False, False),
+]
+
+GRID_HEADER = [spec.name for spec in COLUMN_SCHEMA]
+FETCH_INDEXES = [i for i, spec in enumerate(COLUMN_SCHEMA) if spec.fetch]
+FETCH_COLUMNS = [GRID_HEADER[i] for i in FETCH_INDEXES]
+EXPORT_COLUMNS = [spec.name for spec in COLUMN_SCHEMA if spec.keep] + ["incarico_extracted"]
+# What makes two grid rows the same activity (the row store's key and the
+# cross-shard dedupe)
+IDENTITY_COLUMNS = ["inizio", "fine", "utente", "commessa", "rapportino"]
+COLUMN_DTYPES = {spec.name: spec.dtype for spec in COLUMN_SCHEMA}
+
+DATETIME_FORMATS = ("%d/%m/%Y %H:%M", "%d/%m/%Y %H:%M:%S", "%d/%m/%Y", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d")
+CHECKBOX_CHECKED = "check_box"
+CHECKBOX_UNCHECKED = "check_box_outline_blank"
+
+
+def parse_datetimes(values):
+    """Vectorized parse trying each known grid format in turn; unparsable values become NaT"""
+    values = values.astype("string").str.strip()
+    parsed = pd.Series(pd.NaT, index=values.index, dtype="datetime64[ns]")
+    for fmt in DATETIME_FORMATS:
+        missing = parsed.isna() & values.notna() & values.ne("")
+        if not missing.any():
+            break
+        parsed[missing] = pd.to_datetime(values[missing], format=fmt, errors="coerce")
+    return parsed
+
+
+def parse_timedeltas(values):
+    """'H:MM' / 'H:MM:SS' durations (or pandas-style '1h 30m') to timedelta"""
+    values = values.astype("string").str.strip()
+    values = values.str.replace(r"^(\d+):(\d{2})$", r"\1:\2:00", regex=True)
+    return pd.to_timedelta(values.fillna(""), errors="coerce")
+
+
+def parse_decimals(values):
+    """Italian formatted amounts ('1.234,56 €') to float"""
+    values = values.astype("string").str.replace(r"[^\d,.\-]", "", regex=True)
+    values = values.str.replace(".", "", regex=False).str.replace(",", ".", regex=False)
+    return pd.to_numeric(values, errors="coerce")
+
+
+PARSERS = {
+    "datetime": parse_datetimes,
+    "timedelta": parse_timedeltas,
+    "decimal": parse_decimals,
+    "category": lambda values: values.astype("category"),
+    "bool": lambda values: values.eq(CHECKBOX_CHECKED),
+}
+
+
+def pagination_mask(df):
+    """Vectorized is_pagination_row: 'Pagina X di Y' in the first cell and at most two non-empty cells"""
+    if df.empty or "inizio" not in df.columns:
+        return pd.Series(False, index=df.index)
+    grid = df[[name for name in FETCH_COLUMNS if name in df.columns]].astype("string").fillna("")
+    return grid["inizio"].str.contains(PAGINATION_RE) & grid.ne("").sum(axis=1).le(2)
+
+
+def apply_schema(df):
+    """Drop footer rows, keep the export columns and convert them to their declared types"""
+    df = df.loc[~pagination_mask(df)]
+    df = df.reindex(columns=EXPORT_COLUMNS).reset_index(drop=True)
+    for name, dtype in COLUMN_DTYPES.items():
+        if name in df.columns and dtype in PARSERS:
+            df[name] = PARSERS[dtype](df[name])
+    return df
@@ -0,0 +1,1366 @@
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException, WebDriverException
+from browser_profile import apply_lean_options, block_resources
+from checkpoint import RunJournal, run_key
+from columnar import ColumnarBuffer
+from date_ranges import preset_range
+from export import StreamingExporter, export_frames
+from extraction import extract_page_tables
+from grid_api import GridApiClient
+from incarico_api import IncaricoDetailFetcher
+from incarico_cache import IncaricoCache
+from instrumentation import DEFAULT_TRACE_DIR, NULL_TRACE, RunTrace
+from locators import LocatorEngine
+from pipeline import PagePipeline
+from retry_queue import RETRY_ATTEMPTS, RETRY_BACKOFF_SECONDS, RetryQueue, incarico_count
+from row_store import RowStore, scope_for
+from schema import FETCH_COLUMNS, FETCH_INDEXES
+from session_store import SessionStore
+from waits import WaitEngine
+
+
+LOGIN_URL = ""
+
+INCARICO_VALUE_XPATH = "/html/body/div[6]/div/div/div/div/div/div/div/div[4]/div[3]/div[2]/div[2]"
+MODAL_CLOSE_XPATH = "//*[@id='vj-modal-manager']//button[contains(@class, 'button-input-white')]"
+PAGE_INFO_XPATH = "//div[contains(text(), 'Pagina')]"
+
+DATE_PANEL_XPATH = "/html/body/div[10]/div[4]/section/div[1]/div/div[3]/div[1]/div/div[4]/div/div/div/div[3]"
+# The custom range option follows the eight presets and opens two date inputs
+# in the same panel; the portal expects dd/mm/yyyy.
+CUSTOM_RANGE_OPTION_INDEX = 9
+CUSTOM_RANGE_INPUTS_XPATH = DATE_PANEL_XPATH + "//input"
+CUSTOM_RANGE_DATE_FORMAT = "%d/%m/%Y"
+
+# Candidate locators per step, most specific first: the portal's absolute
+# XPaths, then label-based fallbacks. The LocatorEngine checks them all in
+# one script call and remembers per page which one matched.
+LOGIN_INDICATORS = [
+    (By.XPATH, "//*[contains(text(), 'Welcome') or contains(text(), 'Dashboard')]"),
+    (By.CSS_SELECTOR, "[href*='logout'], [onclick*='logout']"),
+    (By.CLASS_NAME, "user-avatar"),
+    (By.ID, "user-menu"),
+]
+BACK_TO_LOGIN = (By.XPATH, "//a[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'torna a login')]")
+EMAIL_FIELD = (By.ID, "email")
+PASSWORD_FIELD = (By.ID, "password")
+LOGIN_BUTTON = [
+    (By.XPATH, "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'accedi') or contains(@id, 'btn-login')]"),
+    (By.CSS_SELECTOR, "form button[type='submit'], form input[type='submit']"),
+]
+ACTIVITY_MENU = [
+    (By.XPATH, "/html/body/div[10]/div[2]/div[3]/div[1]/ul/li[8]/div/a/div/span"),
+    (By.XPATH, "//ul/li/div/a/div/span[normalize-space()='Attività']"),
+]
+ACTIVITY_SEARCH = [
+    (By.XPATH, "/html/body/div[10]/div[2]/div[3]/div[1]/ul/li[8]/ul/li[1]/div/a/div/span"),
+    (By.XPATH, "//ul/li/div/a/div/span[normalize-space()='Ricerca attività']"),
+]
+TYPE_BUTTON = [
+    (By.XPATH, "/html/body/div[10]/div[4]/section/div[1]/div/div[3]/div[1]/div/div[2]/div/div[2]/div[1]/span"),
+    (By.XPATH, "//section//span[normalize-space()='Tipo']"),
+]
+TYPE_SETTINGS = [
+    (By.XPATH, "/html/body/div[10]/div[4]/section/div[1]/div/div[3]/div[1]/div/div[2]/div/div[2]/div[2]/div[3]/div[1]/div/span[1]"),
+    (By.XPATH, "/html/body/div[10]/div[4]/section/div[1]/div/div[3]/div[1]/div/div[2]/div/div[2]/div[2]/div[3]/div[2]/div/span[2]"),
+    (By.XPATH, "/html/body/div[10]/div[4]/section/div[1]/div/div[3]/div[1]/div/div[2]/div/div[2]/div[2]/div[3]/div[3]/div/span[1]"),
+    (By.XPATH, "/html/body/div[10]/div[4]/section/div[1]/div/div[3]/div[1]/div/div[2]/div/div[2]/div[2]/div[3]/div[4]/div/span[1]"),
+    (By.XPATH, "/html/body/div[10]/div[4]/section/div[1]/div/div[3]/div[1]/div/div[2]/div/div[2]/div[2]/div[3]/div[5]/div/span[1]"),
+]
+DATE_BUTTON = [
+    (By.XPATH, "/html/body/div[10]/div[4]/section/div[1]/div/div[3]/div[1]/div/div[4]/div/div/div/div[2]/span"),
+    (By.XPATH, "//section//span[normalize-space()='Date']"),
+]
+ACTIVITY_FILTER_BUTTON = [
+    (By.XPATH, "/html/body/div[10]/div[4]/section/div[1]/div/div[3]/div[1]/div/div[3]/div/div[2]/div[1]/span"),
+    (By.XPATH, "//section//span[normalize-space()='Attività']"),
+]
+
+
+def date_option_locators(index):
+    """The index-th option of the date panel (1-8 presets, 9 custom range)"""
+    return [
+        (By.XPATH, f"{DATE_PANEL_XPATH}/div[1]/span[{index}]"),
+        (By.XPATH, f"(//span[normalize-space()='Personalizzato']/../span)[{index}]"),
+    ]
+
+
+# True while the page is not showing the login form
+SESSION_CHECK_JS = '''
+    return !document.querySelector("#email, #password") && !/login/i.test(window.location.pathname);
+'''
+
+# One grid table between the browser stage and the workers: its page and
+# table number, its rows, the incarico_extracted value of every row so far
+# and the (row, incarico) pairs still unresolved, plus the row store counts
+# for the early stop and the cache/endpoint lookup started in the background
+# (None when it runs on the worker or was not needed)
+PreparedTable = namedtuple("PreparedTable", ["page", "index", "rows", "values", "pending", "data_rows",
+                                             "known_rows", "lookup"], defaults=(None,))
+
+
+class ActivityScraper:
+    """Selenium scraping core: login, filter setup, pagination and incarico enrichment.
+
+    date_range_index selects one of the portal's presets (1-8); when
+    custom_range is a (start, end) pair of dates the custom range inputs are
+    used instead.
+
+    With keep_alive the browser stays open after a run so the next scrape
+    skips both Chrome startup and login; call cleanup() when done. With
+    persist_session the authenticated cookies and localStorage are saved
+    after login and restored on the next start.
+
+    progress(current_page, total_pages, rows) is called after every page, and
+    setting cancel_event stops the run at the next page boundary; the pages
+    collected so far are still returned.
+
+    With incremental the rows are synced into a local RowStore: unchanged
+    rows reuse their stored incarico, paging stops at the first page whose
+    rows are all already stored and unchanged, and the export is built from
+    the store.
+
+    Full runs journal every completed page to disk (see RunJournal); with
+    resume a previous interrupted run with the same settings continues from
+    its first unfinished page.
+
+    With grid_endpoint the grid is read straight from the portal's search
+    endpoint (see GridApiClient) with the browser's cookies, grid_concurrency
+    requests at a time, instead of paging through it in the browser. That
+    needs the incarico endpoint, as the modals only exist in the browser
+    grid. When the endpoint fails or its response shape changed the run
+    continues in the browser from the first page not yet collected.
+
+    A .parquet save path writes a partitioned Parquet dataset instead of a
+    file (see ParquetDataset): partition_by picks month or utente partitions
+    and only the partitions the scraped range touches are rewritten;
+    report_path then builds an Excel/CSV report of the range from it.
+
+    throttle, when given, is called before every request the scraper makes
+    to the portal (page loads, page changes, incarico modals and endpoint
+    calls), so a shared rate limiter can pace several scrapers.
+
+    lean_profile starts Chrome without images, fonts, media and analytics,
+    with unneeded features off and the eager page load strategy.
+
+    Browser pages are processed on a pipeline: the browser reads a page,
+    starts its incarico cache and endpoint lookup in the background and
+    moves on while pipeline_workers threads wait for that lookup, sync the
+    row store, pack the page into a column chunk and write it, with at most
+    pipeline_depth pages queued; pages are still written in order. Values
+    the endpoint misses get the incarico modal in the end-of-run retry.
+    pipeline_workers=0 processes each page before leaving it, modals
+    included.
+
+    Every failed unit (an incarico value, a whole table, a page pagination
+    never reached) goes to a RetryQueue and is retried with backoff at the
+    end of the run. What still fails is saved with the run journal kept;
+    retry_failed then re-fetches only those units and rebuilds the export
+    from the patched journal (or the row store). Each export logs how
+    complete it is and keeps the figures in completeness.
+
+    With instrument each run records a RunTrace (phase and page timings,
+    waits, every WebDriver command), logs its summary table and writes a
+    Chrome trace file to trace_dir. Off, the hooks are no-ops.
+    """
+
+    def __init__(self, log=print, date_range_index=1, custom_range=None, cache_mode="use",
+                 incarico_endpoint="", incarico_field="", incarico_concurrency=8,
+                 keep_alive=False, persist_session=True, progress=None, cancel_event=None,
+                 incremental=False, resume=False, login_url=LOGIN_URL, instrument=False,
+                 trace_dir=DEFAULT_TRACE_DIR, lean_profile=True, throttle=None, grid_endpoint="",
+                 grid_concurrency=4, partition_by=None, report_path="", pipeline_workers=2, pipeline_depth=4,
+                 retry_failed=False):
+        self.log = log
+        self.login_url = login_url
+        self.progress = progress
+        self.cancel_event = cancel_event
+        self.cancelled = False
+        self.date_range_index = date_range_index
+        self.custom_range = custom_range
+        self.cache_mode = cache_mode
+        self.incarico_endpoint = incarico_endpoint
+        self.incarico_field = incarico_field
+        self.incarico_concurrency = incarico_concurrency
+        self.grid_endpoint = grid_endpoint
+        self.grid_concurrency = grid_concurrency
+        self.partition_by = partition_by
+        self.report_path = report_path
+        self.pipeline_workers = pipeline_workers
+        self.pipeline_depth = pipeline_depth
+        self.retry_failed = retry_failed
+        self.retry_queue = None
+        self.completeness = None
+        self.total_pages = None
+        self.keep_alive = keep_alive
+        self.incremental = incremental
+        self.resume = resume
+        self.instrument = instrument
+        self.trace_dir = trace_dir
+        self.trace = NULL_TRACE
+        self.lean_profile = lean_profile
+        self.throttle = throttle
+        self.rows_exported = 0
+        self.row_store = None
+        self.page_all_known = False
+        self.stopped_early = False
+        self.session_store = SessionStore(log=log) if persist_session else None
+        self.driver = None
+        self.locators = None
+        self.logged_in_as = None
+        self.last_error = None
+
+    def configure(self, **settings):
+        """Update run settings on a long-lived scraper between runs"""
+        for key, value in settings.items():
+            if key not in ("date_range_index", "custom_range", "cache_mode", "incarico_endpoint",
+                           "incarico_field", "incarico_concurrency", "keep_alive", "incremental",
+                           "resume", "login_url", "instrument", "trace_dir", "lean_profile", "throttle",
+                           "grid_endpoint", "grid_concurrency", "partition_by", "report_path",
+                           "pipeline_workers", "pipeline_depth", "retry_failed"):
+                raise TypeError(f"Unknown scraper setting {key!r}")
+            setattr(self, key, value)
+
+    def date_range(self):
+        """(start, end) dates of the configured custom range or preset"""
+        return self.custom_range or preset_range(self.date_range_index)
+
+    def build_chrome_options(self):
+        chrome_options = webdriver.ChromeOptions()
+        chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+        chrome_options.add_experimental_option('useAutomationExtension', False)
+        chrome_options.add_argument("--headless")  #  Enable headless mode
+        chrome_options.add_argument("--disable-gpu")  # Optional, good for compatibility
+        chrome_options.add_argument("--window-size=1920,1080")  # Headless ignores --start-maximized
+        if self.lean_profile:
+            apply_lean_options(chrome_options)
+        return chrome_options
+
+    def browser_alive(self):
+        if not self.driver:
+            return False
+        try:
+            self.driver.current_url
+            return True
+        except WebDriverException:
+            return False
+
+    def start_browser(self):
+        if self.browser_alive():
+            self.log("✓ Reusing open browser")
+        else:
+            self.driver = None
+            self.logged_in_as = None
+            # No implicit wait: it would compound with every explicit wait and locator probe
+            self.driver = webdriver.Chrome(options=self.build_chrome_options())
+            if self.lean_profile and block_resources(self.driver, self.log):
+                self.log("✓ Lean browser profile: images, fonts, media and analytics blocked")
+        self.trace.instrument_driver(self.driver)
+        self.locators = LocatorEngine(self.driver, log=self.log, trace=self.trace)
+        return WaitEngine(self.driver, self.log, politeness=0.2, trace=self.trace)
+
+    def begin_trace(self, name):
+        """Start a RunTrace when instrumentation is on; True when the caller owns it"""
+        if not self.instrument or self.trace.enabled:
+            return False
+        self.trace = RunTrace(name)
+        return True
+
+    def end_trace(self):
+        """Log the trace summary, write the trace file and detach from the driver"""
+        trace, self.trace = self.trace, NULL_TRACE
+        if not trace.enabled:
+            return
+        if self.driver:
+            NULL_TRACE.instrument_driver(self.driver)
+        for line in trace.summary_lines():
+            self.log(line)
+        try:
+            self.log(f"✓ Run trace written to {trace.write(directory=self.trace_dir)}")
+        except OSError as e:
+            self.log(f"⚠ Could not write the run trace: {e}")
+
+    def pace(self):
+        """Wait for the rate limiter (if any) before a request to the portal"""
+        if self.throttle:
+            self.throttle()
+
+    def session_valid(self, waits, url):
+        """Reload url and cheaply check that we were not bounced to the login form"""
+        if not url or not url.startswith("http"):
+            return False
+        self.pace()
+        self.driver.get(url)
+        waits.xhr_idle("session check")
+        return bool(self.driver.execute_script(SESSION_CHECK_JS))
+
+    def ensure_session(self, waits, email, password, target_url):
+        """Get a logged-in browser on the target page, logging in only when needed"""
+        if self.logged_in_as == email:
+            if self.session_valid(waits, target_url or self.driver.current_url):
+                self.log("✓ Browser session still valid - skipping login")
+                return
+            self.log("Browser session expired - logging in again")
+
+        if self.session_store and self.session_store.restore(self.driver, email, self.login_url):
+            if self.session_valid(waits, target_url or self.driver.current_url):
+                self.logged_in_as = email
+                self.log("✓ Saved session is valid - skipping login")
+                return
+            self.log("Saved session expired - logging in again")
+            self.session_store.clear(email, self.login_url)
+
+        if self.logged_in_as and self.logged_in_as != email:
+            # Another account is still logged in on the warm browser
+            self.driver.delete_all_cookies()
+        self.login(email, password)
+        self.logged_in_as = email
+        if self.session_store:
+            self.session_store.save(self.driver, email, self.login_url)
+        self.open_target(target_url)
+
+    def navigate_to_target(self, driver, target_url):
+        """Robust navigation method with multiple fallbacks"""
+        current_url = driver.current_url
+        attempts = [
+            lambda: driver.get(target_url),
+            lambda: driver.execute_script(f"window.location.href = '{target_url}';"),
+            lambda: driver.find_element(By.TAG_NAME, 'body').send_keys(Keys.CONTROL + 'l' + target_url + Keys.RETURN)
+        ]
+
+        for attempt in attempts:
+            try:
+                attempt()
+                WebDriverWait(driver, 10).until(
+                    lambda d: d.current_url != current_url
+                )
+                return True
+            except (TimeoutException, WebDriverException):
+                continue
+
+        return False
+
+    def verify_login_success(self, driver):
+        """Check every indicator of a successful login at once, without waiting"""
+        return self.locators.probe("login check", LOGIN_INDICATORS) is not None
+
+    def login(self, email, password):
+        self.log("Navigating to login page...")
+        self.pace()
+        self.driver.get(self.login_url)
+
+        # Whichever shows up first: the 'Torna a login' link (clicked) or the form itself
+        match = self.locators.find("login form", [BACK_TO_LOGIN, EMAIL_FIELD], timeout=10, clickable=True,
+                                   remember=False)
+        if match.locator == BACK_TO_LOGIN:
+            match.element.click()
+            self.log("✓ Clicked 'Torna a login' button")
+            email_field = self.locators.find("login email", [EMAIL_FIELD], timeout=10).element
+        else:
+            self.log("No 'Torna a login' button found - proceeding directly")
+            email_field = match.element
+        email_field.clear()
+        email_field.send_keys(email)
+
+        password_field = self.locators.find("login password", [PASSWORD_FIELD], timeout=10).element
+        password_field.clear()
+        password_field.send_keys(password)
+
+        login_button = self.locators.find("login button", LOGIN_BUTTON, clickable=True).element
+        self.pace()
+        login_button.click()
+        self.log("✓ Clicked login button ('Accedi')")
+
+        WebDriverWait(self.driver, 10).until(
+            lambda d: "dashboard" in d.current_url.lower() or self.verify_login_success(d)
+        )
+        self.log("✓ Login successful")
+
+    def open_target(self, target_url):
+        if target_url:
+            self.log(f"Navigating to target URL: {target_url}")
+            self.pace()
+            self.driver.get(target_url)
+            WebDriverWait(self.driver, 10).until(
+                lambda d: target_url.split("/")[-1].lower() in d.current_url.lower()
+            )
+
+    def open_incarico_sources(self):
+        """Create the incarico cache and, when configured, the detail endpoint fetcher"""
+        incarico_cache = None
+        detail_fetcher = None
+        try:
+            incarico_cache = IncaricoCache(mode=self.cache_mode, log=self.log)
+            self.log(f"✓ Incarico cache at {incarico_cache.path} (mode: {incarico_cache.mode})")
+        except Exception as e:
+            self.log(f"⚠ Incarico cache disabled: {e}")
+
+        if self.incarico_endpoint:
+            try:
+                detail_fetcher = IncaricoDetailFetcher(
+                    self.driver, self.incarico_endpoint,
+                    value_field=self.incarico_field,
+                    concurrency=self.incarico_concurrency,
+                    log=self.log,
+                    throttle=self.throttle
+                )
+                self.log(f"✓ Incarico details via endpoint ({detail_fetcher.concurrency} concurrent requests)")
+            except Exception as e:
+                self.log(f"⚠ Incarico endpoint disabled, using modal only: {e}")
+        return incarico_cache, detail_fetcher
+
+    def open_grid_client(self, detail_fetcher):
+        """GridApiClient for the configured grid endpoint, or None to page in the browser"""
+        if not self.grid_endpoint:
+            return None
+        if not detail_fetcher:
+            self.log("⚠ The grid endpoint needs the incarico endpoint (modals only exist in the browser grid) "
+                     "- paging in the browser")
+            return None
+        try:
+            grid_client = GridApiClient(
+                self.driver, self.grid_endpoint, self.date_range(), FETCH_COLUMNS,
+                date_range_index=self.date_range_index,
+                concurrency=self.grid_concurrency,
+                log=self.log,
+                throttle=self.throttle
+            )
+            self.log(f"✓ Grid via endpoint ({grid_client.concurrency} concurrent requests)")
+            return grid_client
+        except Exception as e:
+            self.log(f"⚠ Grid endpoint disabled, paging in the browser: {e}")
+            return None
+
+    def open_activity_search(self, waits):
+        try:
+            waits.settled("target page")
+            self.locators.click("activity menu", ACTIVITY_MENU)
+            waits.dom_quiet("activity menu")
+            self.locators.click("activity search", ACTIVITY_SEARCH)
+            self.log("Opened Activity search correctly")
+            waits.settled("activity search")
+        except TimeoutException:
+            self.log("No Activity button found - proceeding directly")
+
+    def select_date_range(self, waits):
+        """Pick the preset date range, or type the custom start/end dates"""
+        if self.custom_range:
+            self.locators.click("date option", date_option_locators(CUSTOM_RANGE_OPTION_INDEX), timeout=10)
+            waits.dom_quiet("custom date option")
+
+            start, end = self.custom_range
+            inputs = WebDriverWait(self.driver, 10).until(
+                lambda d: d.find_elements(By.XPATH, CUSTOM_RANGE_INPUTS_XPATH)[:2] or False
+            )
+            if len(inputs) < 2:
+                raise WebDriverException("Custom date range inputs not found")
+            for field, value in zip(inputs, (start, end)):
+                field.clear()
+                field.send_keys(value.strftime(CUSTOM_RANGE_DATE_FORMAT) + Keys.RETURN)
+            self.log(f"Selected custom date range {start:%d/%m/%Y} - {end:%d/%m/%Y}")
+        else:
+            self.locators.click("date option", date_option_locators(self.date_range_index), timeout=10)
+        waits.dom_quiet("date option")
+
+    def apply_filters(self, waits):
+        try:
+            # Click type button
+            self.locators.click("type dropdown", TYPE_BUTTON)
+            waits.dom_quiet("type dropdown")
+
+            # Click deselct option using JS
+            self.driver.execute_script("""
+                const el = document.querySelector("#app > div:nth-child(3) > div.by-scroll-container > div > div:nth-child(2) > div > div:nth-child(2) > div.dr-dropdown-panel > div:nth-child(2) > div:nth-child(2)");
+                el?.click();
+            """)
+
+            # Select type settings
+            for i, locator in enumerate(TYPE_SETTINGS, start=1):
+                self.locators.click(f"type setting {i}", [locator])
+            try:
+                # Open date picker
+                try:
+                    self.locators.click("date picker", DATE_BUTTON, timeout=10)
+                    waits.dom_quiet("date picker")
+                    self.select_date_range(waits)
+                    self.locators.click("activity dropdown", ACTIVITY_FILTER_BUTTON)
+                    waits.dom_quiet("activity dropdown")
+
+                    # Click deselct option using JS
+                    self.driver.execute_script("""
+                        const el = document.querySelector("#app > div:nth-child(3) > div.by-scroll-container > div > div:nth-child(3) > div > div:nth-child(2) > div.dr-dropdown-panel > div:nth-child(2) > div:nth-child(2)");
+                        el?.click();
+                    """)
+                except Exception as e:
+                    self.log(f"Failed to open date picker: {str(e)}")
+                    raise
+
+                waits.xhr_idle("date selection")
+
+            except Exception as e:
+                self.log(f"Date selection failed: {str(e)}")
+                raise
+            # Wait for the filtered grid instead of a fixed delay
+            waits.settled("filter setup", quiet_ms=500)
+            waits.element_present(PAGE_INFO_XPATH, "grid footer")
+        except TimeoutException:
+            self.log(" Timeout: could not reset the settings - proceeding directly")
+
+    def extract_incarico_from_modal(self, waits, row_number):
+        """Open the incarico modal for a grid row, read its value and close it again"""
+        js_click = f'''
+            const span = document.querySelector(
+                "#app > div.search-grid-wrapper > div:nth-child(2) > div > div > div > table > tbody > tr:nth-child({row_number}) > td:nth-child(23) > div > div > span"
+            );
+            if (span) {{
+                span.scrollIntoView({{behavior: 'smooth', block: 'center'}});
+                span.click();
+            }} else {{
+                console.warn("⚠ Span not found at row {row_number}");
+            }}
+        '''
+        self.pace()
+        self.driver.execute_script(js_click)
+        waits.element_present(INCARICO_VALUE_XPATH, "incarico modal")
+
+        js_extract = '''
+            function getTextByXPath(xpath) {
+                const result = document.evaluate(xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null);
+                return result.singleNodeValue ? result.singleNodeValue.textContent.trim() : null;
+            }
+            return getTextByXPath(arguments[0]);
+        '''
+        extracted_value = self.driver.execute_script(js_extract, INCARICO_VALUE_XPATH)
+
+        js_close = '''
+            const buttonSpan = document.querySelector(
+                "#vj-modal-manager > div > div > div > div > div > div > div > div:nth-child(6) > button.button-input-white > span:nth-child(1)"
+            );
+            if (buttonSpan) {
+                buttonSpan.scrollIntoView({behavior: 'smooth', block: 'center'});
+                buttonSpan.click();
+            } else {
+                console.warn("⚠ Close button not found in modal");
+            }
+        '''
+        self.driver.execute_script(js_close)
+        waits.element_gone(MODAL_CLOSE_XPATH, "incarico modal")
+        return extracted_value
+
+    def record_failure(self, kind, page, error, **unit):
+        """Queue a failed unit for the end-of-run retry (see RetryQueue)"""
+        if self.retry_queue is not None and page is not None:
+            self.retry_queue.add(kind, page, error, **unit)
+
+    def prepare_rows(self, table_data, page=None, index=0):
+        """Classify one table's rows against the row store; unchanged rows keep their stored incarico"""
+        values = [None] * len(table_data)
+        skip = set()
+        known_rows = data_rows = 0
+        incarico_col = FETCH_COLUMNS.index("incarico")
+        if self.row_store:
+            with self.trace.phase("row store"):
+                statuses = self.row_store.classify(table_data)
+            for i, (status, stored_incarico) in enumerate(statuses):
+                if status == "footer":
+                    continue
+                data_rows += 1
+                if status != "unchanged":
+                    continue
+                known_rows += 1
+                # Retry rows whose incarico could not be extracted last time
+                if stored_incarico is not None or not table_data[i][incarico_col]:
+                    values[i] = stored_incarico
+                    skip.add(i)
+
+        pending = [(i, str(row_values[incarico_col]).strip())
+                   for i, row_values in enumerate(table_data) if i not in skip]
+        pending = [(i, value) for i, value in pending if value]
+        return PreparedTable(page, index, table_data, values, pending, data_rows, known_rows)
+
+    def lookup_cached(self, table, incarico_cache):
+        """Fill pending incarico values from the cache"""
+        if not incarico_cache or not table.pending:
+            return
+        with self.trace.phase("incarico cache"):
+            cached = incarico_cache.get_many(value for _, value in table.pending)
+        for local_index_on_page, incarico_value in table.pending:
+            if incarico_value in cached:
+                table.values[local_index_on_page] = cached[incarico_value]
+        table.pending[:] = [(i, value) for i, value in table.pending if value not in cached]
+        self.log(f"✓ Incarico cache: {len(cached)} hit(s), {len(table.pending)} row(s) to fetch")
+
+    def fetch_details(self, table, detail_fetcher, incarico_cache):
+        """Fill pending incarico values from the detail endpoint"""
+        if not detail_fetcher or not table.pending:
+            return
+        with self.trace.phase("incarico endpoint", rows=len(table.pending)):
+            fetched = detail_fetcher.fetch_many(value for _, value in table.pending)
+            if incarico_cache:
+                incarico_cache.put_many(fetched)
+        for local_index_on_page, incarico_value in table.pending:
+            if incarico_value in fetched:
+                table.values[local_index_on_page] = fetched[incarico_value]
+        table.pending[:] = [(i, value) for i, value in table.pending if value not in fetched]
+        self.log(f"✓ Fetched {len(fetched)} incarico detail(s) over HTTP; "
+                 f"{len(table.pending)} row(s) left for the modal fallback")
+
+    def resolve_with_modals(self, table, waits, incarico_cache):
+        """Click the incarico modal of every pending row; needs the table's page open in the browser"""
+        for local_index_on_page, incarico_value in table.pending:
+            try:
+                self.log(f"→ Row {local_index_on_page+1}: Clicking incarico span for value: {incarico_value[:10]}")
+                with self.trace.phase("incarico modal"):
+                    extracted_value = self.extract_incarico_from_modal(waits, local_index_on_page + 1)
+                table.values[local_index_on_page] = extracted_value
+                if incarico_cache and extracted_value:
+                    incarico_cache.put(incarico_value, extracted_value)
+                self.log(f"✓ Extracted incarico: {extracted_value}")
+            except Exception as incarico_err:
+                self.log(f"⚠ Error extracting incarico on row {local_index_on_page+1}: {incarico_err}")
+                self.record_failure("incarico", table.page, incarico_err, table=table.index, row=local_index_on_page,
+                                    incarico=incarico_value, cells=table.rows[local_index_on_page])
+        table.pending[:] = []
+
+    def settle_endpoint(self, table, incarico_cache, detail_fetcher):
+        """Fill pending incarico values from the cache, then the detail endpoint"""
+        self.lookup_cached(table, incarico_cache)
+        self.fetch_details(table, detail_fetcher, incarico_cache)
+
+    def start_lookup(self, table, incarico_cache, detail_fetcher, lookup_pool):
+        """Start settle_endpoint for a freshly read table on lookup_pool; the table carries its future"""
+        if not table.pending or not (incarico_cache or detail_fetcher):
+            return table
+        return table._replace(lookup=lookup_pool.submit(self.settle_endpoint, table, incarico_cache,
+                                                        detail_fetcher))
+
+    def resolve_rows(self, table, incarico_cache, detail_fetcher, waits=None):
+        """Resolve a prepared table's incarico values and sync the row store.
+
+        waits is None when the table's page is no longer (or never was) open
+        in the browser grid, which rules out the incarico modal: the values
+        left go to the retry queue, whose retry pass opens their page again.
+        """
+        with self.trace.phase("incarico"):
+            if table.lookup is not None:
+                with self.trace.phase("incarico lookup wait"):
+                    table.lookup.result()
+            else:
+                self.settle_endpoint(table, incarico_cache, detail_fetcher)
+            if waits is not None:
+                self.resolve_with_modals(table, waits, incarico_cache)
+            elif table.pending:
+                self.log(f"⚠ {len(table.pending)} incarico value(s) left for the modal in the retry pass: "
+                         f"the page is no longer open in the browser grid")
+                errors = detail_fetcher.errors if detail_fetcher else {}
+                for local_index_on_page, incarico_value in table.pending:
+                    self.record_failure("incarico", table.page,
+                                        errors.get(incarico_value, "not resolved by the incarico endpoint"),
+                                        table=table.index, row=local_index_on_page, incarico=incarico_value,
+                                        cells=table.rows[local_index_on_page])
+
+        if self.row_store:
+            with self.trace.phase("row store"):
+                self.row_store.upsert(table.rows, table.values)
+
+    def page_chunk(self, tables):
+        """A page's resolved tables as a ColumnarBuffer, without a DataFrame per table"""
+        chunk = ColumnarBuffer()
+        with self.trace.phase("chunk"):
+            for table in tables:
+                chunk.append(table.rows, table.values)
+        return chunk
+
+    def collect_page(self, waits, incarico_cache, detail_fetcher=None, page=None, lookup_pool=None):
+        """Browser stage: read the current page's tables and classify their rows.
+
+        With lookup_pool each table's cache and endpoint lookup starts there
+        as soon as the table is read (see start_lookup). Sets page_all_known
+        for the incremental early stop.
+        """
+        tables = []
+        self.page_all_known = False
+        with self.trace.phase("read cells"):
+            raw_tables, saved_round_trips = extract_page_tables(self.driver, FETCH_COLUMNS, FETCH_INDEXES)
+        self.log(f" Found {len(raw_tables)} table(s) on the page "
+                 f"(1 script call, saved {saved_round_trips} WebDriver round trips).")
+
+        for raw in raw_tables:
+            idx = raw.index
+            try:
+                if not raw.has_tbody:
+                    self.log(f"⚠ Table #{idx} has no <tbody>; falling back to all <tr>.")
+
+                if not raw.raw_row_count:
+                    self.log(f"⚠ Table #{idx} has no rows. Skipping.")
+                    continue
+
+                if not raw.rows:
+                    self.log(f"⚠ Table #{idx} contains only empty rows. Skipping.")
+                    continue
+
+                table = self.prepare_rows(raw.rows, page, idx)
+                if lookup_pool is not None:
+                    table = self.start_lookup(table, incarico_cache, detail_fetcher, lookup_pool)
+                tables.append(table)
+
+            except Exception as ex_table:
+                self.log(f" Error extracting Table #{idx}: {ex_table}")
+                self.record_failure("table", page, ex_table, table=idx)
+
+        data_rows = sum(table.data_rows for table in tables)
+        self.page_all_known = bool(data_rows) and sum(table.known_rows for table in tables) == data_rows
+        return tables
+
+    def finish_page(self, tables, incarico_cache, detail_fetcher, waits=None):
+        """Worker stage: resolve a collected page's tables and return them as one page chunk"""
+        finished = []
+        for table in tables:
+            try:
+                self.resolve_rows(table, incarico_cache, detail_fetcher, waits)
+                finished.append(table)
+                self.log(f"Table #{table.index} extracted with {len(table.rows)} rows")
+            except Exception as ex_table:
+                self.log(f" Error extracting Table #{table.index}: {ex_table}")
+                self.record_failure("table", table.page, ex_table, table=table.index)
+        return self.page_chunk(finished)
+
+    def page_position(self, timeout=10):
+        """(current page, total pages) from the grid footer, waiting for it to render"""
+        def position(driver):
+            footer = driver.find_elements(By.XPATH, PAGE_INFO_XPATH)
+            parts = footer[0].text.split() if footer else []
+            if len(parts) < 4 or not (parts[1].isdigit() and parts[3].isdigit()):
+                return False
+            return int(parts[1]), int(parts[3])
+
+        return WebDriverWait(self.driver, timeout, ignored_exceptions=(StaleElementReferenceException,)).until(
+            position, "Grid footer 'Pagina X di Y' not found")
+
+    def go_to_next_page(self, waits, current_page):
+        """Click the next page arrow and wait for the footer to change"""
+        js_click_arrow = '''
+            const arrowIcon = document.querySelector(
+                "#app > div.search-grid-wrapper > div:nth-child(2) > div > div > div > table > tbody > tr:nth-child(51) > td:nth-child(1) > div > div:nth-child(2) > span:nth-child(3)"
+            );
+            if (arrowIcon) {
+                arrowIcon.scrollIntoView({behavior: 'smooth', block: 'center'});
+                arrowIcon.click();
+            } else {
+                console.warn("⚠ Arrow icon not found at row 51");
+            }
+        '''
+        previous_page_info = waits.page_info()
+        self.pace()
+        self.driver.execute_script(js_click_arrow)
+        if not waits.page_change(previous_page_info, f"page {current_page + 1}"):
+            self.log(f"⚠ Page did not advance past {current_page}; stopping pagination.")
+            return False
+        waits.dom_quiet(f"page {current_page + 1}")
+        return True
+
+    def scrape_pages(self, waits, incarico_cache, detail_fetcher, on_page=None, start_page=1, buffer=None):
+        """Page through the browser grid.
+
+        The browser thread reads each page, starts its incarico cache and
+        endpoint lookup on a background pool and clicks on, so the endpoint
+        calls of one page overlap reading the next. Waiting for that lookup,
+        the row store sync, packing the page into a ColumnarBuffer chunk and
+        on_page run on a PagePipeline (pipeline_workers threads, at most
+        pipeline_depth pages in flight) and come out in page order. Values
+        the endpoint misses are queued for the retry pass, which clicks
+        their modals. pipeline_workers=0 runs every page inline, modals
+        included.
+
+        Each page chunk goes to on_page(page, total_pages, chunk) or, without
+        it, into buffer (the run's ColumnarBuffer).
+        """
+        rows = 0
+        inline = not self.pipeline_workers
+
+        def process(page, payload):
+            total_pages, tables = payload
+            try:
+                with self.trace.phase("process", page=page):
+                    return total_pages, self.finish_page(tables, incarico_cache, detail_fetcher,
+                                                         waits if inline else None)
+            except Exception as e:
+                self.log(f" Critical error during table extraction: {e}")
+                self.record_failure("page", page, e)
+                return total_pages, ColumnarBuffer()
+
+        def write(page, result):
+            nonlocal rows
+            total_pages, chunk = result
+            try:
+                if on_page:
+                    with self.trace.phase("checkpoint", page=page):
+                        on_page(page, total_pages, chunk)
+                else:
+                    with self.trace.phase("buffer", page=page):
+                        buffer.extend(chunk)
+                rows += len(chunk)
+            except Exception as e:
+                self.log(f" Critical error during table extraction: {e}")
+                self.record_failure("page", page, e)
+            if self.progress:
+                self.progress(page, total_pages, rows)
+
+        current_page = total_pages = None
+        pipeline = PagePipeline(process, write, workers=self.pipeline_workers, depth=self.pipeline_depth)
+        lookup_pool = None if inline else ThreadPoolExecutor(max_workers=max(1, self.pipeline_depth),
+                                                             thread_name_prefix="incarico-lookup")
+        try:
+            try:
+                while True:
+                    current_page, total_pages = self.page_position()
+                    self.total_pages = total_pages
+                    self.log(f"📄 Current page: {current_page} of {total_pages}")
+
+                    # Resuming: page through already journaled pages without reading them
+                    if current_page < start_page and current_page < total_pages:
+                        self.log(f"⏩ Skipping page {current_page} (already in the run journal)")
+                        with self.trace.phase("paginate", page=current_page):
+                            advanced = self.go_to_next_page(waits, current_page)
+                        if not advanced:
+                            self.record_failure_pages(current_page, total_pages, start_page)
+                            break
+                        continue
+
+                    # Page span: reading the page, queueing it and the click to the next page
+                    with self.trace.phase(f"page {current_page}", cat="page", page=current_page):
+                        try:
+                            with self.trace.phase("extract", page=current_page):
+                                tables = self.collect_page(waits, incarico_cache, detail_fetcher,
+                                                           page=current_page, lookup_pool=lookup_pool)
+                        except Exception as e:
+                            self.log(f" Critical error during table extraction: {e}")
+                            self.record_failure("page", current_page, e)
+                            tables = []
+                        with self.trace.phase("queue", page=current_page):
+                            pipeline.put(current_page, (total_pages, tables))
+
+                        if current_page >= total_pages:
+                            break
+
+                        if self.row_store and self.page_all_known:
+                            self.stopped_early = True
+                            self.log(f"✓ Page {current_page} holds only already-synced rows; "
+                                     f"skipping the remaining {total_pages - current_page} page(s)")
+                            break
+
+                        if self.cancel_event and self.cancel_event.is_set():
+                            self.cancelled = True
+                            self.log(f"⚠ Run cancelled after page {current_page} of {total_pages}")
+                            break
+
+                        # Click next page arrow
+                        try:
+                            with self.trace.phase("paginate", page=current_page):
+                                advanced = self.go_to_next_page(waits, current_page)
+                            if not advanced:
+                                self.record_failure_pages(current_page, total_pages)
+                                break
+                        except Exception as e:
+                            self.log(f" Failed to click next arrow: {e}")
+                            self.record_failure_pages(current_page, total_pages, error=e)
+                            break
+            finally:
+                with self.trace.phase("drain"):
+                    try:
+                        pipeline.close()
+                    finally:
+                        if lookup_pool is not None:
+                            lookup_pool.shutdown()
+
+        except Exception as e:
+            self.log(f" Error in pagination logic: {e}")
+            if total_pages:
+                self.record_failure_pages(current_page, total_pages, start_page, error=e)
+
+    def record_failure_pages(self, current_page, total_pages, start_page=1, error=None):
+        """Queue the pages after current_page that pagination never reached"""
+        if self.retry_queue is None:
+            return
+        first = max(current_page + 1, start_page)
+        self.retry_queue.add_pages(range(first, total_pages + 1),
+                                   f"pagination stopped at page {current_page}" + (f": {error}" if error else ""))
+
+    def scrape_endpoint(self, grid_client, incarico_cache, detail_fetcher, on_page=None, start_page=1,
+                        buffer=None):
+        """Collect pages from the grid endpoint into on_page or buffer (see scrape_pages).
+
+        Returns next_page: None when the run is complete (or stopped on
+        purpose), otherwise the first page the browser still has to collect
+        after the endpoint failed.
+        """
+        rows = 0
+        next_page = start_page
+        pages = grid_client.iter_pages(start_page)
+        try:
+            while True:
+                with self.trace.phase("grid request", page=next_page):
+                    item = next(pages, None)
+                if item is None:
+                    self.log(f"✓ Grid endpoint: {grid_client.requests} request(s) for {next_page - start_page} page(s)")
+                    return None
+                current_page, total_pages, table_data = item
+                self.total_pages = total_pages
+                self.log(f"📄 Current page: {current_page} of {total_pages or '?'}")
+
+                with self.trace.phase(f"page {current_page}", cat="page", page=current_page):
+                    with self.trace.phase("extract", page=current_page):
+                        self.page_all_known = False
+                        table = self.prepare_rows(table_data, current_page)
+                        self.resolve_rows(table, incarico_cache, detail_fetcher)
+                        self.page_all_known = bool(table.data_rows) and table.known_rows == table.data_rows
+                    chunk = self.page_chunk([table])
+                    if on_page:
+                        with self.trace.phase("checkpoint", page=current_page):
+                            on_page(current_page, total_pages, chunk)
+                    else:
+                        with self.trace.phase("buffer", page=current_page):
+                            buffer.extend(chunk)
+                    rows += len(chunk)
+                    next_page = current_page + 1
+
+                    if self.progress:
+                        self.progress(current_page, total_pages, rows)
+
+                    # Without a total from the endpoint, any page may still be followed by more
+                    more_pages = total_pages is None or current_page < total_pages
+                    if self.row_store and self.page_all_known and more_pages:
+                        self.stopped_early = True
+                        self.log(f"✓ Page {current_page} holds only already-synced rows; skipping the remaining "
+                                 + (f"{total_pages - current_page} page(s)" if total_pages else "pages"))
+                        return None
+
+                    if self.cancel_event and self.cancel_event.is_set() and more_pages:
+                        self.cancelled = True
+                        self.log(f"⚠ Run cancelled after page {current_page} of {total_pages or '?'}")
+                        return None
+
+        except Exception as e:
+            self.log(f"⚠ Grid endpoint failed at page {next_page}: {e} - continuing in the browser")
+            return next_page
+        finally:
+            pages.close()
+            grid_client.close()
+
+    def retry_failures(self, waits, incarico_cache, detail_fetcher, on_page):
+        """Retry the queued units with backoff, up to RETRY_ATTEMPTS passes.
+
+        Incarico values are asked from the endpoint again; pages still holding
+        a failed unit are then collected again in the browser, inline with
+        the modal fallback, and handed to on_page to replace the stored page.
+        Without on_page there is no stored page to replace: the incarico
+        values the endpoint still misses get their modal clicked instead
+        (see retry_modals) and end up in the retry patches.
+        """
+        queue = self.retry_queue
+        for attempt in range(1, RETRY_ATTEMPTS + 1):
+            if not (queue.incarico_units() or (on_page and queue.pages())):
+                break
+            delay = RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1)
+            self.log(f"Retrying {len(queue)} failed unit(s) in {delay:.0f}s (pass {attempt} of {RETRY_ATTEMPTS})")
+            if self.cancel_event is not None:
+                if self.cancel_event.wait(delay):
+                    self.log("⚠ Retry cancelled")
+                    break
+            else:
+                time.sleep(delay)
+            try:
+                with self.trace.phase("retry pass", attempt=attempt):
+                    if detail_fetcher and queue.incarico_units():
+                        self.retry_incarico(detail_fetcher, incarico_cache)
+                    if on_page and queue.pages():
+                        self.revisit_pages(waits, queue.pages(), incarico_cache, detail_fetcher, on_page)
+                    elif not on_page and queue.incarico_units():
+                        self.retry_modals(waits, incarico_cache)
+            except Exception as e:
+                self.log(f"⚠ Retry pass {attempt} failed: {e}")
+
+        if len(queue):
+            self.log(f"⚠ {len(queue)} unit(s) still failing after the retries")
+        else:
+            self.log("✓ Every failed unit was recovered")
+
+    def retry_incarico(self, detail_fetcher, incarico_cache):
+        """Ask the endpoint again for the queued incarico values"""
+        units = self.retry_queue.incarico_units()
+        with self.trace.phase("incarico endpoint", rows=len(units)):
+            fetched = detail_fetcher.fetch_many(unit["incarico"] for unit in units)
+            if incarico_cache:
+                incarico_cache.put_many(fetched)
+        resolved = self.retry_queue.resolve_incarico(fetched)
+        if self.row_store and resolved:
+            self.row_store.upsert([unit["cells"] for unit, _ in resolved], [value for _, value in resolved])
+        for unit in self.retry_queue.incarico_units():
+            if unit in units:
+                self.record_failure("incarico", unit["page"],
+                                    detail_fetcher.errors.get(unit["incarico"], "not resolved by the incarico endpoint"),
+                                    table=unit["table"], row=unit["row"], incarico=unit["incarico"], cells=unit["cells"])
+        self.log(f"✓ Retry: {len(resolved)} of {len(units)} incarico value(s) recovered over HTTP")
+
+    def retry_modals(self, waits, incarico_cache):
+        """Click the incarico modal of the queued incarico units from a fresh search, in page order.
+
+        Each unit's row is found again by its incarico value in the page's
+        table, as the grid may have shifted since it was read.
+        """
+        units = {}
+        for unit in self.retry_queue.incarico_units():
+            units.setdefault(unit["page"], []).append(unit)
+        with self.trace.phase("search"):
+            self.open_activity_search(waits)
+        with self.trace.phase("filters"):
+            self.apply_filters(waits)
+        incarico_col = FETCH_COLUMNS.index("incarico")
+        while units:
+            current_page, total_pages = self.page_position()
+            self.total_pages = total_pages
+            if current_page in units:
+                with self.trace.phase("extract", page=current_page):
+                    raw_tables, _ = extract_page_tables(self.driver, FETCH_COLUMNS, FETCH_INDEXES)
+                rows = {raw.index: [str(cells[incarico_col]).strip() for cells in raw.rows] for raw in raw_tables}
+                extracted = {}
+                for unit in units.pop(current_page):
+                    values = rows.get(unit["table"], [])
+                    if unit["incarico"] not in values:
+                        continue
+                    row_number = values.index(unit["incarico"]) + 1
+                    try:
+                        with self.trace.phase("incarico modal"):
+                            value = self.extract_incarico_from_modal(waits, row_number)
+                    except Exception as e:
+                        self.log(f"⚠ Error extracting incarico on row {row_number}: {e}")
+                        self.record_failure("incarico", current_page, e, table=unit["table"], row=unit["row"],
+                                            incarico=unit["incarico"], cells=unit["cells"])
+                        continue
+                    if value:
+                        extracted[unit["incarico"]] = value
+                if incarico_cache:
+                    incarico_cache.put_many(extracted)
+                resolved = self.retry_queue.resolve_incarico(extracted)
+                if self.row_store and resolved:
+                    self.row_store.upsert([unit["cells"] for unit, _ in resolved], [value for _, value in resolved])
+                self.log(f"✓ Retry: {len(resolved)} incarico value(s) of page {current_page} recovered "
+                         f"from the modal")
+            if not units or current_page >= total_pages:
+                break
+            with self.trace.phase("paginate", page=current_page):
+                if not self.go_to_next_page(waits, current_page):
+                    return
+
+    def revisit_pages(self, waits, pages, incarico_cache, detail_fetcher, on_page):
+        """Collect the given pages again from a fresh search, in page order"""
+        wanted = set(pages)
+        with self.trace.phase("search"):
+            self.open_activity_search(waits)
+        with self.trace.phase("filters"):
+            self.apply_filters(waits)
+        while wanted:
+            current_page, total_pages = self.page_position()
+            self.total_pages = total_pages
+            if current_page in wanted:
+                wanted.discard(current_page)
+                self.retry_queue.clear_page(current_page)
+                try:
+                    with self.trace.phase("extract", page=current_page):
+                        tables = self.collect_page(waits, incarico_cache, page=current_page)
+                    chunk = self.finish_page(tables, incarico_cache, detail_fetcher, waits)
+                    on_page(current_page, total_pages, chunk)
+                except Exception as e:
+                    self.record_failure("page", current_page, e)
+                    raise
+                self.log(f"✓ Retry: page {current_page} collected again ({len(chunk)} rows)")
+            if not wanted or current_page >= total_pages:
+                break
+            with self.trace.phase("paginate", page=current_page):
+                if not self.go_to_next_page(waits, current_page):
+                    return
+
+        # The grid has fewer pages now: nothing is missing past its end
+        for page in wanted:
+            if page > total_pages:
+                self.retry_queue.clear_page(page)
+
+    def scrape(self, email, password, target_url, on_page=None, start_page=1, retry_only=False):
+        """Log in, apply the filters and collect every page (from the grid endpoint when set).
+
+        Returns a list holding one DataFrame of every row (empty when no row
+        was found), or None when the run failed (the reason is kept in
+        last_error). The rows are gathered in a ColumnarBuffer; when on_page
+        is given every page's ColumnarBuffer chunk goes to on_page(page,
+        total_pages, chunk) instead and the returned list stays empty. Pages
+        before start_page are skipped without extraction.
+
+        Failed units go to retry_queue (a throwaway one when none is set) and
+        are retried before the browser is released. With retry_only only the
+        queued units are collected.
+        """
+        if self.custom_range:
+            start, end = self.custom_range
+            self.log(f"Using custom date range {start:%d/%m/%Y} - {end:%d/%m/%Y}")
+        else:
+            self.log(f"Using date range option #{self.date_range_index}")
+        self.cancelled = False
+        self.stopped_early = False
+        self.total_pages = None
+        owns_trace = self.begin_trace("scrape")
+
+        try:
+            with self.trace.phase("browser"):
+                waits = self.start_browser()
+        except Exception as e:
+            self.last_error = f"Failed to start Chrome: {str(e)}"
+            self.log(self.last_error)
+            if owns_trace:
+                self.end_trace()
+            return None
+
+        detail_fetcher = None
+        incarico_cache = None
+        owns_queue = self.retry_queue is None
+        if owns_queue:
+            self.retry_queue = RetryQueue(log=self.log)
+        failed = True
+        try:
+            with self.trace.phase("login"):
+                self.ensure_session(waits, email, password, target_url)
+            with self.trace.phase("setup"):
+                incarico_cache, detail_fetcher = self.open_incarico_sources()
+                grid_client = None if retry_only else self.open_grid_client(detail_fetcher)
+            buffer = None if on_page else ColumnarBuffer()
+            if grid_client:
+                start_page = self.scrape_endpoint(grid_client, incarico_cache, detail_fetcher, on_page, start_page,
+                                                  buffer)
+            if start_page is not None and not retry_only:
+                with self.trace.phase("search"):
+                    self.open_activity_search(waits)
+                with self.trace.phase("filters"):
+                    self.apply_filters(waits)
+                self.scrape_pages(waits, incarico_cache, detail_fetcher, on_page, start_page, buffer)
+            if len(self.retry_queue) and not self.cancelled:
+                with self.trace.phase("retry"):
+                    self.retry_failures(waits, incarico_cache, detail_fetcher, on_page)
+            failed = False
+            if not buffer:
+                return []
+            with self.trace.phase("dataframe"):
+                return [self.retry_queue.patch_frame(buffer.to_frame())]
+
+        except Exception as e:
+            self.last_error = f"Automation failed: {str(e)}"
+            self.log(f" Critical error in automation: {str(e)}")
+            return None
+        finally:
+            if owns_queue:
+                self.retry_queue = None
+            waits.summary()
+            if detail_fetcher:
+                detail_fetcher.close()
+            if incarico_cache:
+                self.log(incarico_cache.stats_message())
+                incarico_cache.close()
+            # A browser left in an unknown state is not worth keeping warm
+            if failed or not self.keep_alive:
+                self.cleanup()
+            if owns_trace:
+                self.end_trace()
+
+    def run_incremental(self, email, password, target_url, save_path, retry_only=False):
+        """Sync new and changed rows into the row store, then export the range from the store"""
+        start, end = self.date_range()
+        self.row_store = RowStore(FETCH_COLUMNS, scope_for(email, target_url, FETCH_COLUMNS), log=self.log,
+                                  fallback_start=start)
+        owns_queue = self.retry_queue is None
+        if owns_queue:
+            self.retry_queue = self.open_retry_queue(email, target_url)
+        try:
+            result = self.scrape(email, password, target_url, on_page=lambda *page: None, retry_only=retry_only)
+            if result is None:
+                self.retry_queue.save()
+                return False
+            self.log(self.row_store.stats_message())
+
+            # Rows only disappear from the store when the whole range was paged through
+            if not retry_only and not self.stopped_early and not self.cancelled:
+                removed = self.row_store.prune_range(start, end)
+                if removed:
+                    self.log(f"Removed {removed} row(s) no longer listed on the portal")
+
+            with self.trace.phase("export"):
+                df = self.row_store.load_range(start, end)
+                self.log(f"Exporting {len(df)} stored row(s) for {start:%d/%m/%Y} - {end:%d/%m/%Y}")
+                if export_frames([df] if not df.empty else [], save_path, self.log, replace_range=(start, end),
+                                 partition_by=self.partition_by, report_path=self.report_path):
+                    self.rows_exported = len(df)
+
+            self.report_completeness(self.total_pages, len(df), incarico_count(df))
+            # Recovered values are already in the store
+            self.retry_queue.patches.clear()
+            self.retry_queue.save()
+            return True
+        finally:
+            self.row_store.close()
+            self.row_store = None
+            if owns_queue:
+                self.retry_queue = None
+
+    def open_journal(self, email, target_url):
+        start, end = self.date_range()
+        key = run_key(email, target_url, start, end, {"incarico_endpoint": self.incarico_endpoint})
+        journal = RunJournal(key, meta={"target_url": target_url, "start": start.isoformat(), "end": end.isoformat()},
+                             resume=self.resume, log=self.log)
+        if self.resume:
+            done = len(journal.completed_pages)
+            if done:
+                self.log(f"Resuming run: {done} page(s) already journaled, continuing at page {journal.next_page()}")
+            else:
+                self.log("No unfinished run found for these settings - starting from page 1")
+        return journal
+
+    def open_retry_queue(self, email, target_url, **meta):
+        """Retry queue of this range; a previous run's units are kept when resuming or retrying"""
+        start, end = self.date_range()
+        key = run_key(email, target_url, start, end, {"incremental": bool(self.incremental)})
+        return RetryQueue(key, meta={"target_url": target_url, "start": start.isoformat(), "end": end.isoformat(),
+                                     **meta},
+                          reset=not (self.resume or self.retry_failed), log=self.log)
+
+    def report_completeness(self, total_pages, rows, rows_with_incarico):
+        """Log how complete the export is and keep the figures in completeness"""
+        # A retry-only run may not page at all: fall back to the count of the run it retries
+        total_pages = self.retry_queue.meta["total_pages"] = total_pages or self.retry_queue.meta.get("total_pages")
+        report = self.completeness = self.retry_queue.completeness(total_pages, rows, rows_with_incarico)
+        unresolved = ", ".join(f"{count} {kind}" for kind, count in report["unresolved"].items())
+        self.log(f"{'⚠' if unresolved else '✓'} Completeness: {report['pages_complete']} of {report['pages']} "
+                 f"page(s) ({report['pages_percent']}%), {report['rows_with_incarico']} of {report['rows']} "
+                 f"row(s) with incarico ({report['incarico_percent']}%)"
+                 + (f"; unresolved: {unresolved}" if unresolved else ""))
+
+    def run(self, email, password, target_url, save_path):
+        """Scrape and export to save_path; returns False when the automation failed"""
+        owns_trace = self.begin_trace("run")
+        self.rows_exported = 0
+        self.completeness = None
+        try:
+            with self.trace.phase("run"):
+                if self.retry_failed:
+                    return self.run_retry(email, password, target_url, save_path)
+                if self.incremental:
+                    return self.run_incremental(email, password, target_url, save_path)
+                return self.run_full(email, password, target_url, save_path)
+        finally:
+            if owns_trace:
+                self.end_trace()
+
+    def run_full(self, email, password, target_url, save_path):
+        """Scrape into the run journal, then stream it to save_path"""
+        journal = self.open_journal(email, target_url)
+        self.retry_queue = self.open_retry_queue(email, target_url, journal=journal.key)
+        try:
+            total_pages = journal.meta["total_pages"]
+            if total_pages and journal.next_page() > total_pages:
+                self.log("All pages are already in the run journal - exporting without scraping")
+                result = []
+            else:
+                result = self.scrape(email, password, target_url, on_page=journal.record_page,
+                                     start_page=journal.next_page())
+            if result is None:
+                self.retry_queue.save()
+                pages = len(journal.completed_pages)
+                if pages:
+                    self.log(f"⚠ {pages} page(s) kept in the run journal; enable resume to continue from page "
+                             f"{journal.next_page()}")
+                return False
+            # A cancelled run only holds part of the range
+            self.retry_queue.meta["partial"] = self.cancelled
+            return self.export_journal(journal, save_path)
+        finally:
+            self.retry_queue = None
+
+    def run_retry(self, email, password, target_url, save_path):
+        """Re-fetch only the units the last run of this range left failing and rebuild its export"""
+        self.retry_queue = queue = self.open_retry_queue(email, target_url)
+        try:
+            if not len(queue) and not queue.patches:
+                self.log("No failed units recorded for these settings - nothing to retry")
+                return True
+            counts = ", ".join(f"{count} {kind}" for kind, count in sorted(queue.counts().items()))
+            self.log(f"Retrying the failed units of the last run: {counts or 'none left'}")
+            if self.incremental:
+                return self.run_incremental(email, password, target_url, save_path, retry_only=True)
+
+            journal_key = queue.meta.get("journal")
+            journal = RunJournal(journal_key, resume=True, log=self.log) if journal_key else None
+            if journal is None or not journal.completed_pages:
+                self.last_error = "The run journal of the last run is gone - export the whole range again"
+                self.log(f"⚠ {self.last_error}")
+                return False
+            if len(queue) and self.scrape(email, password, target_url, on_page=journal.record_page,
+                                          retry_only=True) is None:
+                queue.save()
+                return False
+            return self.export_journal(journal, save_path)
+        finally:
+            self.retry_queue = None
+
+    def export_journal(self, journal, save_path):
+        """Stream the journaled pages, with the retry patches filled in, to save_path"""
+        queue = self.retry_queue
+        partial = queue.meta.get("partial", False)
+        try:
+            with self.trace.phase("export"):
+                # A partial journal is added to a dataset, replacing nothing
+                exporter = StreamingExporter(save_path, log=self.log,
+                                             replace_range=None if partial else self.date_range(),
+                                             partition_by=self.partition_by, report_path=self.report_path)
+                with_incarico = 0
+                for _, df in journal.iter_pages():
+                    df = queue.patch_frame(df)
+                    with_incarico += incarico_count(df)
+                    exporter.write(df)
+                rows = self.rows_exported = exporter.close()
+        except Exception as ex_save:
+            self.last_error = f"Failed to save export file: {ex_save}"
+            self.log(f" {self.last_error} - the run journal is kept")
+            queue.save()
+            return False
+
+        self.report_completeness(journal.meta["total_pages"], rows, with_incarico)
+        if partial:
+            self.log(f"Exported the {rows} rows collected before the cancel; resume to continue "
+                     f"from page {journal.next_page()}")
+            queue.save()
+        elif len(queue):
+            self.log("⚠ The run journal is kept: run again with retry_failed to re-fetch only the failed units "
+                     "and rebuild the export")
+            queue.save()
+        else:
+            journal.discard()
+            queue.discard()
+        if rows:
+            self.log(f"\n All pages exported to {exporter.format.upper()}: {save_path} ({rows} rows)")
+        else:
+            self.log("⚠ No data to export.")
+        return True
+
+    def cleanup(self):
+        try:
+            if self.driver:
+                driver, self.driver = self.driver, None
+                self.logged_in_as = None
+                driver.quit()
+                self.log("Browser closed successfully.")
+        except Exception as e:
+            self.log(f"Error closing browser: {str(e)}")
@@ -0,0 +1,115 @@
+import hashlib
+import json
+import os
+import time
+from urllib.parse import urlparse
+
+from selenium.common.exceptions import WebDriverException
+
+
+DEFAULT_SESSION_DIR = os.path.join(os.path.expanduser("~"), ".cache", "web_scraping", "sessions")
+DEFAULT_MAX_AGE_SECONDS = 12 * 3600
+
+READ_STORAGE_JS = '''
+    const data = {};
+    for (let i = 0; i < window.localStorage.length; i++) {
+        const key = window.localStorage.key(i);
+        data[key] = window.localStorage.getItem(key);
+    }
+    return data;
+'''
+
+WRITE_STORAGE_JS = '''
+    const data = arguments[0];
+    Object.keys(data).forEach(function (key) { window.localStorage.setItem(key, data[key]); });
+'''
+
+
+class SessionStore:
+    """Save and restore authenticated cookies and localStorage per account and portal host"""
+
+    def __init__(self, directory=DEFAULT_SESSION_DIR, max_age_seconds=DEFAULT_MAX_AGE_SECONDS, log=print):
+        self.directory = directory
+        self.max_age_seconds = max_age_seconds
+        self.log = log
+
+    def path_for(self, email, login_url=""):
+        # The same account on another portal host has its own cookies
+        host = (urlparse(login_url).netloc or "").lower()
+        digest = hashlib.sha1(f"{email.strip().lower()}|{host}".encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.directory, f"{digest}.json")
+
+    def save(self, driver, email, login_url=""):
+        """Persist the current browser session after a successful login"""
+        try:
+            data = {
+                "saved_at": time.time(),
+                "url": driver.current_url,
+                "cookies": driver.get_cookies(),
+                "local_storage": driver.execute_script(READ_STORAGE_JS) or {},
+            }
+        except WebDriverException as e:
+            self.log(f"⚠ Could not read session for saving: {e}")
+            return False
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path_for(email, login_url)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.chmod(tmp_path, 0o600)
+        os.replace(tmp_path, path)
+        self.log(f"✓ Session saved ({len(data['cookies'])} cookie(s))")
+        return True
+
+    def restore(self, driver, email, login_url=""):
+        """Load a saved session into the browser; returns False when there is nothing usable"""
+        path = self.path_for(email, login_url)
+        if not os.path.exists(path):
+            return False
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            self.log(f"⚠ Ignoring unreadable saved session: {e}")
+            return False
+
+        if time.time() - data.get("saved_at", 0) > self.max_age_seconds:
+            self.log("Saved session is too old - logging in again")
+            self.clear(email, login_url)
+            return False
+
+        url = data.get("url")
+        if not url or not url.startswith("http"):
+            return False
+
+        try:
+            # Cookies can only be set for the domain that is currently loaded
+            driver.get(url)
+            driver.delete_all_cookies()
+            host = urlparse(url).hostname or ""
+            restored = 0
+            for cookie in data.get("cookies", []):
+                if host and not host.endswith(cookie.get("domain", host).lstrip(".")):
+                    continue
+                if "expiry" in cookie:
+                    cookie["expiry"] = int(cookie["expiry"])
+                try:
+                    driver.add_cookie(cookie)
+                    restored += 1
+                except WebDriverException:
+                    continue
+            if data.get("local_storage"):
+                driver.execute_script(WRITE_STORAGE_JS, data["local_storage"])
+        except WebDriverException as e:
+            self.log(f"⚠ Could not restore saved session: {e}")
+            return False
+
+        self.log(f"Restored {restored} cookie(s) from saved session")
+        return True
+
+    def clear(self, email, login_url=""):
+        try:
+            os.remove(self.path_for(email, login_url))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,144 @@
+import multiprocessing
+import queue
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from columnar import ColumnarBuffer
+from date_ranges import split_range
+from export import StreamingExporter
+from schema import IDENTITY_COLUMNS, pagination_mask
+from scraper import ActivityScraper
+
+
+def run_shard(shard_index, shard_range, email, password, target_url, scraper_kwargs, log_queue, cancel_event):
+    """Process pool worker: scrape one sub-range in its own headless Chrome"""
+    label = f"shard {shard_index + 1} {shard_range[0]:%d/%m}-{shard_range[1]:%d/%m}"
+
+    def log(message):
+        log_queue.put(f"[{label}] {message}")
+
+    scraper = ActivityScraper(log=log, custom_range=shard_range, cancel_event=cancel_event, **scraper_kwargs)
+    all_dfs = scraper.scrape(email, password, target_url)
+    if all_dfs is None:
+        return shard_index, None, scraper.last_error
+    if not all_dfs:
+        return shard_index, ColumnarBuffer().to_frame(), None
+    return shard_index, all_dfs[0], None
+
+
+def trim_shard(df, seen_keys):
+    """Prepare one shard for the merged export.
+
+    Drops the shard's pagination footer rows and any row that already
+    appeared in an earlier shard (multi-day activities are listed by every
+    shard they span), while duplicates inside the shard are kept. Rows are
+    matched on IDENTITY_COLUMNS, the row store's key. seen_keys holds the row
+    identities of the shards exported so far and is extended with this
+    shard's.
+    """
+    df = df.loc[~pagination_mask(df)]
+    keys = list(df[[name for name in IDENTITY_COLUMNS if name in df.columns]].itertuples(index=False, name=None))
+    keep = [key not in seen_keys for key in keys]
+    seen_keys.update(keys)
+    return df[keep]
+
+
+def run_sharded(email, password, target_url, save_path, start, end, unit="month", workers=4,
+                scraper_kwargs=None, log=print, progress=None, cancel_event=None):
+    """Scrape [start, end] split into shards across a pool of headless browsers.
+
+    Shards are numbered newest first, the order the portal grid lists rows
+    in, so the merged export is ordered like an unsharded run. Finished
+    shards are streamed to save_path in shard order as soon as every earlier
+    shard is done, so only out-of-order shards are held in memory.
+    progress(done_shards, total_shards, rows, "shard") is called as shards
+    finish. Setting cancel_event drops shards that have not started and makes
+    running ones stop at their next page boundary.
+    """
+    shards = split_range(start, end, unit)[::-1]
+    workers = max(1, min(int(workers), len(shards)))
+    log(f"Sharded run: {len(shards)} {unit} shard(s) from {start:%d/%m/%Y} to {end:%d/%m/%Y} "
+        f"on {workers} worker(s)")
+
+    scraper_kwargs = scraper_kwargs or {}
+    exporter = StreamingExporter(save_path, log=log, replace_range=(start, end),
+                                 partition_by=scraper_kwargs.get("partition_by"),
+                                 report_path=scraper_kwargs.get("report_path", ""))
+    finished = {}       # shard index -> DataFrame, or None when the shard failed
+    failed = []
+    next_shard = 0
+    seen_keys = set()
+    rows = 0
+
+    def flush_ready():
+        nonlocal next_shard
+        while next_shard in finished:
+            df = finished.pop(next_shard)
+            if df is not None and not df.empty:
+                df = trim_shard(df, seen_keys)
+                exporter.write(df)
+            next_shard += 1
+
+    # spawn keeps the Tk state of the parent out of the browser workers
+    context = multiprocessing.get_context("spawn")
+    try:
+        with context.Manager() as manager:
+            log_queue = manager.Queue()
+            shard_cancel = manager.Event()
+            cancelled = False
+
+            def drain():
+                while True:
+                    try:
+                        log(log_queue.get_nowait())
+                    except queue.Empty:
+                        return
+
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                futures = {
+                    pool.submit(run_shard, i, shard, email, password, target_url, scraper_kwargs,
+                                log_queue, shard_cancel): i
+                    for i, shard in enumerate(shards)
+                }
+                pending = set(futures)
+                while pending:
+                    done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                    drain()
+                    if cancel_event and cancel_event.is_set() and not cancelled:
+                        cancelled = True
+                        shard_cancel.set()
+                        skipped = sum(future.cancel() for future in pending)
+                        log(f"⚠ Cancelling sharded run ({skipped} shard(s) not started)")
+                    for future in done:
+                        shard_index = futures[future]
+                        df = None
+                        if future.cancelled():
+                            failed.append(shard_index)
+                        else:
+                            try:
+                                _, df, error = future.result()
+                            except Exception as e:
+                                error = f"worker crashed: {e}"
+                            if df is None:
+                                failed.append(shard_index)
+                                log(f"⚠ Shard {shard_index + 1} failed: {error}")
+                            else:
+                                rows += len(df)
+                                log(f"✓ Shard {shard_index + 1}/{len(shards)} done with {len(df)} rows")
+                        finished[shard_index] = df
+                        if progress:
+                            progress(len(shards) - len(pending), len(shards), rows, "shard")
+                    flush_ready()
+                drain()
+    finally:
+        if failed or (cancel_event and cancel_event.is_set()):
+            # Missing shards must not wipe their stored rows from a dataset
+            exporter.replace_range = None
+        written = exporter.close()
+
+    if failed:
+        log(f"⚠ {len(failed)} shard(s) missing from the export: {sorted(i + 1 for i in failed)}")
+    if written:
+        log(f"\n Merged {len(shards) - len(failed)} shard(s) into {written} rows: {save_path}")
+    else:
+        log("⚠ No data to export.")
+    return not failed
@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+# The modules import each other as top-level modules, like main.py and the CLIs run them
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_portal import MockPortal  # noqa: E402
+from schema import FETCH_INDEXES  # noqa: E402
+
+
+def fetched(rows):
+    """Mock portal grid rows cut down to the fetched columns, as extract_page_tables returns them"""
+    return [[row[i] for i in FETCH_INDEXES] for row in rows]
+
+
+@pytest.fixture
+def grid_rows():
+    return fetched(MockPortal.generate_rows(120))
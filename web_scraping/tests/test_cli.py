@@ -0,0 +1,34 @@
+from datetime import date
+
+from cli import build_parser, settings_from_args
+
+
+def settings_for(*argv):
+    return settings_from_args(build_parser().parse_args(["--url", "https://portal.example/app", "-o", "out.csv",
+                                                         *argv]))
+
+
+def test_settings_from_args_defaults():
+    settings = settings_for()
+    kwargs = settings["scraper_kwargs"]
+    assert kwargs["date_range_index"] == 1
+    assert kwargs["custom_range"] is None
+    assert kwargs["pipeline_workers"] == 2
+    assert kwargs["lean_profile"] is True
+    assert not kwargs["incremental"] and not kwargs["resume"] and not kwargs["retry_failed"]
+    assert "trace_dir" not in kwargs
+    assert not settings["sharded"]
+
+
+def test_settings_from_args_custom_range_and_options():
+    settings = settings_for("--start", "01/01/2024", "--end", "2024-03-31", "--shard", "week", "--workers", "3",
+                            "--incarico-endpoint", " https://portal.example/api/{incarico} ",
+                            "--pipeline-workers", "-1", "--full-browser", "--trace", "--trace-dir", "traces")
+    kwargs = settings["scraper_kwargs"]
+    assert kwargs["custom_range"] == (date(2024, 1, 1), date(2024, 3, 31))
+    assert settings["date_range"] == kwargs["custom_range"]
+    assert kwargs["incarico_endpoint"] == "https://portal.example/api/{incarico}"
+    assert kwargs["pipeline_workers"] == 0
+    assert kwargs["lean_profile"] is False
+    assert kwargs["instrument"] is True and kwargs["trace_dir"] == "traces"
+    assert (settings["sharded"], settings["shard_unit"], settings["shard_workers"]) == (True, "week", 3)
@@ -0,0 +1,74 @@
+import pandas as pd
+
+from checkpoint import RunJournal
+from columnar import BUFFER_COLUMNS, ColumnarBuffer
+from schema import FETCH_COLUMNS
+
+
+FOOTER = ["Pagina 1 di 3"] + [""] * (len(FETCH_COLUMNS) - 1)
+
+
+def per_table_frame(rows, extracted):
+    """What the per-table DataFrames held, cut down to the buffered columns"""
+    df = pd.DataFrame(rows, columns=FETCH_COLUMNS)
+    df["incarico_extracted"] = pd.Series(extracted, dtype=object)
+    return df[BUFFER_COLUMNS + ["incarico_extracted"]]
+
+
+def test_to_frame_matches_the_per_table_frames(grid_rows):
+    buffer = ColumnarBuffer()
+    buffer.append(grid_rows[:50] + [FOOTER], [f"value {i}" for i in range(50)] + [None])
+    buffer.append(grid_rows[50:60], [None] * 10)
+    df = buffer.to_frame()
+
+    expected = per_table_frame(grid_rows[:60], [f"value {i}" for i in range(50)] + [None] * 10)
+    assert len(buffer) == 60
+    assert list(df.columns) == BUFFER_COLUMNS + ["incarico_extracted"]
+    assert df["utente"].dtype == "category"
+    pd.testing.assert_frame_equal(df.astype(object), expected.astype(object))
+
+
+def test_missing_dictionary_cells_stay_missing(grid_rows):
+    row = list(grid_rows[0])
+    row[FETCH_COLUMNS.index("utente")] = None
+    row[FETCH_COLUMNS.index("durata")] = None
+    buffer = ColumnarBuffer()
+    buffer.append([row, grid_rows[1]], ["a", "b"])
+    df = buffer.to_frame()
+    assert pd.isna(df["utente"][0]) and df["utente"][1] == grid_rows[1][FETCH_COLUMNS.index("utente")]
+    assert df["durata"][0] is None
+
+
+def test_empty_buffer_builds_an_empty_frame():
+    df = ColumnarBuffer().to_frame()
+    assert df.empty and list(df.columns) == BUFFER_COLUMNS + ["incarico_extracted"]
+
+
+def test_extend_merges_page_chunks_with_their_own_dictionaries(grid_rows):
+    chunks = []
+    for start in (0, 50, 100):
+        chunk = ColumnarBuffer()
+        chunk.append(grid_rows[start:start + 50], [f"value {start + i}" for i in range(50)])
+        chunks.append(chunk)
+    merged = ColumnarBuffer()
+    for chunk in reversed(chunks[1:]):
+        merged.extend(chunk)
+    merged.extend(chunks[0])
+
+    expected = pd.concat([chunk.to_frame() for chunk in reversed(chunks[1:])] + [chunks[0].to_frame()],
+                         ignore_index=True)
+    pd.testing.assert_frame_equal(merged.to_frame().astype(object), expected.astype(object))
+
+
+def test_journal_stores_page_chunks(tmp_path, grid_rows):
+    journal = RunJournal("run", runs_dir=str(tmp_path), log=lambda message: None)
+    for page, start in ((1, 0), (2, 50)):
+        chunk = ColumnarBuffer()
+        chunk.append(grid_rows[start:start + 50] + [FOOTER], [None] * 51)
+        journal.record_page(page, 2, chunk)
+
+    resumed = RunJournal("run", runs_dir=str(tmp_path), resume=True, log=lambda message: None)
+    pages = list(resumed.iter_pages())
+    assert [page for page, _ in pages] == [1, 2] and resumed.meta["total_pages"] == 2
+    assert pd.concat([df for _, df in pages], ignore_index=True)["incarico"].tolist() == \
+        [row[FETCH_COLUMNS.index("incarico")] for row in grid_rows[:100]]
@@ -0,0 +1,90 @@
+import os
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from dataset import ParquetDataset
+from mock_portal import MockPortal
+from schema import FETCH_COLUMNS, apply_schema
+
+from conftest import fetched
+
+pytest.importorskip("pyarrow")
+
+JANUARY = (date(2024, 1, 1), date(2024, 1, 31))
+FEBRUARY_START = pd.Timestamp("2024-02-01")
+
+
+def typed_rows(count):
+    """Export frame of the mock portal's first rows: 246 in January 2024, then February"""
+    df = pd.DataFrame(fetched(MockPortal.generate_rows(count)), columns=FETCH_COLUMNS)
+    df["incarico_extracted"] = "x"
+    return apply_schema(df)
+
+
+def january(rows):
+    return rows.loc[rows["inizio"].lt(FEBRUARY_START)]
+
+
+def dataset_at(tmp_path, partition_by=None):
+    return ParquetDataset(str(tmp_path / "export.parquet"), partition_by=partition_by, log=lambda message: None)
+
+
+def test_commit_writes_one_partition_per_month(tmp_path):
+    dataset = dataset_at(tmp_path)
+    dataset.add(typed_rows(300))
+    assert dataset.commit() == 300
+    assert dataset.partitions() == ["2024-01", "2024-02"]
+    assert len(dataset.read()) == 300
+    assert len(dataset.read(*JANUARY)) == 246
+
+
+def test_replace_range_rewrites_only_the_touched_partitions(tmp_path):
+    dataset = dataset_at(tmp_path)
+    dataset.add(typed_rows(300))
+    dataset.commit()
+    february = dataset.partition_path("2024-02")
+    written = os.stat(february).st_mtime_ns
+
+    # January scraped again: ten activities were deleted on the portal
+    rows = january(typed_rows(300))
+    dataset.add(rows.iloc[10:])
+    dataset.commit(replace_range=JANUARY)
+
+    assert len(dataset.read(*JANUARY)) == 236
+    assert dataset.read(*JANUARY)["inizio"].min() == rows["inizio"].iloc[10]
+    assert os.stat(february).st_mtime_ns == written
+    assert len(dataset.read()) == 290
+
+
+def test_replace_range_without_rows_empties_the_range(tmp_path):
+    dataset = dataset_at(tmp_path)
+    dataset.add(typed_rows(300))
+    dataset.commit()
+    dataset.commit(replace_range=JANUARY)
+    assert dataset.partitions() == ["2024-02"]
+
+
+def test_utente_partitions_replace_stored_rows_of_the_range(tmp_path):
+    dataset = dataset_at(tmp_path, "utente")
+    rows = typed_rows(300)
+    dataset.add(rows)
+    dataset.commit()
+    users = dataset.partitions()
+    assert users == sorted(rows["utente"].astype(str).unique())
+
+    # Only one user's January rows come back; the other users' January rows are gone
+    kept = january(rows).loc[lambda df: df["utente"].astype(str).eq(users[0])]
+    dataset.add(kept)
+    dataset.commit(replace_range=JANUARY)
+    assert len(dataset.read(*JANUARY)) == len(kept)
+    assert len(dataset.read()) == len(kept) + len(rows) - len(january(rows))
+
+
+def test_partitioning_must_match_the_stored_dataset(tmp_path):
+    dataset = dataset_at(tmp_path)
+    dataset.add(typed_rows(10))
+    dataset.commit()
+    with pytest.raises(ValueError):
+        dataset_at(tmp_path, "utente")
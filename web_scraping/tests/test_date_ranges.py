@@ -0,0 +1,63 @@
+from datetime import date
+
+import pytest
+
+from date_ranges import PRESET_NAMES, parse_date, preset_range, resolve_range, split_range
+
+
+def test_split_range_by_month():
+    assert split_range(date(2024, 1, 15), date(2024, 3, 10)) == [
+        (date(2024, 1, 15), date(2024, 1, 31)),
+        (date(2024, 2, 1), date(2024, 2, 29)),
+        (date(2024, 3, 1), date(2024, 3, 10)),
+    ]
+
+
+def test_split_range_by_monday_based_week():
+    # 03/01/2024 is a Wednesday
+    assert split_range(date(2024, 1, 3), date(2024, 1, 16), "week") == [
+        (date(2024, 1, 3), date(2024, 1, 7)),
+        (date(2024, 1, 8), date(2024, 1, 14)),
+        (date(2024, 1, 15), date(2024, 1, 16)),
+    ]
+
+
+def test_split_range_single_day():
+    day = date(2024, 5, 31)
+    assert split_range(day, day) == [(day, day)]
+
+
+@pytest.mark.parametrize("start, end, unit", [
+    (date(2024, 2, 1), date(2024, 1, 1), "month"),
+    (date(2024, 1, 1), date(2024, 2, 1), "day"),
+])
+def test_split_range_rejects_bad_arguments(start, end, unit):
+    with pytest.raises(ValueError):
+        split_range(start, end, unit)
+
+
+def test_resolve_range_custom_dates():
+    start, end = date(2024, 1, 1), date(2024, 1, 31)
+    assert resolve_range(None, start, end) == (len(PRESET_NAMES) + 1, (start, end), (start, end))
+    assert resolve_range("yesterday", start) == (len(PRESET_NAMES) + 1, (start, start), (start, start))
+
+
+def test_resolve_range_preset():
+    index = PRESET_NAMES.index("previous-month") + 1
+    assert resolve_range("previous-month") == (index, None, preset_range(index))
+    assert resolve_range()[0] == 1
+
+
+@pytest.mark.parametrize("preset, start, end", [
+    ("next-month", None, None),
+    (None, date(2024, 2, 1), date(2024, 1, 1)),
+])
+def test_resolve_range_rejects_bad_arguments(preset, start, end):
+    with pytest.raises(ValueError):
+        resolve_range(preset, start, end)
+
+
+def test_parse_date_formats():
+    assert parse_date("05/03/2024") == parse_date("2024-03-05") == date(2024, 3, 5)
+    with pytest.raises(ValueError):
+        parse_date("03-05-2024")
@@ -0,0 +1,71 @@
+import pandas as pd
+import pytest
+
+from export import StreamingExporter, export_format
+from mock_portal import MockPortal
+from schema import EXPORT_COLUMNS, FETCH_COLUMNS
+
+from conftest import fetched
+
+
+def pages(count, size=50):
+    """Mock portal pages as the scraper hands them over, each with its footer row"""
+    rows = fetched(MockPortal.generate_rows(count))
+    for start in range(0, count, size):
+        df = pd.DataFrame(rows[start:start + size] + [[f"Pagina {start // size + 1} di 9"]
+                                                      + [""] * (len(FETCH_COLUMNS) - 1)], columns=FETCH_COLUMNS)
+        df["incarico_extracted"] = [f"dettaglio {i}" for i in range(start, start + len(df) - 1)] + [None]
+        yield df
+
+
+def export(path, count):
+    exporter = StreamingExporter(str(path), log=lambda message: None)
+    for df in pages(count):
+        exporter.write(df)
+    return exporter, exporter.close()
+
+
+def test_export_format_defaults_to_xlsx():
+    assert [export_format(path) for path in ("a.CSV", "b.xlsx", "c.parquet", "d.txt")] == \
+        ["csv", "xlsx", "parquet", "xlsx"]
+
+
+def test_csv_pages_round_trip_with_one_header(tmp_path):
+    path = tmp_path / "export.csv"
+    exporter, written = export(path, 120)
+    assert (exporter.format, written) == ("csv", 120)
+
+    df = pd.read_csv(path)
+    assert list(df.columns) == EXPORT_COLUMNS
+    assert len(df) == 120
+    # Footer rows are gone and the pages follow each other
+    assert not df["inizio"].astype(str).str.contains("Pagina").any()
+    assert df["incarico_extracted"].tolist() == [f"dettaglio {i}" for i in range(120)]
+    assert pd.to_datetime(df["inizio"]).notna().all()
+
+
+def test_xlsx_pages_round_trip_with_typed_cells(tmp_path):
+    path = tmp_path / "export.xlsx"
+    exporter, written = export(path, 120)
+    assert (exporter.format, written) == ("xlsx", 120)
+
+    df = pd.read_excel(path)
+    assert list(df.columns) == EXPORT_COLUMNS
+    assert len(df) == 120
+    assert df["incarico_extracted"].tolist() == [f"dettaglio {i}" for i in range(120)]
+    # Typed by the schema: real dates and booleans, not the grid's text
+    assert pd.api.types.is_datetime64_any_dtype(df["inizio"])
+    assert df["completata"].isin([True, False]).all()
+
+
+def test_an_empty_export_still_writes_a_valid_file(tmp_path):
+    path = tmp_path / "export.xlsx"
+    exporter = StreamingExporter(str(path), log=lambda message: None)
+    assert exporter.close() == 0
+    assert pd.read_excel(path).empty
+
+
+def test_writing_after_close_is_refused(tmp_path):
+    exporter, _ = export(tmp_path / "export.csv", 10)
+    with pytest.raises(ValueError):
+        exporter.write(next(pages(10)))
@@ -0,0 +1,53 @@
+from extraction import extract_page_tables, is_pagination_row, normalize_row
+
+
+class ScriptDriver:
+    """Answers execute_script with a fixed TABLE_EXTRACT_JS payload"""
+
+    def __init__(self, payload):
+        self.payload = payload
+        self.calls = []
+
+    def execute_script(self, script, *args):
+        self.calls.append(args)
+        return self.payload
+
+
+def test_normalize_row_pads_and_truncates_to_the_header_width():
+    assert normalize_row(["a"], 3) == ["a", "", ""]
+    assert normalize_row(["a", "b", "c", "d"], 3) == ["a", "b", "c"]
+    assert normalize_row(["a", "b", "c"], 3) == ["a", "b", "c"]
+
+
+def test_is_pagination_row_matches_only_the_grid_footer():
+    assert is_pagination_row(["Pagina 2 di 7", "", ""])
+    assert is_pagination_row(["", "pagina 1 di 1", "›"])
+    assert not is_pagination_row(["Pagina 2 di 7", "Mario Rossi", "Intervento"])
+    assert not is_pagination_row(["01/03/2024 09:00", "", ""])
+
+
+def test_extract_page_tables_normalizes_rows_in_one_script_call():
+    payload = [
+        {"hasTbody": True, "cellCount": 7,
+         "rows": [[" 01/03/2024 09:00 ", "Rossi", "x"], ["", "", ""], ["02/03/2024 10:00"],
+                  ["Pagina 1 di 3"]]},
+        {"hasTbody": False, "cellCount": 0, "rows": []},
+    ]
+    driver = ScriptDriver(payload)
+    tables, saved = extract_page_tables(driver, ["inizio", "utente"], columns=[0, 2])
+
+    assert driver.calls == [([0, 2],)]
+    first, second = tables
+    assert (first.index, first.has_tbody, first.raw_row_count) == (1, True, 4)
+    # Empty rows are dropped, cells stripped and every row cut or padded to the header;
+    # the footer row stays for the schema to filter
+    assert first.rows == [["01/03/2024 09:00", "Rossi"], ["02/03/2024 10:00", ""], ["Pagina 1 di 3", ""]]
+    assert (second.index, second.has_tbody, second.rows) == (2, False, [])
+    # Per table: rows lookup (twice without tbody), then one call per row and per cell
+    assert saved == (1 + 4 + 7) + (2 + 0 + 0)
+
+
+def test_extract_page_tables_reads_every_cell_without_columns():
+    driver = ScriptDriver(None)
+    assert extract_page_tables(driver, ["inizio"]) == ([], 0)
+    assert driver.calls == [(None,)]
@@ -0,0 +1,103 @@
+from datetime import date
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+import grid_api
+from grid_api import PORTAL_PAGE_ROWS, GridApiClient
+from mock_portal import MockPortal
+from schema import FETCH_COLUMNS
+
+from conftest import fetched
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+class FakeSession:
+    """Answers grid requests from a MockPortal's rows without a browser or a server.
+
+    shape: "total" as the portal does, "pages" without the row count,
+    "list" with the bare row list and no totals at all.
+    """
+
+    def __init__(self, portal, shape="total"):
+        self.portal = portal
+        self.shape = shape
+        self.pages = []
+
+    def get(self, url, timeout=None):
+        query = parse_qs(urlparse(url).query)
+        page = int(query["page"][0])
+        self.pages.append(page)
+        payload = self.portal.grid_page(page, int(query["page_size"][0]))
+        if self.shape == "pages":
+            del payload["total"]
+        elif self.shape == "list":
+            payload = payload["rows"]
+        return FakeResponse(payload)
+
+    def close(self):
+        pass
+
+
+def grid_client(monkeypatch, rows, shape="total"):
+    portal = MockPortal(rows=rows)
+    session = FakeSession(portal, shape)
+    monkeypatch.setattr(grid_api, "session_from_driver", lambda driver, pool_size: session)
+    client = GridApiClient(None, portal.grid_endpoint, (date(2024, 1, 1), date(2024, 12, 31)), FETCH_COLUMNS,
+                           log=lambda message: None)
+    return client, fetched(portal.rows), session
+
+
+@pytest.mark.parametrize("shape", ["total", "pages", "list"])
+def test_iter_pages_recuts_endpoint_pages_to_portal_pages(monkeypatch, shape):
+    # The mock portal caps the page size at 200 rows: 4 portal pages per request
+    client, rows, _ = grid_client(monkeypatch, 230, shape)
+    pages = list(client.iter_pages())
+
+    assert [page for page, _, _ in pages] == [1, 2, 3, 4, 5]
+    assert [len(chunk) for _, _, chunk in pages] == [50, 50, 50, 50, 30]
+    assert [row for _, _, chunk in pages for row in chunk] == rows
+
+
+@pytest.mark.parametrize("shape", ["total", "pages", "list"])
+def test_iter_pages_total_never_changes_during_a_run(monkeypatch, shape):
+    client, _, _ = grid_client(monkeypatch, 630, shape)
+    totals = [total for _, total, _ in client.iter_pages()]
+
+    assert totals[-1] == 13
+    assert set(totals) <= {None, 13}
+    if shape == "total":
+        assert set(totals) == {13}
+    # Once known, the count stays
+    assert None not in totals[totals.index(13):]
+
+
+def test_iter_pages_resumes_mid_request(monkeypatch):
+    client, rows, session = grid_client(monkeypatch, 630)
+    pages = list(client.iter_pages(start_page=6))
+
+    assert [page for page, _, _ in pages] == list(range(6, 14))
+    assert pages[0][2] == rows[5 * PORTAL_PAGE_ROWS:6 * PORTAL_PAGE_ROWS]
+    assert [row for _, _, chunk in pages for row in chunk] == rows[5 * PORTAL_PAGE_ROWS:]
+    # Page 1 is always read for the totals; rows 250-399 come from endpoint page 2
+    assert sorted(session.pages) == [1, 2, 3, 4]
+
+
+def test_iter_pages_stops_when_the_backend_repeats_its_last_page(monkeypatch):
+    # Two full endpoint pages and no totals: page 3 comes back as a copy of page 2
+    client, rows, _ = grid_client(monkeypatch, 400, "list")
+    pages = list(client.iter_pages())
+
+    assert len(pages) == 8
+    assert [row for _, _, chunk in pages for row in chunk] == rows
+    assert pages[-1][1] == 8
@@ -0,0 +1,91 @@
+import pytest
+import requests
+
+import incarico_api
+from incarico_api import IncaricoDetailFetcher, pick_field
+
+
+class FakeResponse:
+    def __init__(self, status, payload=None, text=""):
+        self.status_code = status
+        self.payload = payload
+        self.text = text
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} error")
+
+    def json(self):
+        if self.payload is None:
+            raise ValueError("not JSON")
+        return self.payload
+
+
+class StubSession:
+    """Detail endpoint answering from url -> FakeResponse"""
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.urls = []
+
+    def get(self, url, timeout=None):
+        self.urls.append(url)
+        return self.responses.get(url, FakeResponse(404))
+
+    def close(self):
+        pass
+
+
+def fetcher(monkeypatch, responses, **options):
+    session = StubSession(responses)
+    monkeypatch.setattr(incarico_api, "session_from_driver", lambda driver, pool_size: session)
+    return IncaricoDetailFetcher(None, "https://portal.test/incarichi/{incarico}", log=lambda message: None,
+                                 **options), session
+
+
+def test_pick_field_follows_nested_dicts_and_lists():
+    payload = {"data": {"descrizione": "Manutenzione", "righe": [{"codice": "A"}, {"codice": "B"}]}}
+    assert pick_field(payload, "data.descrizione") == "Manutenzione"
+    assert pick_field(payload, "data.righe.1.codice") == "B"
+
+
+@pytest.mark.parametrize("path", ["data.missing", "data.righe.5.codice", "data.righe.x", "data.descrizione.more"])
+def test_pick_field_returns_none_for_missing_paths(path):
+    payload = {"data": {"descrizione": "Manutenzione", "righe": [{"codice": "A"}]}}
+    assert pick_field(payload, path) is None
+
+
+def test_endpoint_template_needs_the_incarico_placeholder():
+    with pytest.raises(ValueError):
+        IncaricoDetailFetcher(None, "https://portal.test/incarichi", log=lambda message: None)
+
+
+def test_fetch_many_keeps_successes_and_records_each_failure(monkeypatch):
+    base = "https://portal.test/incarichi/"
+    client, session = fetcher(monkeypatch, {
+        base + "A%2F1": FakeResponse(200, {"data": {"descrizione": " Manutenzione "}}),
+        base + "B2": FakeResponse(200, {"data": {}}),
+        base + "C3": FakeResponse(500),
+        base + "D4": FakeResponse(200, {"data": {"descrizione": "Sopralluogo"}}),
+    }, value_field="data.descrizione", concurrency=2)
+
+    results = client.fetch_many(["A/1", "B2", "C3", "D4", "A/1"])
+
+    assert results == {"A/1": "Manutenzione", "D4": "Sopralluogo"}
+    assert sorted(client.errors) == ["B2", "C3"]
+    assert "empty detail" in client.errors["B2"]
+    assert "500" in client.errors["C3"]
+    # Each value is requested once, with the value quoted into the path
+    assert sorted(session.urls) == sorted(base + value for value in ("A%2F1", "B2", "C3", "D4"))
+
+
+def test_a_later_success_clears_the_recorded_error(monkeypatch):
+    base = "https://portal.test/incarichi/"
+    responses = {base + "A1": FakeResponse(503)}
+    client, _ = fetcher(monkeypatch, responses)
+    assert client.fetch_many(["A1"]) == {}
+    assert "A1" in client.errors
+
+    responses[base + "A1"] = FakeResponse(200, text=" Manutenzione\n")
+    assert client.fetch_many(["A1"]) == {"A1": "Manutenzione"}
+    assert client.errors == {}
@@ -0,0 +1,88 @@
+import pytest
+
+import incarico_cache as cache_module
+from incarico_cache import IncaricoCache
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "incarico.sqlite")
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controls time.time() as the cache sees it"""
+    now = {"t": 1_000_000.0}
+    monkeypatch.setattr(cache_module.time, "time", lambda: now["t"])
+    return now
+
+
+def open_cache(cache_path, **options):
+    return IncaricoCache(cache_path, log=lambda message: None, **options)
+
+
+def test_values_expire_after_the_ttl(cache_path, clock):
+    cache = open_cache(cache_path, ttl_seconds=60)
+    cache.put_many({"A1": "alpha", "B2": "beta"})
+    clock["t"] += 30
+    cache.put("B2", "beta again")
+    clock["t"] += 40
+    assert cache.get_many(["A1", "B2"]) == {"B2": "beta again"}
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # Expired rows are deleted when the cache is opened again
+    cache.close()
+    cache = open_cache(cache_path, ttl_seconds=60)
+    assert cache.evictions == 1
+    assert cache.conn.execute("SELECT incarico FROM incarico_cache").fetchall() == [("B2",)]
+    cache.close()
+
+
+def test_least_recently_used_values_are_evicted_over_max_entries(cache_path, clock):
+    cache = open_cache(cache_path, max_entries=2)
+    cache.put("A1", "alpha")
+    clock["t"] += 1
+    cache.put("B2", "beta")
+    clock["t"] += 1
+    assert cache.get_many(["A1"]) == {"A1": "alpha"}
+    clock["t"] += 1
+    cache.put("C3", "gamma")
+    assert cache.evictions == 1
+    assert cache.get_many(["A1", "B2", "C3"]) == {"A1": "alpha", "C3": "gamma"}
+    cache.close()
+
+
+def test_refresh_ignores_cached_values_but_stores_fresh_ones(cache_path):
+    cache = open_cache(cache_path)
+    cache.put("A1", "old")
+    cache.close()
+
+    cache = open_cache(cache_path, mode="refresh")
+    assert cache.get_many(["A1"]) == {}
+    cache.put("A1", "new")
+    cache.close()
+
+    cache = open_cache(cache_path)
+    assert cache.get_many(["A1"]) == {"A1": "new"}
+    cache.close()
+
+
+def test_bypass_does_not_touch_the_cache(cache_path, clock):
+    cache = open_cache(cache_path, ttl_seconds=60)
+    cache.put("A1", "alpha")
+    cache.close()
+    clock["t"] += 120
+
+    cache = open_cache(cache_path, ttl_seconds=60, mode="bypass")
+    assert cache.get_many(["A1"]) == {}
+    cache.put("B2", "beta")
+    assert cache.evictions == 0
+    rows = cache.conn.execute("SELECT incarico FROM incarico_cache").fetchall()
+    cache.close()
+    # The expired entry is still there and nothing new was stored
+    assert rows == [("A1",)]
+
+
+def test_unknown_mode_is_rejected(cache_path):
+    with pytest.raises(ValueError):
+        open_cache(cache_path, mode="sometimes")
@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+import instrumentation
+from instrumentation import NULL_TRACE, RunTrace
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """perf_counter as the trace sees it, in seconds"""
+    now = {"t": 100.0}
+    monkeypatch.setattr(instrumentation.time, "perf_counter", lambda: now["t"])
+    return now
+
+
+def span(trace, clock, name, seconds, cat="phase", **args):
+    with trace.phase(name, cat=cat, **args):
+        clock["t"] += seconds
+
+
+def recorded_trace(clock):
+    trace = RunTrace("test")
+    span(trace, clock, "login", 1.0)
+    with trace.phase("page 1", cat="page", page=1):
+        span(trace, clock, "grid footer", 0.5, cat="wait")
+        span(trace, clock, "extract", 0.25)
+    span(trace, clock, "page 2", 1.25, cat="page", page=2)
+    trace.on_command("w3cExecuteScript", clock["t"], clock["t"] + 0.5)
+    trace.on_command("findElements", clock["t"], clock["t"] + 0.25)
+    trace.count("pages", 2)
+    clock["t"] += 1.0
+    return trace
+
+
+def test_summary_splits_waiting_from_working_time(clock):
+    summary = recorded_trace(clock).summary()
+    assert summary["wall_seconds"] == 4.0
+    assert (summary["waiting_seconds"], summary["working_seconds"]) == (0.5, 3.5)
+    assert summary["webdriver_seconds"] == 0.75
+    assert (summary["pages"], summary["page_seconds_mean"], summary["page_seconds_max"]) == (2, 1.0, 1.25)
+    assert summary["counters"] == {"pages": 2, "webdriver_commands": 2, "execute_script_calls": 1}
+    # Phases by time spent; waits are named after their category
+    assert summary["phases"] == {"login": {"count": 1, "seconds": 1.0},
+                                 "wait:grid footer": {"count": 1, "seconds": 0.5},
+                                 "extract": {"count": 1, "seconds": 0.25}}
+
+
+def test_write_produces_a_chrome_trace_with_the_summary(clock, tmp_path):
+    trace = recorded_trace(clock)
+    with open(trace.write(path=str(tmp_path / "trace.json")), encoding="utf-8") as f:
+        data = json.load(f)
+
+    events = data["traceEvents"]
+    metadata = [event for event in events if event["ph"] == "M"]
+    spans = [event for event in events if event["ph"] == "X"]
+    assert [event["args"]["name"] for event in metadata] == ["main"]
+    assert [event["name"] for event in spans] == ["login", "grid footer", "extract", "page 1", "page 2",
+                                                  "w3cExecuteScript", "findElements"]
+    page_one = spans[3]
+    # Microseconds from the trace origin
+    assert (page_one["ts"], page_one["dur"], page_one["cat"], page_one["args"]) == (1e6, 0.75e6, "page", {"page": 1})
+    assert data["displayTimeUnit"] == "ms"
+    assert data["otherData"]["waiting_seconds"] == 0.5
+
+
+def test_null_trace_records_nothing():
+    with NULL_TRACE.phase("anything", page=1):
+        pass
+    NULL_TRACE.count("pages")
+    assert not NULL_TRACE.enabled
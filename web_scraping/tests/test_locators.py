@@ -0,0 +1,76 @@
+import json
+
+import pytest
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+
+from locators import LocatorEngine, locator_key
+
+
+PAGE = "portal.test/search"
+CANDIDATES = [(By.XPATH, "/html/body/div[10]/span"), (By.CSS_SELECTOR, "span.menu"), (By.ID, "menu")]
+
+
+class ScriptDriver:
+    """Answers RESOLVE_JS like a page where only the candidates in present exist"""
+
+    def __init__(self, present):
+        self.present = present
+        self.calls = []
+
+    def execute_script(self, script, candidates, preferred, clickable):
+        self.calls.append(dict(preferred))
+        order = list(range(len(candidates)))
+        first = preferred.get(PAGE)
+        if first:
+            order.insert(0, order.pop(first))
+        for i in order:
+            if tuple(candidates[i]) in self.present:
+                return [i, f"element {i}", PAGE]
+        return None
+
+
+def engine(tmp_path, driver):
+    return LocatorEngine(driver, path=str(tmp_path / "locators.json"), poll_frequency=0.01,
+                         log=lambda message: None)
+
+
+def test_a_fallback_match_is_saved_and_tried_first_next_time(tmp_path):
+    driver = ScriptDriver({CANDIDATES[1], CANDIDATES[2]})
+    match = engine(tmp_path, driver).find("activity menu", CANDIDATES)
+    assert (match.element, match.index) == ("element 1", 1)
+    assert driver.calls == [{}]
+
+    with open(tmp_path / "locators.json", encoding="utf-8") as f:
+        assert json.load(f) == {"activity menu": {PAGE: locator_key(CANDIDATES[1])}}
+
+    # A new engine reads the saved preference and sends it with the probe
+    driver = ScriptDriver({CANDIDATES[0], CANDIDATES[1]})
+    match = engine(tmp_path, driver).find("activity menu", CANDIDATES)
+    assert match.index == 1
+    assert driver.calls == [{PAGE: 1}]
+
+
+def test_the_preference_follows_the_candidate_when_the_list_is_reordered(tmp_path):
+    engine(tmp_path, ScriptDriver({CANDIDATES[2]})).find("activity menu", CANDIDATES)
+    driver = ScriptDriver({CANDIDATES[2]})
+    reordered = [CANDIDATES[2], CANDIDATES[0], CANDIDATES[1]]
+    assert engine(tmp_path, driver).find("activity menu", reordered).index == 0
+    assert driver.calls == [{PAGE: 0}]
+
+
+def test_a_corrupt_cache_file_is_ignored_and_replaced(tmp_path):
+    (tmp_path / "locators.json").write_text("{not json", encoding="utf-8")
+    driver = ScriptDriver({CANDIDATES[2]})
+    locators = engine(tmp_path, driver)
+    assert locators.cache == {}
+    assert locators.find("activity menu", CANDIDATES).index == 2
+    with open(tmp_path / "locators.json", encoding="utf-8") as f:
+        assert json.load(f) == {"activity menu": {PAGE: locator_key(CANDIDATES[2])}}
+
+
+def test_find_times_out_when_no_candidate_matches(tmp_path):
+    driver = ScriptDriver(set())
+    with pytest.raises(TimeoutException, match="activity menu"):
+        engine(tmp_path, driver).find("activity menu", CANDIDATES, timeout=0.05)
+    assert not (tmp_path / "locators.json").exists()
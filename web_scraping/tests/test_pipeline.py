@@ -0,0 +1,81 @@
+import random
+import threading
+import time
+
+import pytest
+
+from pipeline import PagePipeline
+
+
+def run_pages(workers, pages=20, depth=3):
+    written = []
+    threads = set()
+
+    def process(page, payload):
+        threads.add(threading.current_thread().name)
+        # Later pages finish first more often than not
+        time.sleep(random.uniform(0, 0.005))
+        return payload * 2
+
+    pipeline = PagePipeline(process, lambda page, result: written.append((page, result)), workers=workers,
+                            depth=depth)
+    for page in range(1, pages + 1):
+        pipeline.put(page, page)
+    pipeline.close()
+    return written, threads
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_pages_are_written_in_put_order(workers):
+    written, threads = run_pages(workers)
+    assert written == [(page, page * 2) for page in range(1, 21)]
+    assert threading.current_thread().name not in threads
+
+
+def test_no_workers_runs_both_stages_inline():
+    written, threads = run_pages(0, pages=3)
+    assert written == [(1, 2), (2, 4), (3, 6)]
+    assert threads == {threading.current_thread().name}
+
+
+def test_inline_write_happens_inside_put():
+    written = []
+    pipeline = PagePipeline(lambda page, payload: payload, lambda page, result: written.append(page), workers=0)
+    pipeline.put(1, None)
+    assert written == [1]
+    pipeline.close()
+
+
+def test_put_blocks_while_the_writer_is_behind():
+    release = threading.Event()
+    pipeline = PagePipeline(lambda page, payload: payload, lambda page, result: release.wait(), workers=1, depth=2)
+    put = []
+
+    def producer():
+        for page in range(1, 6):
+            pipeline.put(page, page)
+            put.append(page)
+
+    thread = threading.Thread(target=producer, daemon=True)
+    thread.start()
+    time.sleep(0.1)
+    # One page held by the writer, depth pages queued, the next put() waiting
+    assert len(put) == 3
+    release.set()
+    thread.join(1)
+    pipeline.close()
+    assert put == [1, 2, 3, 4, 5]
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_stage_errors_are_raised_to_the_browser_thread(workers):
+    def process(page, payload):
+        if page == 2:
+            raise RuntimeError("page 2 broke")
+        return payload
+
+    pipeline = PagePipeline(process, lambda page, result: None, workers=workers)
+    pipeline.put(1, 1)
+    with pytest.raises(RuntimeError, match="page 2 broke"):
+        pipeline.put(2, 2)
+        pipeline.close()
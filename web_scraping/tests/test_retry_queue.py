@@ -0,0 +1,63 @@
+import pandas as pd
+import pytest
+
+from retry_queue import RetryQueue, incarico_count
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return RetryQueue("run", retry_dir=str(tmp_path), log=lambda message: None)
+
+
+def frame(incarico, extracted):
+    return pd.DataFrame({"incarico": incarico, "incarico_extracted": pd.Series(extracted, dtype=object)})
+
+
+def test_patch_frame_fills_only_missing_values(queue):
+    queue.add("incarico", 1, "timeout", table=1, row=0, incarico="INC-1")
+    queue.add("incarico", 1, "timeout", table=1, row=2, incarico="INC-3")
+    resolved = queue.resolve_incarico({"INC-1": "Recovered 1"})
+    assert [unit["incarico"] for unit, _ in resolved] == ["INC-1"]
+    assert len(queue) == 1
+
+    df = frame([" INC-1 ", "INC-2", "INC-1", "INC-3"], [None, "Kept", "Already there", None])
+    patched = queue.patch_frame(df)
+    assert patched["incarico_extracted"].tolist() == ["Recovered 1", "Kept", "Already there", None]
+    assert df["incarico_extracted"].tolist()[0] is None
+
+
+def test_patch_frame_without_patches_returns_the_frame(queue):
+    df = frame(["INC-1"], [None])
+    assert queue.patch_frame(df) is df
+
+
+def test_completeness_counts_rows_with_an_incarico_value(queue):
+    queue.add("incarico", 1, "timeout", table=1, row=0, incarico="INC-1")
+    queue.add("table", 2, "stale element", table=1)
+    queue.add_pages([4, 5], "pagination stopped at page 3")
+    # Two of the five rows have no incarico on the portal at all
+    df = frame(["INC-1", "INC-2", "", "INC-4", ""], [None, "Two", None, "Four", None])
+
+    report = queue.completeness(5, len(df), incarico_count(df))
+    assert report["pages_complete"] == 2 and report["pages_percent"] == 40.0
+    assert report["rows_with_incarico"] == 2 and report["incarico_percent"] == 40.0
+    assert report["unresolved"] == {"incarico": 1, "table": 1, "page": 2}
+
+
+def test_completeness_of_an_empty_run(queue):
+    report = queue.completeness(None, 0, 0)
+    assert (report["pages"], report["pages_percent"], report["incarico_percent"]) == (0, 100.0, 100.0)
+
+
+def test_queue_survives_a_save_until_empty(queue, tmp_path):
+    queue.add("incarico", 1, "timeout", table=1, row=0, incarico="INC-1", cells=["a", "b"])
+    queue.add("incarico", 1, "timeout again", table=1, row=0, incarico="INC-1", cells=["a", "b"])
+    queue.save()
+
+    reloaded = RetryQueue("run", retry_dir=str(tmp_path), log=lambda message: None)
+    assert reloaded.incarico_units()[0]["attempts"] == 2
+    assert RetryQueue("run", retry_dir=str(tmp_path), reset=True).units == {}
+
+    reloaded.clear_page(1)
+    reloaded.save()
+    assert not (tmp_path / "run.json").exists()
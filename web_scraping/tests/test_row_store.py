@@ -0,0 +1,72 @@
+from datetime import date
+
+import pytest
+
+from row_store import RowStore
+from schema import FETCH_COLUMNS
+
+
+INIZIO = FETCH_COLUMNS.index("inizio")
+NOTE = FETCH_COLUMNS.index("note in report")
+
+# The mock portal's first rows start on 01/01/2024, three hours apart
+JANUARY = (date(2024, 1, 1), date(2024, 1, 31))
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = RowStore(FETCH_COLUMNS, "scope", path=str(tmp_path / "rows.sqlite"), log=lambda message: None,
+                     fallback_start=JANUARY[0])
+    yield store
+    store.close()
+
+
+def reopen(store):
+    """A second sync of the same scope"""
+    return RowStore(FETCH_COLUMNS, store.scope, path=store.path, log=store.log, fallback_start=JANUARY[0])
+
+
+def test_classify_new_changed_unchanged_and_footer(store, grid_rows):
+    rows = grid_rows[:3]
+    store.upsert(rows, ["A", "B", "C"])
+    changed = list(rows[1])
+    changed[NOTE] = "edited"
+    footer = ["Pagina 1 di 1"] + [""] * (len(FETCH_COLUMNS) - 1)
+
+    statuses = store.classify([rows[0], changed, grid_rows[3], footer])
+    assert statuses == [("unchanged", "A"), ("changed", None), ("new", None), ("footer", None)]
+    assert store.counts == {"new": 1, "changed": 1, "unchanged": 1}
+
+
+def test_upsert_updates_rows_in_place(store, grid_rows):
+    store.upsert(grid_rows[:2], ["A", None])
+    store.upsert(grid_rows[1:2], ["B"])
+    df = store.load_range(*JANUARY)
+    assert len(df) == 2
+    assert sorted(df["incarico_extracted"]) == ["A", "B"]
+
+
+def test_prune_range_removes_only_unseen_rows_in_range(store, grid_rows):
+    store.upsert(grid_rows[:4], [None] * 4)
+    second = reopen(store)
+    try:
+        second.classify(grid_rows[:2])
+        assert second.prune_range(*JANUARY) == 2
+        assert len(second.load_range(*JANUARY)) == 2
+        assert second.prune_range(date(2023, 1, 1), date(2023, 12, 31)) == 0
+    finally:
+        second.close()
+
+
+def test_unparsable_inizio_is_filed_under_the_range_start(store, grid_rows):
+    row = list(grid_rows[0])
+    row[INIZIO] = "n/d"
+    store.upsert([row], ["A"])
+    assert store.load_range(*JANUARY)["inizio"].tolist() == ["n/d"]
+
+    second = reopen(store)
+    try:
+        second.classify(grid_rows[1:2])
+        assert second.prune_range(*JANUARY) == 1
+    finally:
+        second.close()
@@ -0,0 +1,111 @@
+import json
+import time
+from datetime import date
+
+import pytest
+
+from scheduler import JOB_OPTIONS, HostRateLimiter, Job, JobScheduler, load_config
+
+
+def test_rate_limiter_spaces_requests_per_host():
+    limiter = HostRateLimiter({"slow.example": 1200, "default": 0})
+    started = time.monotonic()
+    for _ in range(3):
+        limiter.acquire("https://slow.example/page")
+    assert time.monotonic() - started >= 0.1 - 0.01
+    started = time.monotonic()
+    for _ in range(10):
+        limiter.acquire("https://other.example/page")
+    assert time.monotonic() - started < 0.05
+
+
+def test_rate_limiter_default_rate_and_intervals():
+    limiter = HostRateLimiter({"default": 30, "fast.example": 0})
+    assert limiter.interval("any.example") == 2.0
+    assert limiter.interval("fast.example") == 0.0
+    assert HostRateLimiter().interval("any.example") == 0.0
+
+
+def write_config(tmp_path, **config):
+    config = {"accounts": {"main": {"email": "user@example.com", "password": "secret"}},
+              "jobs": [{"account": "main", "target_url": "https://portal.example/app", "output": "out.xlsx"}],
+              **config}
+    path = tmp_path / "jobs.json"
+    path.write_text(json.dumps(config), encoding="utf-8")
+    return str(path)
+
+
+def test_load_config_merges_defaults(tmp_path):
+    path = write_config(tmp_path, defaults={"range": "previous-month", "options": {"incremental": True}},
+                        jobs=[{"account": "main", "target_url": "https://portal.example/app", "output": "a.xlsx"},
+                              {"name": "custom", "account": "main", "target_url": "https://portal.example/app",
+                               "output": "b.csv", "start": "01/01/2024", "options": {"incremental": False}}],
+                        workers=3)
+    jobs, credentials, options = load_config(path)
+    assert credentials == {"main": ("user@example.com", "secret")}
+    assert [job.name for job in jobs] == ["job-1", "custom"]
+    assert jobs[0].settings["date_range_index"] == 6 and jobs[0].settings["incremental"] is True
+    assert jobs[1].settings["custom_range"] is not None and jobs[1].settings["incremental"] is False
+    assert jobs[0].output == str(tmp_path / "a.xlsx")
+    assert options["workers"] == 3
+
+
+def test_load_config_resolves_report_paths_against_the_config_file(tmp_path):
+    report = str(tmp_path / "elsewhere" / "report.csv")
+    path = write_config(tmp_path, defaults={"options": {"report_path": "reports/range.xlsx"}},
+                        jobs=[{"account": "main", "target_url": "https://portal.example/app", "output": "a.parquet"},
+                              {"account": "main", "target_url": "https://portal.example/app", "output": "b.parquet",
+                               "options": {"report_path": report}}])
+    jobs, _, _ = load_config(path)
+    assert jobs[0].settings["report_path"] == str(tmp_path / "reports" / "range.xlsx")
+    assert jobs[1].settings["report_path"] == report
+
+
+@pytest.mark.parametrize("config, message", [
+    ({"jobs": []}, "no jobs"),
+    ({"jobs": [{"account": "other", "target_url": "https://portal.example/app", "output": "a.xlsx"}]},
+     "unknown account"),
+    ({"jobs": [{"account": "main", "output": "a.xlsx"}]}, "target_url and output are required"),
+    ({"jobs": [{"account": "main", "target_url": "https://portal.example/app", "output": "a.xlsx",
+                "options": {"headless": False}}]}, "unknown option"),
+    ({"jobs": [{"account": "main", "target_url": "https://portal.example/app", "output": "a.xlsx",
+                "range": "next-week"}]}, "unknown date range"),
+    ({"accounts": {"main": {"email": "user@example.com"}}}, "missing email or password"),
+])
+def test_load_config_rejects_invalid_configs(tmp_path, config, message):
+    with pytest.raises(ValueError, match=message):
+        load_config(write_config(tmp_path, **config))
+
+
+class FakeScraper:
+    """Stands in for a warm keep_alive ActivityScraper: records the settings of every job"""
+
+    def __init__(self):
+        self.configured = []
+        self.log = None
+        self.cancelled = False
+        self.rows_exported = 0
+        self.completeness = None
+        self.last_error = None
+
+    def configure(self, **settings):
+        self.configured.append(settings)
+
+    def run(self, email, password, target_url, save_path):
+        return True
+
+
+def test_job_options_do_not_carry_over_to_the_next_job():
+    def job(name, **settings):
+        return Job(name, "main", "https://portal.example/app", f"{name}.xlsx", (date(2024, 1, 1), date(2024, 1, 1)),
+                   {"date_range_index": 1, "custom_range": None, **settings})
+
+    scheduler = JobScheduler([], {"main": ("user@example.com", "secret")}, log=lambda message: None)
+    scraper = FakeScraper()
+    scheduler.run_job(job("a", incremental=True, retry_failed=True, report_path="a.csv"), scraper)
+    scheduler.run_job(job("b"), scraper)
+
+    first, second = scraper.configured
+    assert first["incremental"] and first["retry_failed"] and first["report_path"] == "a.csv"
+    assert set(JOB_OPTIONS) <= set(second)
+    assert not second["incremental"] and not second["retry_failed"] and second["report_path"] == ""
@@ -0,0 +1,48 @@
+import pandas as pd
+
+from schema import (CHECKBOX_CHECKED, EXPORT_COLUMNS, FETCH_COLUMNS, apply_schema, pagination_mask,
+                    parse_datetimes, parse_decimals, parse_timedeltas)
+
+
+def test_parse_datetimes_tries_every_grid_format():
+    parsed = parse_datetimes(pd.Series(["05/03/2024 08:30", "05/03/2024", "2024-03-05 08:30:15", "", None, "n/d"]))
+    assert parsed.tolist()[:3] == [pd.Timestamp("2024-03-05 08:30"), pd.Timestamp("2024-03-05"),
+                                   pd.Timestamp("2024-03-05 08:30:15")]
+    assert parsed[3:].isna().all()
+
+
+def test_parse_timedeltas():
+    parsed = parse_timedeltas(pd.Series(["1:30", "2:00:15", "1h 30m", "", "n/d"]))
+    assert parsed.tolist()[:3] == [pd.Timedelta(minutes=90), pd.Timedelta(hours=2, seconds=15),
+                                   pd.Timedelta(minutes=90)]
+    assert parsed[3:].isna().all()
+
+
+def test_parse_decimals_reads_italian_amounts():
+    parsed = parse_decimals(pd.Series(["1.234,56 €", "-12,5", "0,00 €", ""]))
+    assert parsed.tolist()[:3] == [1234.56, -12.5, 0.0]
+    assert pd.isna(parsed[3])
+
+
+def test_pagination_mask_matches_only_the_footer(grid_rows):
+    footer = ["Pagina 2 di 7", "‹ ›"] + [""] * (len(FETCH_COLUMNS) - 2)
+    note = list(grid_rows[0])
+    note[FETCH_COLUMNS.index("note in report")] = "Pagina 2 di 7"
+    df = pd.DataFrame([grid_rows[1], footer, note], columns=FETCH_COLUMNS)
+    assert pagination_mask(df).tolist() == [False, True, False]
+    assert pagination_mask(pd.DataFrame(columns=FETCH_COLUMNS)).empty
+
+
+def test_apply_schema_drops_footer_and_types_the_export_columns(grid_rows):
+    footer = ["Pagina 1 di 1"] + [""] * (len(FETCH_COLUMNS) - 1)
+    df = pd.DataFrame(grid_rows[:2] + [footer], columns=FETCH_COLUMNS)
+    df["incarico_extracted"] = ["A", None, None]
+
+    typed = apply_schema(df)
+    assert list(typed.columns) == EXPORT_COLUMNS
+    assert len(typed) == 2
+    assert str(typed["inizio"].dtype).startswith("datetime64")
+    assert str(typed["durata"].dtype).startswith("timedelta64")
+    assert typed["utente"].dtype == "category"
+    completata = [row[FETCH_COLUMNS.index("completata")] == CHECKBOX_CHECKED for row in grid_rows[:2]]
+    assert typed["completata"].tolist() == completata
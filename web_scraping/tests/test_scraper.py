@@ -0,0 +1,161 @@
+import threading
+
+import scraper as scraper_module
+from columnar import ColumnarBuffer
+from extraction import ExtractedTable
+from retry_queue import RetryQueue
+from schema import FETCH_COLUMNS
+from scraper import ActivityScraper
+
+
+INCARICO = FETCH_COLUMNS.index("incarico")
+
+
+class FakeDetailFetcher:
+    """Incarico endpoint that knows only some of the values"""
+
+    def __init__(self, known):
+        self.known = known
+        self.errors = {}
+
+    def fetch_many(self, values):
+        return {value: self.known[value] for value in values if value in self.known}
+
+
+def quiet_scraper(**settings):
+    scraper = ActivityScraper(log=lambda message: None, persist_session=False, **settings)
+    scraper.retry_queue = RetryQueue(log=scraper.log)
+    return scraper
+
+
+def serve_tables(monkeypatch, pages):
+    """extract_page_tables answers with pages[current page] of the fake grid"""
+    current = {"page": 1}
+    monkeypatch.setattr(scraper_module, "extract_page_tables",
+                        lambda driver, header, columns: ([ExtractedTable(1, True, len(pages[current["page"]]),
+                                                                         pages[current["page"]])], 0))
+    return current
+
+
+def test_inline_pages_fall_back_to_the_modal_for_endpoint_misses(monkeypatch, grid_rows):
+    rows = grid_rows[:3]
+    serve_tables(monkeypatch, {1: rows})
+    scraper = quiet_scraper()
+    clicked = []
+
+    def modal(waits, row_number):
+        clicked.append(row_number)
+        return f"modal {row_number}"
+
+    monkeypatch.setattr(scraper, "extract_incarico_from_modal", modal)
+    fetcher = FakeDetailFetcher({rows[0][INCARICO]: "endpoint 1", rows[2][INCARICO]: "endpoint 3"})
+
+    tables = scraper.collect_page(object(), None, fetcher, page=1)
+    df = scraper.finish_page(tables, None, fetcher, waits=object()).to_frame()
+    assert df["incarico_extracted"].tolist() == ["endpoint 1", "modal 2", "endpoint 3"]
+    assert clicked == [2]
+    assert not len(scraper.retry_queue)
+
+
+class BlockingFetcher(FakeDetailFetcher):
+    """Endpoint whose page 1 answer only comes once page 2 has been read"""
+
+    def __init__(self, known, page_one, page_two_read):
+        super().__init__(known)
+        self.page_one = set(page_one)
+        self.page_two_read = page_two_read
+        self.overlapped = None
+
+    def fetch_many(self, values):
+        values = list(values)
+        if self.page_one & set(values):
+            self.overlapped = self.page_two_read.wait(5)
+        return super().fetch_many(values)
+
+
+def test_endpoint_fetch_of_a_page_overlaps_collecting_the_next(monkeypatch, grid_rows):
+    pages = {1: grid_rows[:50], 2: grid_rows[50:100]}
+    current = serve_tables(monkeypatch, pages)
+    page_two_read = threading.Event()
+    real_extract = scraper_module.extract_page_tables
+
+    def extract(driver, header, columns):
+        if current["page"] == 2:
+            page_two_read.set()
+        return real_extract(driver, header, columns)
+
+    monkeypatch.setattr(scraper_module, "extract_page_tables", extract)
+    scraper = quiet_scraper(pipeline_workers=2, pipeline_depth=2)
+    monkeypatch.setattr(scraper, "page_position", lambda timeout=10: (current["page"], 2))
+
+    def next_page(waits, page):
+        current["page"] = page + 1
+        return True
+
+    monkeypatch.setattr(scraper, "go_to_next_page", next_page)
+    rows = grid_rows[:100]
+    fetcher = BlockingFetcher({row[INCARICO]: f"endpoint {i}" for i, row in enumerate(rows)},
+                              [row[INCARICO] for row in pages[1]], page_two_read)
+    written = []
+    scraper.scrape_pages(object(), None, fetcher, on_page=lambda page, total, chunk: written.append(
+        (page, chunk.to_frame())))
+
+    # The browser read page 2 while the page 1 fetch was still running
+    assert fetcher.overlapped is True
+    assert [page for page, _ in written] == [1, 2]
+    assert written[0][1]["incarico_extracted"].tolist() == [f"endpoint {i}" for i in range(50)]
+    assert not len(scraper.retry_queue)
+
+
+def test_pipelined_endpoint_misses_get_the_modal_in_the_retry_pass(monkeypatch, grid_rows):
+    rows = grid_rows[:4]
+    current = serve_tables(monkeypatch, {1: rows})
+    scraper = quiet_scraper(pipeline_workers=2)
+    monkeypatch.setattr(scraper, "page_position", lambda timeout=10: (current["page"], 1))
+    monkeypatch.setattr(scraper, "open_activity_search", lambda waits: None)
+    monkeypatch.setattr(scraper, "apply_filters", lambda waits: None)
+    monkeypatch.setattr(scraper_module, "RETRY_BACKOFF_SECONDS", 0)
+    clicked = []
+
+    def modal(waits, row_number):
+        clicked.append(row_number)
+        return f"modal {row_number}"
+
+    monkeypatch.setattr(scraper, "extract_incarico_from_modal", modal)
+    fetcher = FakeDetailFetcher({rows[0][INCARICO]: "endpoint 1", rows[1][INCARICO]: "endpoint 2"})
+    buffer = ColumnarBuffer()
+    scraper.scrape_pages(object(), None, fetcher, buffer=buffer)
+    assert {unit["row"] for unit in scraper.retry_queue.incarico_units()} == {2, 3}
+    # No modal while the page was read: the browser moved on without waiting for the endpoint
+    assert clicked == []
+
+    # The grid shifted by a row before the retry: the units are found by their incarico value
+    current["page"] = 1
+    serve_tables(monkeypatch, {1: [grid_rows[10]] + rows})
+    scraper.retry_failures(object(), None, fetcher, on_page=None)
+    assert clicked == [4, 5]
+    assert not len(scraper.retry_queue)
+    df = scraper.retry_queue.patch_frame(buffer.to_frame())
+    assert df["incarico_extracted"].tolist() == ["endpoint 1", "endpoint 2", "modal 4", "modal 5"]
+
+
+class FakeElement:
+    def __init__(self, text):
+        self.text = text
+
+
+class SlowFooterDriver:
+    """Renders the grid footer only after a few lookups, like a slow grid"""
+
+    def __init__(self, texts):
+        self.texts = list(texts)
+
+    def find_elements(self, by, value):
+        text = self.texts.pop(0) if len(self.texts) > 1 else self.texts[0]
+        return [FakeElement(text)] if text is not None else []
+
+
+def test_page_position_waits_for_the_footer_to_render():
+    scraper = ActivityScraper(log=lambda message: None, persist_session=False)
+    scraper.driver = SlowFooterDriver([None, "Pagina", "Pagina 2 di 7"])
+    assert scraper.page_position(timeout=5) == (2, 7)
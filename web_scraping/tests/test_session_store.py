@@ -0,0 +1,9 @@
+from session_store import SessionStore
+
+
+def test_session_path_depends_on_account_and_login_host(tmp_path):
+    store = SessionStore(directory=str(tmp_path), log=lambda message: None)
+    path = store.path_for("user@example.com", "https://one.example/login")
+    assert path == store.path_for(" User@Example.com ", "https://ONE.example/auth/login")
+    assert path != store.path_for("user@example.com", "https://two.example/login")
+    assert path != store.path_for("other@example.com", "https://one.example/login")
@@ -0,0 +1,62 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import pandas as pd
+
+import sharding
+from schema import FETCH_COLUMNS
+from sharding import trim_shard
+
+
+def shard_frame(rows):
+    return pd.DataFrame(rows, columns=FETCH_COLUMNS)
+
+
+def footer(page, pages):
+    return [f"Pagina {page} di {pages}"] + [""] * (len(FETCH_COLUMNS) - 1)
+
+
+def test_trim_shard_drops_footer_rows(grid_rows):
+    df = trim_shard(shard_frame(grid_rows[:3] + [footer(1, 1)]), set())
+    assert len(df) == 3
+
+
+def test_trim_shard_drops_rows_of_any_earlier_shard(grid_rows):
+    seen = set()
+    first = trim_shard(shard_frame(grid_rows[0:3]), seen)
+    second = trim_shard(shard_frame(grid_rows[3:6]), seen)
+    # A multi-day activity listed again two shards later
+    third = trim_shard(shard_frame([grid_rows[1], grid_rows[6]]), seen)
+    assert (len(first), len(second)) == (3, 3)
+    assert third["incarico"].tolist() == [grid_rows[6][FETCH_COLUMNS.index("incarico")]]
+
+
+def test_trim_shard_keeps_duplicates_inside_a_shard(grid_rows):
+    df = trim_shard(shard_frame([grid_rows[0], grid_rows[0]]), set())
+    assert len(df) == 2
+
+
+def test_trim_shard_keeps_activities_that_differ_only_in_rapportino(grid_rows):
+    seen = set()
+    trim_shard(shard_frame([grid_rows[0]]), seen)
+    other = list(grid_rows[0])
+    other[FETCH_COLUMNS.index("rapportino")] += "-2"
+    df = trim_shard(shard_frame([other, grid_rows[0]]), seen)
+    assert df["rapportino"].tolist() == [other[FETCH_COLUMNS.index("rapportino")]]
+
+
+def test_shards_are_merged_newest_first_like_an_unsharded_run(monkeypatch, tmp_path, grid_rows):
+    def fake_shard(shard_index, shard_range, *args):
+        # One row per shard, dated on the shard's first day
+        row = list(grid_rows[shard_index])
+        row[FETCH_COLUMNS.index("inizio")] = f"{shard_range[0]:%d/%m/%Y} 09:00"
+        return shard_index, shard_frame([row]), None
+
+    monkeypatch.setattr(sharding, "run_shard", fake_shard)
+    monkeypatch.setattr(sharding, "ProcessPoolExecutor",
+                        lambda max_workers, mp_context: ThreadPoolExecutor(max_workers=max_workers))
+    save_path = str(tmp_path / "merged.csv")
+    assert sharding.run_sharded("user@example.com", "secret", "", save_path, date(2024, 1, 1),
+                                date(2024, 3, 31), unit="month", workers=2, log=lambda message: None)
+    df = pd.read_csv(save_path)
+    assert df["inizio"].tolist() == ["2024-03-01 09:00:00", "2024-02-01 09:00:00", "2024-01-01 09:00:00"]
@@ -0,0 +1,170 @@
+import time
+from collections import defaultdict
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.support.ui import WebDriverWait
+
+from instrumentation import NULL_TRACE
+
+
+DEFAULT_TIMEOUTS = {
+    "dom_quiet": 10,
+    "xhr_idle": 15,
+    "page_change": 15,
+    "element_present": 10,
+    "element_gone": 10,
+}
+
+# Tracks in-flight XHR/fetch requests and the time of the last DOM mutation.
+# Safe to run more than once per document; it only installs itself once.
+INSTRUMENT_JS = '''
+    if (!window.__scrapeWaits) {
+        const state = {pending: 0, lastMutation: Date.now()};
+        window.__scrapeWaits = state;
+
+        const origOpen = XMLHttpRequest.prototype.open;
+        const origSend = XMLHttpRequest.prototype.send;
+        XMLHttpRequest.prototype.open = function () {
+            this.__scrapeTracked = false;
+            return origOpen.apply(this, arguments);
+        };
+        XMLHttpRequest.prototype.send = function () {
+            if (!this.__scrapeTracked) {
+                this.__scrapeTracked = true;
+                state.pending += 1;
+                this.addEventListener("loadend", function () {
+                    state.pending = Math.max(0, state.pending - 1);
+                });
+            }
+            return origSend.apply(this, arguments);
+        };
+
+        if (window.fetch) {
+            const origFetch = window.fetch;
+            window.fetch = function () {
+                state.pending += 1;
+                return origFetch.apply(this, arguments).finally(function () {
+                    state.pending = Math.max(0, state.pending - 1);
+                });
+            };
+        }
+
+        new MutationObserver(function () {
+            state.lastMutation = Date.now();
+        }).observe(document.documentElement, {childList: true, subtree: true, attributes: true, characterData: true});
+    }
+    return true;
+'''
+
+DOM_QUIET_JS = '''
+    const state = window.__scrapeWaits;
+    return !!state && (Date.now() - state.lastMutation) >= arguments[0];
+'''
+
+XHR_IDLE_JS = '''
+    const state = window.__scrapeWaits;
+    return !!state && state.pending === 0;
+'''
+
+XPATH_PRESENT_JS = '''
+    return document.evaluate(arguments[0], document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue !== null;
+'''
+
+PAGE_INFO_JS = '''
+    const node = document.evaluate("//div[contains(text(), 'Pagina')]", document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    return node ? node.textContent.trim() : null;
+'''
+
+
+class WaitEngine:
+    """Condition-based waits that replace fixed time.sleep calls.
+
+    Every wait returns True when its condition was met and False on timeout,
+    never sleeps less than the politeness minimum, and records how long it
+    took so the run can report where the time went.
+    """
+
+    def __init__(self, driver, log, politeness=0.2, timeouts=None, poll_frequency=0.1, trace=NULL_TRACE):
+        self.driver = driver
+        self.log = log
+        self.trace = trace
+        self.politeness = politeness
+        self.poll_frequency = poll_frequency
+        self.timeouts = dict(DEFAULT_TIMEOUTS)
+        if timeouts:
+            self.timeouts.update(timeouts)
+        self.totals = defaultdict(float)
+        self.counts = defaultdict(int)
+
+    def install(self):
+        """Install the XHR/mutation hooks into the current document"""
+        try:
+            self.driver.execute_script(INSTRUMENT_JS)
+        except WebDriverException as e:
+            self.log(f"⚠ Could not install wait hooks: {e}")
+
+    def _wait(self, name, label, condition, timeout=None):
+        timeout = self.timeouts[name] if timeout is None else timeout
+        start = time.monotonic()
+        met = True
+        with self.trace.phase(name, cat="wait", label=label):
+            try:
+                WebDriverWait(self.driver, timeout, poll_frequency=self.poll_frequency).until(condition)
+            except TimeoutException:
+                met = False
+
+            elapsed = time.monotonic() - start
+            if elapsed < self.politeness:
+                time.sleep(self.politeness - elapsed)
+                elapsed = self.politeness
+
+        self.totals[name] += elapsed
+        self.counts[name] += 1
+        status = "✓" if met else "⚠ timeout"
+        self.log(f"⏱ {status} wait {name} ({label}): {elapsed:.2f}s")
+        return met
+
+    def dom_quiet(self, label="", quiet_ms=300, timeout=None):
+        """Wait until the DOM has not changed for quiet_ms milliseconds"""
+        self.install()
+        return self._wait("dom_quiet", label,
+                          lambda d: d.execute_script(DOM_QUIET_JS, quiet_ms), timeout)
+
+    def xhr_idle(self, label="", timeout=None):
+        """Wait until no XHR/fetch request is in flight"""
+        self.install()
+        return self._wait("xhr_idle", label,
+                          lambda d: d.execute_script(XHR_IDLE_JS), timeout)
+
+    def settled(self, label="", quiet_ms=300):
+        """Wait for in-flight requests to drain and the DOM to go quiet"""
+        idle = self.xhr_idle(label)
+        quiet = self.dom_quiet(label, quiet_ms=quiet_ms)
+        return idle and quiet
+
+    def page_info(self):
+        """Return the current 'Pagina X di Y' text, or None"""
+        return self.driver.execute_script(PAGE_INFO_JS)
+
+    def page_change(self, previous_text, label="", timeout=None):
+        """Wait until the 'Pagina X di Y' text differs from previous_text"""
+        return self._wait("page_change", label,
+                          lambda d: (d.execute_script(PAGE_INFO_JS) or previous_text) != previous_text, timeout)
+
+    def element_present(self, xpath, label="", timeout=None):
+        """Wait until an element matching xpath is attached to the DOM"""
+        return self._wait("element_present", label,
+                          lambda d: d.execute_script(XPATH_PRESENT_JS, xpath), timeout)
+
+    def element_gone(self, xpath, label="", timeout=None):
+        """Wait until no element matches xpath"""
+        return self._wait("element_gone", label,
+                          lambda d: not d.execute_script(XPATH_PRESENT_JS, xpath), timeout)
+
+    def summary(self):
+        """Log total time spent per wait condition"""
+        if not self.counts:
+            return
+        self.log("⏱ Wait summary:")
+        for name in sorted(self.totals, key=self.totals.get, reverse=True):
+            self.log(f"   {name}: {self.counts[name]} waits, {self.totals[name]:.2f}s total")